@@ -0,0 +1,183 @@
+import asyncio
+import contextlib
+import math
+import time
+from collections import deque
+from typing import Deque, Dict, Optional
+from jose import JWTError, jwt
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+from app.config import RouteLimit
+
+# İstemci başına tutulan bucket sayısı bu sınırı aşınca boşta olanlar atılır
+MAX_TRACKED_CLIENTS = 10000
+
+class TokenBucket:
+    __slots__ = ("rate", "capacity", "tokens", "updated")
+
+    def __init__(self, rate: float, capacity: int, now: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = now
+
+    def refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    # 0 dönerse istek kabul edildi, aksi halde bir sonraki token için beklenecek süre
+    def take(self, now: float) -> float:
+        self.refill(now)
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def is_full(self, now: float) -> bool:
+        self.refill(now)
+        return self.tokens >= self.capacity
+
+class RouteGate:
+    def __init__(self, limit: RouteLimit):
+        self.limit = limit
+        self.active = 0
+        self.waiters: Deque[asyncio.Future] = deque()
+        self.buckets: Dict[str, TokenBucket] = {}
+        # Ortalama servis süresi (EWMA); kuyruk bekleme tahmini için
+        self.avg_service = 0.0
+        self.admitted = 0
+        self.rate_limited = 0
+        self.shed = 0
+
+    def take_token(self, client: str) -> float:
+        now = time.monotonic()
+        bucket = self.buckets.get(client)
+        if bucket is None:
+            if len(self.buckets) >= MAX_TRACKED_CLIENTS:
+                self._prune(now)
+            bucket = self.buckets[client] = TokenBucket(self.limit.rate, self.limit.burst, now)
+        wait = bucket.take(now)
+        if wait:
+            self.rate_limited += 1
+        return wait
+
+    def _prune(self, now: float) -> None:
+        for key in [k for k, b in self.buckets.items() if b.is_full(now)]:
+            del self.buckets[key]
+
+    def expected_wait(self) -> float:
+        return (len(self.waiters) + 1) / self.limit.max_concurrency * self.avg_service
+
+    # None dönerse slot alındı, aksi halde Retry-After için saniye
+    async def acquire(self) -> Optional[float]:
+        if self.active < self.limit.max_concurrency and not self.waiters:
+            self.active += 1
+            self.admitted += 1
+            return None
+
+        expected = self.expected_wait()
+        if len(self.waiters) >= self.limit.max_queue or expected > self.limit.queue_timeout:
+            self.shed += 1
+            return max(expected, self.avg_service)
+
+        waiter = asyncio.get_running_loop().create_future()
+        self.waiters.append(waiter)
+        try:
+            await asyncio.wait_for(waiter, timeout=self.limit.queue_timeout)
+        except asyncio.TimeoutError:
+            # Zaman aşımı devirle yarışmış olabilir; slot bu isteğe devredildiyse sızmasın diye geri verilir
+            self._abandon(waiter)
+            self.shed += 1
+            return self.expected_wait()
+        except asyncio.CancelledError:
+            # İstemci bekleme sırasında koptu; devredilen slot varsa geri ver
+            self._abandon(waiter)
+            raise
+        # Slot, bırakan istek tarafından devredildi (active değişmedi)
+        self.admitted += 1
+        return None
+
+    # Vazgeçen bekleyici kuyruktan hemen çıkarılır; ölü future'lar kuyruk uzunluğunu ve bekleme tahminini
+    # şişirip yeni istekleri gereksiz yere reddetmesin
+    def _abandon(self, waiter: asyncio.Future) -> None:
+        if waiter.done() and not waiter.cancelled():
+            self._hand_off()
+        else:
+            with contextlib.suppress(ValueError):
+                self.waiters.remove(waiter)
+
+    def release(self, elapsed: float) -> None:
+        self.avg_service = elapsed if not self.avg_service else 0.8 * self.avg_service + 0.2 * elapsed
+        self._hand_off()
+
+    def _hand_off(self) -> None:
+        while self.waiters:
+            waiter = self.waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(True)
+                return
+        self.active -= 1
+
+    def stats(self) -> dict:
+        return {
+            "active": self.active,
+            "queued": len(self.waiters),
+            "avg_service_ms": round(self.avg_service * 1000, 2),
+            "admitted": self.admitted,
+            "rate_limited": self.rate_limited,
+            "shed": self.shed,
+        }
+
+def _reject(status_code: int, detail: str, retry_after: float) -> JSONResponse:
+    return JSONResponse(
+        status_code=status_code,
+        content={"detail": detail},
+        headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+    )
+
+class AdmissionControlMiddleware:
+    def __init__(self, app: ASGIApp, limits: Dict[str, RouteLimit], secret_key: str, algorithm: str):
+        self.app = app
+        self.gates = {route: RouteGate(limit) for route, limit in limits.items()}
+        self.secret_key = secret_key
+        self.algorithm = algorithm
+
+    def _client_key(self, scope: Scope) -> str:
+        for name, value in scope.get("headers", []):
+            if name == b"authorization":
+                scheme, _, token = value.decode("latin-1").partition(" ")
+                if scheme.lower() == "bearer" and token:
+                    try:
+                        payload = jwt.decode(token, self.secret_key, algorithms=[self.algorithm])
+                        return f"user:{payload.get('sub')}"
+                    except JWTError:
+                        pass
+                break
+        client = scope.get("client")
+        return f"ip:{client[0] if client else 'unknown'}"
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        gate = self.gates.get(f"{scope['method']} {scope['path']}")
+        if gate is None:
+            await self.app(scope, receive, send)
+            return
+
+        retry_after = gate.take_token(self._client_key(scope))
+        if retry_after:
+            await _reject(429, "Too many requests", retry_after)(scope, receive, send)
+            return
+
+        retry_after = await gate.acquire()
+        if retry_after is not None:
+            await _reject(503, "Server is busy, please retry later", retry_after)(scope, receive, send)
+            return
+
+        started = time.monotonic()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            gate.release(time.monotonic() - started)
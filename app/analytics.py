@@ -0,0 +1,194 @@
+from datetime import datetime, timezone
+from typing import Dict, List, Tuple
+import numpy as np
+from sqlalchemy import String, cast, func, select
+from sqlalchemy.orm import Session
+from app import models
+
+BUCKET_SECONDS = {"day": 86400, "week": 7 * 86400}
+
+# Unix epoch'un Jülyen günü karşılığı
+UNIX_EPOCH_JULIAN_DAY = 2440587.5
+
+def _epoch(column):
+    # SQLite: saklanan zaman damgasını Unix saniyesine çevir (strftime('%s')'ten hızlı)
+    return (func.julianday(column) - UNIX_EPOCH_JULIAN_DAY) * 86400.0
+
+def _to_epoch(value: datetime) -> int:
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return int(value.timestamp())
+
+# ORM nesnesi ve Row oluşturmadan DBAPI imlecinden doğrudan NumPy dizilerine.
+# Kolonlar NULL içermemeli (gerekirse coalesce ile).
+def _fetch_columns(db: Session, stmt, dtypes: List[str]) -> List[np.ndarray]:
+    cursor = db.connection().execute(stmt).cursor
+    data = np.fromiter(cursor, dtype=[(f"c{i}", dtype) for i, dtype in enumerate(dtypes)])
+    return [data[f"c{i}"] for i in range(len(dtypes))]
+
+# Araç id -> grup anahtarı (araç ya da sahip) için arama dizisi
+def _vehicle_keys(db: Session, group_by: str) -> np.ndarray:
+    vehicle_ids, owner_ids = _fetch_columns(
+        db,
+        select(models.Vehicle.id, func.coalesce(models.Vehicle.owner_id, 0)),
+        ["int64", "int64"]
+    )
+    lookup = np.full(int(vehicle_ids.max()) + 1 if len(vehicle_ids) else 1, -1, dtype=np.int64)
+    lookup[vehicle_ids] = owner_ids if group_by == "owner" else vehicle_ids
+    return lookup
+
+# Kova sınırları (Unix saniyesi); son eleman aralığın sonu
+def bucket_edges(start_date: datetime, end_date: datetime, bucket: str) -> np.ndarray:
+    start, end = _to_epoch(start_date), _to_epoch(end_date)
+    if bucket == "month":
+        first = np.datetime64(start, "s").astype("datetime64[M]")
+        last = np.datetime64(end - 1, "s").astype("datetime64[M]") + 1
+        edges = np.arange(first, last + 1).astype("datetime64[s]").astype(np.int64)
+        edges[0] = start
+    else:
+        edges = np.arange(start, end, BUCKET_SECONDS[bucket], dtype=np.int64)
+    return np.append(edges[edges < end], end)
+
+def _bucket_labels(edges: np.ndarray) -> List[str]:
+    return [datetime.fromtimestamp(int(e), tz=timezone.utc).isoformat() for e in edges[:-1]]
+
+def _group_index(keys: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    groups, index = np.unique(keys, return_inverse=True)
+    return groups, index
+
+# Aralıkları kovalara böl: her (aralık, kova) çifti için örtüşme saniyesi
+def _split_by_bucket(starts: np.ndarray, ends: np.ndarray, edges: np.ndarray):
+    n_buckets = len(edges) - 1
+    starts = np.clip(starts, edges[0], edges[-1])
+    ends = np.clip(ends, edges[0], edges[-1])
+    first = np.clip(np.searchsorted(edges, starts, side="right") - 1, 0, n_buckets - 1)
+    last = np.clip(np.searchsorted(edges, ends, side="left") - 1, 0, n_buckets - 1)
+    counts = np.maximum(last - first + 1, 0)
+    owner = np.repeat(np.arange(len(starts)), counts)
+    offsets = np.repeat(np.cumsum(counts) - counts, counts)
+    buckets = first[owner] + (np.arange(len(owner)) - offsets)
+    overlap = np.minimum(ends[owner], edges[buckets + 1]) - np.maximum(starts[owner], edges[buckets])
+    return owner, buckets, np.maximum(overlap, 0)
+
+def utilization(db: Session, start_date: datetime, end_date: datetime, bucket: str, group_by: str) -> Dict:
+    edges = bucket_edges(start_date, end_date, bucket)
+    n_buckets = len(edges) - 1
+    lookup = _vehicle_keys(db, group_by)
+    vehicle_keys = lookup[lookup >= 0]
+    groups, vehicle_group = _group_index(vehicle_keys)
+    fleet_size = np.bincount(vehicle_group, minlength=len(groups))
+
+    vehicle_ids, starts, ends = _fetch_columns(
+        db,
+        select(func.coalesce(models.Rental.vehicle_id, 0), _epoch(models.Rental.start_date), _epoch(models.Rental.end_date))
+        .where(models.Rental.start_date < end_date, models.Rental.end_date > start_date),
+        ["int64", "float64", "float64"]
+    )
+    # Silinmiş araçlara ait kiralamalar hesaba katılmaz
+    known = (vehicle_ids < len(lookup)) & (lookup[np.minimum(vehicle_ids, len(lookup) - 1)] >= 0)
+    rental_keys, starts, ends = lookup[vehicle_ids[known]], starts[known], ends[known]
+    rented = np.zeros(len(groups) * n_buckets)
+    if len(rental_keys):
+        owner, buckets, seconds = _split_by_bucket(starts, ends, edges)
+        group_idx = np.searchsorted(groups, rental_keys)[owner]
+        rented = np.bincount(group_idx * n_buckets + buckets, weights=seconds, minlength=len(groups) * n_buckets)
+    rented = rented.reshape(len(groups), n_buckets)
+    capacity = fleet_size[:, None] * np.diff(edges)[None, :]
+    ratio = np.divide(rented, capacity, out=np.zeros_like(rented), where=capacity > 0)
+
+    return {
+        "buckets": _bucket_labels(edges),
+        "group_by": group_by,
+        "groups": [
+            {"key": int(key), "rented_hours": np.round(hours / 3600, 2).tolist(), "utilization": np.round(r, 4).tolist()}
+            for key, hours, r in zip(groups, rented, ratio)
+        ],
+    }
+
+def revenue(db: Session, start_date: datetime, end_date: datetime, bucket: str, group_by: str) -> Dict:
+    edges = bucket_edges(start_date, end_date, bucket)
+    n_buckets = len(edges) - 1
+    lookup = _vehicle_keys(db, group_by)
+
+    vehicle_ids, starts, prices = _fetch_columns(
+        db,
+        select(
+            func.coalesce(models.Rental.vehicle_id, 0),
+            _epoch(models.Rental.start_date),
+            func.coalesce(models.Rental.total_price, 0.0)
+        ).where(models.Rental.start_date >= start_date, models.Rental.start_date < end_date),
+        ["int64", "float64", "float64"]
+    )
+    known = (vehicle_ids < len(lookup)) & (lookup[np.minimum(vehicle_ids, len(lookup) - 1)] >= 0)
+    keys, starts, prices = lookup[vehicle_ids[known]], starts[known], prices[known]
+    # Gelir kiralamanın başladığı kovaya yazılır
+    groups, group_idx = _group_index(keys)
+    buckets = np.searchsorted(edges, starts, side="right") - 1
+    flat = group_idx * n_buckets + buckets
+    size = len(groups) * n_buckets
+    totals = np.bincount(flat, weights=prices, minlength=size).reshape(len(groups), n_buckets)
+    counts = np.bincount(flat, minlength=size).reshape(len(groups), n_buckets)
+
+    return {
+        "buckets": _bucket_labels(edges),
+        "group_by": group_by,
+        "total_revenue": round(float(totals.sum()), 2),
+        "groups": [
+            {"key": int(key), "revenue": np.round(total, 2).tolist(), "rentals": count.tolist()}
+            for key, total, count in zip(groups, totals, counts)
+        ],
+    }
+
+def ride_fill_rates(db: Session, start_date: datetime, end_date: datetime, bucket: str) -> Dict:
+    edges = bucket_edges(start_date, end_date, bucket)
+    n_buckets = len(edges) - 1
+
+    ride_ids, starts, free_seats = _fetch_columns(
+        db,
+        select(models.Ride.id, _epoch(models.Ride.start_date), models.Ride.available_seats)
+        .where(models.Ride.start_date >= start_date, models.Ride.start_date < end_date)
+        .order_by(models.Ride.id),
+        ["int64", "float64", "int64"]
+    )
+    participant_ride_ids, passengers = _fetch_columns(
+        db,
+        select(models.RideParticipant.ride_id, func.coalesce(models.RideParticipant.passengers_count, 1))
+        .where(models.RideParticipant.ride_id.in_(
+            select(models.Ride.id).where(models.Ride.start_date >= start_date, models.Ride.start_date < end_date)
+        )),
+        ["int64", "int64"]
+    )
+    # available_seats katılımlardan sonra kalan koltuk sayısıdır
+    taken = np.zeros(len(ride_ids))
+    if len(participant_ride_ids):
+        position = np.searchsorted(ride_ids, participant_ride_ids)
+        np.add.at(taken, position, np.maximum(passengers, 1))
+    buckets = np.searchsorted(edges, starts, side="right") - 1
+    taken_per_bucket = np.bincount(buckets, weights=taken, minlength=n_buckets)
+    offered_per_bucket = np.bincount(buckets, weights=taken + free_seats, minlength=n_buckets)
+    rides_per_bucket = np.bincount(buckets, minlength=n_buckets)
+    fill = np.divide(taken_per_bucket, offered_per_bucket, out=np.zeros(n_buckets), where=offered_per_bucket > 0)
+
+    return {
+        "buckets": _bucket_labels(edges),
+        "rides": rides_per_bucket.tolist(),
+        "seats_taken": taken_per_bucket.astype(np.int64).tolist(),
+        "seats_offered": offered_per_bucket.astype(np.int64).tolist(),
+        "fill_rate": np.round(fill, 4).tolist(),
+    }
+
+def rating_distribution(db: Session) -> Dict:
+    types, ratings = _fetch_columns(
+        db,
+        select(cast(models.Review.type, String), models.Review.rating),
+        ["U16", "int64"]
+    )
+    result = {}
+    for review_type in models.ReviewType:
+        values = ratings[types == review_type.name]
+        result[review_type.value] = {
+            "count": int(len(values)),
+            "average": round(float(values.mean()), 2) if len(values) else None,
+            "histogram": np.bincount(values, minlength=11).tolist(),
+        }
+    return result
@@ -0,0 +1,167 @@
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, List, Optional
+from sqlalchemy import Column, DateTime, Index, MetaData, Table, delete, event, func, insert, literal, select
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+from app import changes, models
+from app.config import settings
+
+# ARCHIVE_DATABASE_PATH verilirse arşiv tabloları ATTACH edilen ayrı SQLite dosyasında ("archive" şeması) tutulur
+ARCHIVE_SCHEMA = "archive" if settings.ARCHIVE_DATABASE_PATH else None
+
+archive_metadata = MetaData(schema=ARCHIVE_SCHEMA)
+
+# Sıcak tablonun kolonlarının kopyası (FK ve indeksler olmadan) + archived_at
+def _archive_table(source: Table, *indexes) -> Table:
+    columns = [Column(c.name, c.type, primary_key=c.primary_key, nullable=c.nullable) for c in source.columns]
+    return Table(f"{source.name}_archive", archive_metadata, *columns, Column("archived_at", DateTime, nullable=False), *indexes)
+
+rentals_archive = _archive_table(
+    models.Rental.__table__,
+    Index("ix_rentals_archive_user", "user_id"),
+    Index("ix_rentals_archive_vehicle_period", "vehicle_id", "start_date"),
+)
+rides_archive = _archive_table(
+    models.Ride.__table__,
+    Index("ix_rides_archive_renter", "renter_id"),
+    Index("ix_rides_archive_start_date", "start_date"),
+)
+ride_participants_archive = _archive_table(
+    models.RideParticipant.__table__,
+    Index("ix_ride_participants_archive_ride", "ride_id"),
+    Index("ix_ride_participants_archive_user", "user_id"),
+)
+
+# Sıcak tablo adı -> arşiv tablosu. Sıcak tablolar AUTOINCREMENT olduğundan taşınan id'ler yeniden verilmez
+ARCHIVE_TABLES = {
+    "rentals": rentals_archive,
+    "rides": rides_archive,
+    "ride_participants": ride_participants_archive,
+}
+
+def setup(engine: Engine) -> None:
+    if ARCHIVE_SCHEMA:
+        @event.listens_for(engine, "connect")
+        def _attach_archive(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+            cursor.execute(f"ATTACH DATABASE ? AS {ARCHIVE_SCHEMA}", (settings.ARCHIVE_DATABASE_PATH,))
+            cursor.close()
+        # Havuzdaki (ATTACH edilmemiş) bağlantıları bırak
+        engine.dispose()
+    archive_metadata.create_all(bind=engine)
+
+def _move(db: Session, source: Table, target: Table, ids_stmt, archived_at: datetime) -> int:
+    columns = [c.name for c in source.columns]
+    moved = db.execute(insert(target).from_select(
+        columns + ["archived_at"],
+        select(*source.c, literal(archived_at, DateTime)).where(source.c.id.in_(ids_stmt))
+    )).rowcount
+    # Senkron istemciler için arşivlenen satır silinmiş sayılır (değişiklik akışına "delete" yazılır)
+    if source.name in changes.ENTITY_BY_TABLE:
+        for row in db.execute(select(*source.c).where(source.c.id.in_(ids_stmt))):
+            changes.record_table(db, source.name, row, "delete")
+    db.execute(delete(source).where(source.c.id.in_(ids_stmt)))
+    return moved
+
+# Bitiş tarihi cutoff'tan önce olan yolculuk (katılımcılarıyla) ve kiralamaları batch'ler halinde taşır.
+# Her batch ayrı transaction; yazma kilidi kısa tutulur.
+def archive_finished(db: Session, cutoff: datetime, batch_size: int) -> Dict[str, int]:
+    rides = models.Ride.__table__
+    participants = models.RideParticipant.__table__
+    rentals = models.Rental.__table__
+    moved = {"rides": 0, "ride_participants": 0, "rentals": 0, "batches": 0}
+
+    while True:
+        ride_ids = [row[0] for row in db.execute(
+            select(rides.c.id).where(rides.c.end_date < cutoff).order_by(rides.c.id).limit(batch_size)
+        )]
+        if not ride_ids:
+            break
+        now = datetime.utcnow()
+        # Yolculuğun tüm katılımcıları onunla birlikte taşınır; sıcak tabloda yetim katılımcı kalmaz
+        participant_ids = select(participants.c.id).where(participants.c.ride_id.in_(ride_ids))
+        moved["ride_participants"] += _move(db, participants, ride_participants_archive, participant_ids, now)
+        moved["rides"] += _move(db, rides, rides_archive, ride_ids, now)
+        moved["batches"] += 1
+        db.commit()
+
+    # Yolculuklar kiralama aralığı içinde olduğundan bu noktada kiralamaya bağlı sıcak yolculuk kalmaz
+    while True:
+        rental_ids = [row[0] for row in db.execute(
+            select(rentals.c.id).where(rentals.c.end_date < cutoff).order_by(rentals.c.id).limit(batch_size)
+        )]
+        if not rental_ids:
+            break
+        moved["rentals"] += _move(db, rentals, rentals_archive, rental_ids, datetime.utcnow())
+        moved["batches"] += 1
+        db.commit()
+    return moved
+
+# Arşivden sıcak tabloyla aynı kolonlarda satırlar; *Out şemaları from_attributes ile okuyabilir
+def archived_rows(
+    db: Session,
+    source: Table,
+    target: Table,
+    where: Optional[Callable] = None,
+    limit: Optional[int] = None
+) -> List:
+    stmt = select(*(target.c[c.name] for c in source.columns)).order_by(target.c.id)
+    if where is not None:
+        stmt = stmt.where(where(target))
+    if limit is not None:
+        stmt = stmt.limit(limit)
+    return db.execute(stmt).all()
+
+def _timed(fn: Callable[[], object], repeat: int = 3) -> float:
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return round(best * 1000, 3)
+
+# Sıcak tablolara giden tipik sorgular; arşivlemeden önce ve sonra ölçülür.
+# Tüm ölçümler indeksli count'tur; ölçüm, arşivleme işinin kendisinden pahalı olmasın diye satır taşınmaz
+def measure_hot_queries(db: Session) -> Dict[str, float]:
+    now = datetime.now(timezone.utc)
+    week = now + timedelta(days=7)
+    # Örnek kullanıcı/araç en son kiralamadan alınır (birincil anahtar üzerinden tek satır)
+    probe = db.execute(
+        select(models.Rental.user_id, models.Rental.vehicle_id).order_by(models.Rental.id.desc()).limit(1)
+    ).first()
+    user_id, vehicle_id = probe if probe is not None else (0, 0)
+    count = lambda table, *where: db.execute(select(func.count()).select_from(table).where(*where)).scalar()
+    rentals, rides, participants = models.Rental, models.Ride, models.RideParticipant
+    return {
+        "rental_overlap_ms": _timed(lambda: count(
+            rentals.__table__, rentals.vehicle_id == vehicle_id, rentals.start_date < week, rentals.end_date > now
+        )),
+        "user_rentals_ms": _timed(lambda: count(rentals.__table__, rentals.user_id == user_id)),
+        "upcoming_rides_ms": _timed(lambda: count(rides.__table__, rides.start_date >= now)),
+        "user_schedule_ms": _timed(lambda: count(
+            participants.__table__, participants.user_id == user_id,
+            participants.ride_start < week, participants.ride_end > now
+        )),
+    }
+
+def hot_counts(db: Session) -> Dict[str, int]:
+    return {
+        "rentals": db.query(func.count(models.Rental.id)).scalar(),
+        "rides": db.query(func.count(models.Ride.id)).scalar(),
+        "ride_participants": db.query(func.count(models.RideParticipant.id)).scalar(),
+    }
+
+def run(db: Session, older_than_days: int, batch_size: int) -> dict:
+    cutoff = datetime.now(timezone.utc) - timedelta(days=older_than_days)
+    before = {"rows": hot_counts(db), "timings": measure_hot_queries(db)}
+    moved = archive_finished(db, cutoff, batch_size)
+    after = {"rows": hot_counts(db), "timings": measure_hot_queries(db)}
+    return {
+        "cutoff": cutoff,
+        "archive_schema": ARCHIVE_SCHEMA or "main",
+        "moved": moved,
+        "before": before,
+        "after": after,
+    }
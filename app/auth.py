@@ -1,3 +1,4 @@
+import uuid
 from datetime import datetime, timedelta
 from typing import Optional
 from jose import JWTError, jwt
@@ -9,11 +10,13 @@ from app import schemas, models
 from app.database import get_db
 from app.config import settings  # <-- ✅ Buradan alıyoruz
 from app.schemas import UserRoleEnum
+from app.revocation import revocations
 
 # Ayarları kullan
 SECRET_KEY = settings.SECRET_KEY
 ALGORITHM = settings.ALGORITHM
 ACCESS_TOKEN_EXPIRE_MINUTES = settings.ACCESS_TOKEN_EXPIRE_MINUTES
+REFRESH_TOKEN_EXPIRE_DAYS = settings.REFRESH_TOKEN_EXPIRE_DAYS
 
 # Şifreleme
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
@@ -28,12 +31,41 @@ def get_password_hash(password):
     return pwd_context.hash(password)
 
 # JWT oluşturucu
+# Her token'ın kendi jti'si vardır; "fam" aynı girişten türeyen token zincirini (oturumu) belirtir
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
     expire = datetime.utcnow() + (expires_delta or timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES))
-    to_encode.update({"exp": expire})
+    to_encode.setdefault("fam", uuid.uuid4().hex)
+    to_encode.update({"exp": expire, "jti": uuid.uuid4().hex, "type": "access"})
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
+def create_refresh_token(data: dict, expires_delta: Optional[timedelta] = None):
+    to_encode = data.copy()
+    expire = datetime.utcnow() + (expires_delta or timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS))
+    to_encode.setdefault("fam", uuid.uuid4().hex)
+    to_encode.update({"exp": expire, "jti": uuid.uuid4().hex, "type": "refresh"})
+    return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+
+def create_token_pair(user_id: int, family: Optional[str] = None) -> dict:
+    family = family or uuid.uuid4().hex
+    data = {"sub": str(user_id), "fam": family}
+    return {
+        "access_token": create_access_token(data),
+        "refresh_token": create_refresh_token(data),
+        "token_type": "bearer",
+    }
+
+# İmza, süre ve token tipini doğrular; iptal kontrolü çağırana bırakılır
+def decode_token(token: str, token_type: str) -> dict:
+    payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    # type alanı olmayan eski access token'lar süreleri dolana kadar kabul edilir
+    if payload.get("type", "access") != token_type:
+        raise JWTError("Unexpected token type")
+    return payload
+
+def token_expiry(payload: dict) -> datetime:
+    return datetime.utcfromtimestamp(payload["exp"])
+
 # Kimlik doğrulama
 def authenticate_user(db: Session, email: str, password: str):
     user = db.query(models.User).filter(models.User.email == email).first()
@@ -50,11 +82,15 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
     )
 
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = decode_token(token, "access")
         user_id = int(payload.get("sub"))  # <-- ✅ Burada int dönüşümünü unutma
     except (JWTError, TypeError, ValueError):
         raise credentials_exception
 
+    # Bellekteki Bloom filtresi + küme; DB'ye gidilmez
+    if revocations.is_revoked(payload.get("jti"), payload.get("fam")):
+        raise credentials_exception
+
     user = db.query(models.User).filter(models.User.id == user_id).first()
     if user is None:
         raise credentials_exception
@@ -0,0 +1,154 @@
+import asyncio
+import json
+from collections import OrderedDict
+from datetime import datetime
+from typing import List, Optional, Set
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.schemas import ensure_aware_utc
+
+def ride_event(kind: str, ride, available_seats: Optional[int] = None) -> dict:
+    return {
+        "type": kind,
+        "ride_id": ride.id,
+        "available_seats": ride.available_seats if available_seats is None else available_seats,
+        "start_date": ensure_aware_utc(ride.start_date).isoformat().replace("+00:00", "Z"),
+        "start_location": ride.start_location,
+        "end_location": ride.end_location,
+    }
+
+class RideFilter:
+    def __init__(
+        self,
+        ride_ids: Optional[Set[int]] = None,
+        start_location: Optional[str] = None,
+        end_location: Optional[str] = None,
+        depart_after: Optional[datetime] = None,
+        depart_before: Optional[datetime] = None
+    ):
+        self.ride_ids = ride_ids or None
+        self.start_location = start_location.lower() if start_location else None
+        self.end_location = end_location.lower() if end_location else None
+        self.depart_after = ensure_aware_utc(depart_after) if depart_after else None
+        self.depart_before = ensure_aware_utc(depart_before) if depart_before else None
+
+    def matches(self, ride: dict) -> bool:
+        if self.ride_ids is not None and ride["ride_id"] not in self.ride_ids:
+            return False
+        if self.start_location and self.start_location not in ride["start_location"].lower():
+            return False
+        if self.end_location and self.end_location not in ride["end_location"].lower():
+            return False
+        if self.depart_after or self.depart_before:
+            start = datetime.fromisoformat(ride["start_date"].replace("Z", "+00:00"))
+            if self.depart_after and start < self.depart_after:
+                return False
+            if self.depart_before and start >= self.depart_before:
+                return False
+        return True
+
+# Abone başına sınırlı tampon: aynı yolculuğun bekleyen olayı yenisiyle değiştirilir (coalescing).
+# Tampon dolarsa en eski olay atılır ve istemciye "resync" gönderilir.
+class Subscription:
+    def __init__(self, ride_filter: RideFilter, buffer_size: int):
+        self.filter = ride_filter
+        self.buffer_size = buffer_size
+        self.pending: "OrderedDict[int, dict]" = OrderedDict()
+        self.overflowed = False
+        self.wakeup = asyncio.Event()
+        self.coalesced = 0
+        self.dropped = 0
+
+    def offer(self, ride: dict) -> None:
+        ride_id = ride["ride_id"]
+        if ride_id in self.pending:
+            self.coalesced += 1
+            self.pending.move_to_end(ride_id)
+        elif len(self.pending) >= self.buffer_size:
+            self.pending.popitem(last=False)
+            self.overflowed = True
+            self.dropped += 1
+        self.pending[ride_id] = ride
+        self.wakeup.set()
+
+    def drain(self) -> List[dict]:
+        events = list(self.pending.values())
+        self.pending.clear()
+        if self.overflowed:
+            self.overflowed = False
+            events.insert(0, {"type": "resync"})
+        self.wakeup.clear()
+        return events
+
+class RideBroker:
+    def __init__(self, buffer_size: int, max_subscribers: int):
+        self.buffer_size = buffer_size
+        self.max_subscribers = max_subscribers
+        self.subscribers: Set[Subscription] = set()
+        self.published = 0
+        self.delivered = 0
+        # Ayrılan abonelerin sayaçları
+        self.coalesced = 0
+        self.dropped = 0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    # Event loop thread'inde çağrılır
+    def subscribe(self, ride_filter: RideFilter) -> Optional[Subscription]:
+        if len(self.subscribers) >= self.max_subscribers:
+            return None
+        self._loop = asyncio.get_running_loop()
+        subscription = Subscription(ride_filter, self.buffer_size)
+        self.subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        if subscription in self.subscribers:
+            self.subscribers.discard(subscription)
+            self.coalesced += subscription.coalesced
+            self.dropped += subscription.dropped
+
+    # Herhangi bir thread'den (ör. threadpool'daki sync endpoint) çağrılabilir
+    def publish(self, events: List[dict]) -> None:
+        loop = self._loop
+        if not events or loop is None or not self.subscribers or loop.is_closed():
+            return
+        try:
+            loop.call_soon_threadsafe(self._dispatch, events)
+        except RuntimeError:
+            pass
+
+    # Olay başına O(abone)
+    def _dispatch(self, events: List[dict]) -> None:
+        for ride in events:
+            self.published += 1
+            for subscription in self.subscribers:
+                if subscription.filter.matches(ride):
+                    subscription.offer(ride)
+                    self.delivered += 1
+
+    def stats(self) -> dict:
+        return {
+            "subscribers": len(self.subscribers),
+            "published": self.published,
+            "delivered": self.delivered,
+            "coalesced": self.coalesced + sum(s.coalesced for s in self.subscribers),
+            "dropped": self.dropped + sum(s.dropped for s in self.subscribers),
+        }
+
+broker = RideBroker(settings.STREAM_BUFFER_SIZE, settings.STREAM_MAX_SUBSCRIBERS)
+
+# Olaylar transaction içinde biriktirilir, yalnızca commit sonrası yayınlanır
+def stage(db: Session, ride: dict) -> None:
+    db.info.setdefault("ride_events", []).append(ride)
+
+@event.listens_for(Session, "after_commit")
+def _publish_staged(session: Session) -> None:
+    broker.publish(session.info.pop("ride_events", []))
+
+@event.listens_for(Session, "after_rollback")
+def _discard_staged(session: Session) -> None:
+    session.info.pop("ride_events", None)
+
+def format_sse(event_type: str, data) -> str:
+    return f"event: {event_type}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n"
@@ -0,0 +1,245 @@
+import hashlib
+import hmac
+import json
+import logging
+import os
+import queue
+import random
+import re
+import threading
+import time
+from typing import Dict, List, Optional, Sequence
+from urllib.parse import parse_qsl
+from jose import JWTError
+from starlette.concurrency import run_in_threadpool
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app import auth, models
+from app.config import settings
+from app.database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+REDACTED = "***"
+SENSITIVE_KEY = re.compile(r"pass|token|secret|key|email|username|phone", re.IGNORECASE)
+MAX_SHAPE_BYTES = 1_000_000
+TOKEN_PATHS = ("/token", "/token/refresh")
+MAX_CACHED_ROLES = 10_000
+_ID_SEGMENT = re.compile(r"/\d+(?=/|$)")
+
+def route_template(path: str) -> str:
+    return _ID_SEGMENT.sub("/{id}", path)
+
+# Gövdenin değerleri değil yapısı kaydedilir: alan adları, tipler, liste uzunlukları
+def body_shape(value):
+    if isinstance(value, dict):
+        return {key: body_shape(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return {"list": len(value), "item": body_shape(value[0]) if value else None}
+    if value is None:
+        return "null"
+    if isinstance(value, bool):
+        return "bool"
+    if isinstance(value, (int, float)):
+        return type(value).__name__
+    return "str"
+
+def _request_shape(content_type: str, body: bytes):
+    if not body:
+        return None
+    if len(body) > MAX_SHAPE_BYTES:
+        return {"bytes": len(body)}
+    if content_type.startswith("application/json"):
+        try:
+            return body_shape(json.loads(body))
+        except ValueError:
+            return {"bytes": len(body)}
+    if content_type.startswith("application/x-www-form-urlencoded"):
+        return {"form": sorted({key for key, _ in parse_qsl(body.decode("latin-1"), keep_blank_values=True)})}
+    return {"bytes": len(body)}
+
+def sanitize_query(query_string: bytes) -> List[List[str]]:
+    return [
+        [key, REDACTED if SENSITIVE_KEY.search(key) else value]
+        for key, value in parse_qsl(query_string.decode("latin-1"), keep_blank_values=True)
+    ]
+
+# Kayıtlar kuyruktan ayrı bir thread'de dosyaya eklenir; istek yolunda disk yazısı yapılmaz.
+# Kuyruk doluysa kayıt atılır (dropped). Dosya max_bytes'ı aşınca ".1" uzantısıyla döndürülür.
+class TrafficRecorder:
+    def __init__(self, path: str, max_bytes: int, queue_size: int = 10_000):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self._thread: Optional[threading.Thread] = None
+        self.recorded = 0
+        self.dropped = 0
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None
+
+    def start(self) -> None:
+        if self._thread is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._thread = threading.Thread(target=self._run, name="traffic-recorder", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        thread, self._thread = self._thread, None
+        if thread is not None:
+            self._queue.put(None)
+            thread.join()
+
+    def record(self, entry: dict) -> None:
+        try:
+            self._queue.put_nowait(entry)
+        except queue.Full:
+            self.dropped += 1
+
+    def _run(self) -> None:
+        stream = open(self.path, "a", encoding="utf-8")
+        try:
+            while True:
+                entry = self._queue.get()
+                if entry is None:
+                    return
+                stream.write(json.dumps(entry, separators=(",", ":")) + "\n")
+                self.recorded += 1
+                if self._queue.empty() or self.recorded % 1000 == 0:
+                    stream.flush()
+                    if stream.tell() >= self.max_bytes:
+                        stream.close()
+                        os.replace(self.path, self.path + ".1")
+                        stream = open(self.path, "a", encoding="utf-8")
+        except OSError:
+            logger.exception("Traffic capture stopped")
+        finally:
+            stream.close()
+
+    def stats(self) -> dict:
+        return {
+            "running": self.running,
+            "path": self.path,
+            "queued": self._queue.qsize(),
+            "recorded": self.recorded,
+            "dropped": self.dropped,
+        }
+
+recorder = TrafficRecorder(settings.CAPTURE_PATH, settings.CAPTURE_MAX_BYTES)
+
+def _load_role(user_id: str) -> Optional[str]:
+    db = SessionLocal()
+    try:
+        role = db.query(models.User.role).filter(models.User.id == int(user_id)).scalar()
+    finally:
+        db.close()
+    return role.value if role is not None else None
+
+# Tekrar oynatma için istek izi: rota, parametreler, gövde yapısı, süre, durum kodu ve kullanıcı rolü.
+# Parola/token/e-posta gibi alanların değerleri yazılmaz; kullanıcı yalnızca HMAC takma adıyla görünür.
+class TrafficCaptureMiddleware:
+    def __init__(
+        self,
+        app: ASGIApp,
+        recorder: TrafficRecorder,
+        routes: Sequence[str],
+        sample_rate: float,
+        secret_key: str
+    ):
+        self.app = app
+        self.recorder = recorder
+        self.routes = [re.compile(pattern) for pattern in routes]
+        self.sample_rate = sample_rate
+        self.secret_key = secret_key.encode()
+        self._roles: Dict[str, Optional[str]] = {}
+
+    def _matches(self, scope: Scope) -> bool:
+        route = f"{scope['method']} {scope['path']}"
+        return any(pattern.fullmatch(route) for pattern in self.routes)
+
+    def _subject(self, token: Optional[str], token_type: str = "access") -> Optional[str]:
+        if not token:
+            return None
+        try:
+            sub = auth.decode_token(token, token_type).get("sub")
+        except JWTError:
+            return None
+        return str(sub) if sub is not None else None
+
+    async def _role(self, user_id: str) -> Optional[str]:
+        if user_id not in self._roles:
+            if len(self._roles) >= MAX_CACHED_ROLES:
+                self._roles.clear()
+            self._roles[user_id] = await run_in_threadpool(_load_role, user_id)
+        return self._roles[user_id]
+
+    def _pseudonym(self, user_id: str) -> str:
+        return hmac.new(self.secret_key, user_id.encode(), hashlib.sha256).hexdigest()[:12]
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if (
+            scope["type"] != "http"
+            or not self.recorder.running
+            or not self._matches(scope)
+            or random.random() >= self.sample_rate
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        token, content_type = None, ""
+        for name, value in scope.get("headers", []):
+            if name == b"authorization":
+                scheme, _, credentials = value.decode("latin-1").partition(" ")
+                if scheme.lower() == "bearer":
+                    token = credentials
+            elif name == b"content-type":
+                content_type = value.decode("latin-1").lower()
+
+        body: List[bytes] = []
+        response: List[bytes] = []
+        status_code = 500
+        keep_response = scope["path"] in TOKEN_PATHS
+
+        async def tee_receive() -> Message:
+            message = await receive()
+            if message["type"] == "http.request":
+                body.append(message.get("body", b""))
+            return message
+
+        async def tee_send(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            elif message["type"] == "http.response.body" and keep_response:
+                response.append(message.get("body", b""))
+            await send(message)
+
+        started_at = time.time()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, tee_receive, tee_send)
+        finally:
+            elapsed = time.perf_counter() - started
+            # Rol ve takma ad yanıt gönderildikten sonra çözülür; istemcinin gecikmesine eklenmez
+            user_id = self._subject(token)
+            if user_id is None and keep_response and status_code == 200:
+                try:
+                    user_id = self._subject(json.loads(b"".join(response)).get("access_token"))
+                except ValueError:
+                    user_id = None
+            raw = b"".join(body)
+            self.recorder.record({
+                "t": round(started_at, 4),
+                "method": scope["method"],
+                "path": scope["path"],
+                "route": route_template(scope["path"]),
+                "query": sanitize_query(scope.get("query_string", b"")),
+                "body": _request_shape(content_type, raw),
+                "bytes": len(raw),
+                "role": await self._role(user_id) if user_id else "anonymous",
+                "user": self._pseudonym(user_id) if user_id else None,
+                "status": status_code,
+                "ms": round(elapsed * 1000, 3),
+            })
@@ -0,0 +1,276 @@
+import logging
+import sys
+import threading
+from typing import Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+from app import models
+from app.config import settings
+from app.database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+# Sayısal kolonlar; NULL değerler owner_id ve luggage için -1, daily_rate için NaN olarak tutulur
+COLUMNS = {
+    "id": np.int64,
+    "owner_id": np.int64,
+    "seats": np.int32,
+    "luggage": np.int32,
+    "available": np.bool_,
+    "daily_rate": np.float64,
+    "brand": np.int32,    # brands sözlüğünde indeks
+    "model": np.int32,    # models sözlüğünde indeks
+}
+
+# Yalnızca eklenen string sözlüğü; aynı marka/model tek kopya tutulur
+class Vocabulary:
+    def __init__(self, values: Sequence[str] = ()):
+        self.values: Tuple[str, ...] = tuple(values)
+        self.codes: Dict[str, int] = {value: code for code, value in enumerate(self.values)}
+
+    def with_value(self, value: str) -> Tuple["Vocabulary", int]:
+        code = self.codes.get(value)
+        if code is not None:
+            return self, code
+        return Vocabulary(self.values + (sys.intern(value),)), len(self.values)
+
+    # Alt dize eşleşmesi sözlük üzerinde bir kez yapılır, kod dizisine maske olarak uygulanır
+    def contains(self, needle: str) -> np.ndarray:
+        needle = needle.lower()
+        return np.fromiter((needle in value.lower() for value in self.values), dtype=bool, count=len(self.values))
+
+# Değişmez kolon seti; id'ye göre sıralı. Okuyucular kilit almadan kullanır
+class CatalogSnapshot:
+    def __init__(self, columns: Dict[str, np.ndarray], plates: Tuple[str, ...], brands: Vocabulary, models_: Vocabulary):
+        for array in columns.values():
+            array.flags.writeable = False
+        self.columns = columns
+        self.plates = plates
+        self.brands = brands
+        self.models = models_
+
+    @classmethod
+    def empty(cls) -> "CatalogSnapshot":
+        return cls({name: np.empty(0, dtype=dtype) for name, dtype in COLUMNS.items()}, (), Vocabulary(), Vocabulary())
+
+    def __len__(self) -> int:
+        return len(self.columns["id"])
+
+    def _position(self, vehicle_id: int) -> Tuple[int, bool]:
+        ids = self.columns["id"]
+        position = int(np.searchsorted(ids, vehicle_id))
+        return position, position < len(ids) and ids[position] == vehicle_id
+
+    def filter(
+        self,
+        brand: Optional[str] = None,
+        model: Optional[str] = None,
+        min_seats: Optional[int] = None,
+        min_luggage: Optional[int] = None
+    ) -> np.ndarray:
+        c = self.columns
+        mask = c["available"].copy()
+        if brand:
+            mask &= self.brands.contains(brand)[c["brand"]]
+        if model:
+            mask &= self.models.contains(model)[c["model"]]
+        if min_seats:
+            mask &= c["seats"] >= min_seats
+        if min_luggage:
+            mask &= c["luggage"] >= min_luggage
+        return np.flatnonzero(mask)
+
+    # VehicleOut alanlarıyla aynı sözlükler
+    def rows(self, positions: np.ndarray) -> List[dict]:
+        c = self.columns
+        brands, models_ = self.brands.values, self.models.values
+        luggage = c["luggage"][positions].tolist()
+        rates = c["daily_rate"][positions].tolist()
+        return [
+            {
+                "id": vehicle_id,
+                "owner_id": None if owner_id < 0 else owner_id,
+                "brand": brands[brand],
+                "model": models_[model],
+                "license_plate": self.plates[position],
+                "seats": seats,
+                "luggage": None if luggage[i] < 0 else luggage[i],
+                "daily_rate": None if rates[i] != rates[i] else rates[i],
+                "available": available,
+            }
+            for i, (position, vehicle_id, owner_id, brand, model, seats, available) in enumerate(zip(
+                positions.tolist(),
+                c["id"][positions].tolist(),
+                c["owner_id"][positions].tolist(),
+                c["brand"][positions].tolist(),
+                c["model"][positions].tolist(),
+                c["seats"][positions].tolist(),
+                c["available"][positions].tolist(),
+            ))
+        ]
+
+    def with_vehicle(self, vehicle) -> "CatalogSnapshot":
+        brands, brand_code = self.brands.with_value(vehicle.brand)
+        models_, model_code = self.models.with_value(vehicle.model)
+        values = {
+            "id": vehicle.id,
+            "owner_id": -1 if vehicle.owner_id is None else vehicle.owner_id,
+            "seats": vehicle.seats,
+            "luggage": -1 if vehicle.luggage is None else vehicle.luggage,
+            "available": bool(vehicle.available),
+            "daily_rate": np.nan if vehicle.daily_rate is None else vehicle.daily_rate,
+            "brand": brand_code,
+            "model": model_code,
+        }
+        position, exists = self._position(vehicle.id)
+        columns = {}
+        for name, array in self.columns.items():
+            if exists:
+                array = array.copy()
+                array[position] = values[name]
+            else:
+                array = np.insert(array, position, values[name])
+            columns[name] = array
+        plates = list(self.plates)
+        if exists:
+            plates[position] = vehicle.license_plate
+        else:
+            plates.insert(position, vehicle.license_plate)
+        return CatalogSnapshot(columns, tuple(plates), brands, models_)
+
+    def without_vehicle(self, vehicle_id: int) -> "CatalogSnapshot":
+        position, exists = self._position(vehicle_id)
+        if not exists:
+            return self
+        columns = {name: np.delete(array, position) for name, array in self.columns.items()}
+        plates = self.plates[:position] + self.plates[position + 1:]
+        return CatalogSnapshot(columns, plates, self.brands, self.models)
+
+    def memory_bytes(self) -> dict:
+        strings = lambda values: sum(sys.getsizeof(v) for v in values) + sys.getsizeof(values)
+        return {
+            "columns": int(sum(array.nbytes for array in self.columns.values())),
+            "license_plates": strings(self.plates),
+            "brands": strings(self.brands.values),
+            "models": strings(self.models.values),
+        }
+
+def load_snapshot(db: Session) -> CatalogSnapshot:
+    rows = db.execute(
+        select(
+            models.Vehicle.id,
+            func.coalesce(models.Vehicle.owner_id, -1),
+            models.Vehicle.seats,
+            func.coalesce(models.Vehicle.luggage, -1),
+            func.coalesce(models.Vehicle.available, False),
+            models.Vehicle.daily_rate,
+            models.Vehicle.brand,
+            models.Vehicle.model,
+            models.Vehicle.license_plate,
+        ).order_by(models.Vehicle.id)
+    ).all()
+    brands: Dict[str, int] = {}
+    models_: Dict[str, int] = {}
+    columns = {
+        "id": np.fromiter((r[0] for r in rows), dtype=np.int64, count=len(rows)),
+        "owner_id": np.fromiter((r[1] for r in rows), dtype=np.int64, count=len(rows)),
+        "seats": np.fromiter((r[2] for r in rows), dtype=np.int32, count=len(rows)),
+        "luggage": np.fromiter((r[3] for r in rows), dtype=np.int32, count=len(rows)),
+        "available": np.fromiter((bool(r[4]) for r in rows), dtype=np.bool_, count=len(rows)),
+        "daily_rate": np.fromiter((np.nan if r[5] is None else r[5] for r in rows), dtype=np.float64, count=len(rows)),
+        "brand": np.fromiter((brands.setdefault(r[6], len(brands)) for r in rows), dtype=np.int32, count=len(rows)),
+        "model": np.fromiter((models_.setdefault(r[7], len(models_)) for r in rows), dtype=np.int32, count=len(rows)),
+    }
+    plates = tuple(r[8] for r in rows)
+    return CatalogSnapshot(
+        columns,
+        plates,
+        Vocabulary([sys.intern(v) for v in brands]),
+        Vocabulary([sys.intern(v) for v in models_])
+    )
+
+class VehicleCatalog:
+    def __init__(self, refresh_seconds: float):
+        self.refresh_seconds = refresh_seconds
+        self.snapshot = CatalogSnapshot.empty()
+        self.ready = False
+        self.version = 0
+        # Yalnızca yazarlar kilitlenir; okuyucu self.snapshot referansını bir kez okur
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _publish(self, snapshot: CatalogSnapshot) -> None:
+        self.snapshot = snapshot
+        self.version += 1
+
+    # Tamamı DB'den; kilit okuma boyunca tutulur ki eşzamanlı artımlı güncelleme kaybolmasın
+    def refresh(self, db: Session) -> None:
+        with self._lock:
+            self._publish(load_snapshot(db))
+            self.ready = True
+
+    # Satır kilit altında commit sonrası yeniden okunur; eşzamanlı güncellemeler hangi sırayla
+    # yayınlanırsa yayınlansın katalog son commit edilen hali tutar
+    def upsert(self, db: Session, vehicle_id: int) -> None:
+        if not self.ready:
+            return
+        with self._lock:
+            vehicle = db.query(models.Vehicle).populate_existing().filter(models.Vehicle.id == vehicle_id).first()
+            if vehicle is None:
+                self._publish(self.snapshot.without_vehicle(vehicle_id))
+            else:
+                self._publish(self.snapshot.with_vehicle(vehicle))
+
+    def remove(self, vehicle_id: int) -> None:
+        if not self.ready:
+            return
+        with self._lock:
+            self._publish(self.snapshot.without_vehicle(vehicle_id))
+
+    def search(self, offset: int = 0, limit: Optional[int] = None, **filters) -> List[dict]:
+        snapshot = self.snapshot
+        positions = snapshot.filter(**filters)
+        return snapshot.rows(positions[offset:] if limit is None else positions[offset:offset + limit])
+
+    def stats(self) -> dict:
+        snapshot = self.snapshot
+        memory = snapshot.memory_bytes()
+        return {
+            "ready": self.ready,
+            "version": self.version,
+            "vehicles": len(snapshot),
+            "available": int(snapshot.columns["available"].sum()),
+            "brands": len(snapshot.brands.values),
+            "models": len(snapshot.models.values),
+            "memory_bytes": dict(memory, total=sum(memory.values())),
+        }
+
+    def start(self) -> None:
+        db = SessionLocal()
+        try:
+            self.refresh(db)
+        finally:
+            db.close()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="vehicle-catalog", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join(1.0)
+
+    # Başka process'lerin yazdıklarını da yakalamak için periyodik tam yenileme
+    def _run(self) -> None:
+        while not self._stop.wait(self.refresh_seconds):
+            db = SessionLocal()
+            try:
+                self.refresh(db)
+            except Exception:
+                logger.exception("Vehicle catalog refresh failed")
+            finally:
+                db.close()
+
+catalog = VehicleCatalog(settings.CATALOG_REFRESH_SECONDS)
@@ -0,0 +1,137 @@
+import logging
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional
+from sqlalchemy import and_, delete, func, insert, or_, select
+from sqlalchemy.orm import Session, aliased
+from app import models, schemas
+from app.config import settings
+from app.database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+ENTITIES = {
+    "vehicle": (models.Vehicle, schemas.VehicleOut),
+    "rental": (models.Rental, schemas.RentalOut),
+    "ride": (models.Ride, schemas.RideOut),
+}
+ENTITY_BY_TABLE = {model.__tablename__: entity for entity, (model, _) in ENTITIES.items()}
+
+# CRUD yazısıyla aynı transaction'da çağrılır. SQLite yazarları sıralı commit ettiğinden
+# seq sırası commit sırasıyla aynıdır; imleçten sonra geç commit edilen küçük seq kalmaz.
+def record(db: Session, entity: str, row, op: str = "upsert") -> None:
+    values = {"entity": entity, "entity_id": row.id, "op": op, "changed_at": datetime.utcnow()}
+    if entity == "vehicle":
+        values["owner_id"] = row.owner_id
+    elif entity == "rental":
+        values["user_id"] = row.user_id
+        values["owner_id"] = select(models.Vehicle.owner_id).where(models.Vehicle.id == row.vehicle_id).scalar_subquery()
+    elif entity == "ride":
+        values["user_id"] = row.renter_id
+    db.execute(insert(models.ChangeLog).values(**values))
+
+def record_table(db: Session, table_name: str, row, op: str = "upsert") -> None:
+    entity = ENTITY_BY_TABLE.get(table_name)
+    if entity is not None:
+        record(db, entity, row, op)
+
+# Liste endpoint'lerindeki görünürlükle aynı
+def _scope(user: models.User):
+    c = models.ChangeLog
+    role = user.role
+    if role == models.UserRoleEnum.admin:
+        return None
+    if role == models.UserRoleEnum.owner:
+        return or_(and_(c.entity.in_(("vehicle", "rental")), c.owner_id == user.id), c.entity == "ride")
+    if role == models.UserRoleEnum.renter:
+        return or_(c.entity == "vehicle", and_(c.entity.in_(("rental", "ride")), c.user_id == user.id))
+    return c.entity.in_(("vehicle", "ride"))
+
+def _current(db: Session, entity: str, ids: List[int]) -> Dict[int, dict]:
+    model, out = ENTITIES[entity]
+    table = model.__table__
+    rows = db.execute(select(table).where(table.c.id.in_(ids))).all()
+    return {row.id: out.model_validate(row).model_dump() for row in rows}
+
+def feed(db: Session, user: models.User, since: int, limit: int) -> schemas.ChangeFeedOut:
+    c = models.ChangeLog
+    # Kapsam dışı kayıtlar da imleci ilerletsin diye üst sınır aynı okumada alınır
+    head = db.query(func.coalesce(func.max(c.seq), 0)).scalar()
+    query = db.query(c.seq, c.entity, c.entity_id, c.op).filter(c.seq > since, c.seq <= head)
+    scope = _scope(user)
+    if scope is not None:
+        query = query.filter(scope)
+    rows = query.order_by(c.seq).limit(limit + 1).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    # Sayfa içinde aynı varlığın yalnızca son değişikliği döner
+    latest = {}
+    for row in rows:
+        latest.pop((row.entity, row.entity_id), None)
+        latest[(row.entity, row.entity_id)] = row
+    upserts: Dict[str, List[int]] = {}
+    for row in latest.values():
+        if row.op == "upsert":
+            upserts.setdefault(row.entity, []).append(row.entity_id)
+    current = {entity: _current(db, entity, ids) for entity, ids in upserts.items()}
+
+    changes = []
+    for row in latest.values():
+        data = None
+        if row.op == "upsert":
+            data = current[row.entity].get(row.entity_id)
+            # Sonradan silinmiş/arşivlenmiş; silme kaydı sonraki sayfalarda gelir
+            if data is None:
+                continue
+        changes.append(schemas.ChangeOut(seq=row.seq, entity=row.entity, id=row.entity_id, op=row.op, data=data))
+    next_since = rows[-1].seq if has_more else max(since, head)
+    return schemas.ChangeFeedOut(changes=changes, next_since=next_since, has_more=has_more)
+
+# Aynı varlığın daha yeni kaydı varsa eskisi silinir. İmleç hangi seq'te olursa olsun
+# istemci sonraki kayıtla aynı son duruma ulaşır; log boyutu varlık sayısıyla sınırlı kalır.
+def compact(db: Session) -> int:
+    c = models.ChangeLog
+    newer = aliased(models.ChangeLog)
+    superseded = select(newer.seq).where(
+        newer.entity == c.entity,
+        newer.entity_id == c.entity_id,
+        newer.seq > c.seq
+    ).exists()
+    removed = db.execute(delete(c).where(superseded)).rowcount
+    db.commit()
+    return removed
+
+def stats(db: Session) -> dict:
+    c = models.ChangeLog
+    entries, head, tail = db.query(func.count(c.seq), func.max(c.seq), func.min(c.seq)).one()
+    return {"entries": entries, "head_seq": head or 0, "tail_seq": tail or 0}
+
+class ChangeCompactor:
+    def __init__(self, interval_seconds: float):
+        self.interval_seconds = interval_seconds
+        self.last_removed = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="change-compactor", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join(1.0)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval_seconds):
+            db = SessionLocal()
+            try:
+                self.last_removed = compact(db)
+            except Exception:
+                logger.exception("Change log compaction failed")
+            finally:
+                db.close()
+
+compactor = ChangeCompactor(settings.CHANGES_COMPACT_SECONDS)
@@ -0,0 +1,144 @@
+import asyncio
+import re
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode
+from jose import JWTError
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app import auth
+from app.revocation import revocations
+
+CapturedResponse = Tuple[int, List[Tuple[bytes, bytes]], bytes]
+
+class Flight:
+    __slots__ = ("done", "response", "waiters")
+
+    def __init__(self):
+        self.done = asyncio.Event()
+        self.response: Optional[CapturedResponse] = None
+        self.waiters = 0
+
+# Event loop thread'inden kullanılır; kilit gerekmez
+class FlightTable:
+    def __init__(self):
+        self.flights: Dict[tuple, Flight] = {}
+        self.executed = 0
+        self.coalesced = 0
+        self.fallbacks = 0
+        self.largest_flight = 0
+
+    def stats(self) -> dict:
+        total = self.executed + self.coalesced
+        return {
+            "in_flight": len(self.flights),
+            "executed": self.executed,
+            "coalesced": self.coalesced,
+            "fallbacks": self.fallbacks,
+            "largest_flight": self.largest_flight,
+            "coalesced_ratio": round(self.coalesced / total, 4) if total else 0.0,
+        }
+
+flights = FlightTable()
+
+# Aynı anda gelen aynı GET istekleri tek kez çalıştırılır; bekleyenler aynı yanıt baytlarını alır.
+# Kapsam "public": kimlikten bağımsız yanıt; "user": geçerli token'ın kullanıcısına göre ayrı anahtar.
+class CoalescingMiddleware:
+    def __init__(self, app: ASGIApp, table: FlightTable, routes: Dict[str, str], wait_timeout: float):
+        self.app = app
+        self.table = table
+        self.routes = [(re.compile(pattern), scope) for pattern, scope in routes.items()]
+        self.wait_timeout = wait_timeout
+
+    def _route_scope(self, scope: Scope) -> Optional[str]:
+        route = f"{scope['method']} {scope['path']}"
+        for pattern, route_scope in self.routes:
+            if pattern.fullmatch(route):
+                return route_scope
+        return None
+
+    # Geçersiz ya da iptal edilmiş token ile istek birleştirilmez; endpoint kendisi 401 döner
+    def _subject(self, scope: Scope) -> Optional[str]:
+        for name, value in scope.get("headers", []):
+            if name == b"authorization":
+                scheme, _, token = value.decode("latin-1").partition(" ")
+                if scheme.lower() != "bearer" or not token:
+                    return None
+                try:
+                    payload = auth.decode_token(token, "access")
+                except JWTError:
+                    return None
+                if revocations.is_revoked(payload.get("jti"), payload.get("fam")):
+                    return None
+                sub = payload.get("sub")
+                return str(sub) if sub is not None else None
+        return None
+
+    def _key(self, scope: Scope, route_scope: str) -> Optional[tuple]:
+        identity = ""
+        if route_scope == "user":
+            identity = self._subject(scope)
+            if identity is None:
+                return None
+        query = parse_qsl(scope.get("query_string", b"").decode("latin-1"), keep_blank_values=True)
+        return (scope["method"], scope["path"], urlencode(sorted(query)), identity)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        route_scope = self._route_scope(scope)
+        key = self._key(scope, route_scope) if route_scope else None
+        if key is None:
+            await self.app(scope, receive, send)
+            return
+
+        flight = self.table.flights.get(key)
+        if flight is not None:
+            flight.waiters += 1
+            self.table.largest_flight = max(self.table.largest_flight, flight.waiters + 1)
+            try:
+                await asyncio.wait_for(flight.done.wait(), timeout=self.wait_timeout)
+            except asyncio.TimeoutError:
+                pass
+            if flight.response is not None:
+                self.table.coalesced += 1
+                await _replay(flight.response, send, coalesced=True)
+                return
+            # Öncü istek hata verdi ya da çok uzun sürdü; istek kendi başına çalışır
+            self.table.fallbacks += 1
+            await self.app(scope, receive, send)
+            return
+
+        flight = self.table.flights[key] = Flight()
+        self.table.executed += 1
+        try:
+            response = await _capture(self.app, scope, receive)
+            if response[0] < 500:
+                flight.response = response
+        finally:
+            del self.table.flights[key]
+            flight.done.set()
+        await _replay(response, send)
+
+# Yanıt önce tamamen toplanır: öncünün istemcisi bağlantıyı kesse de bekleyenler yanıtı alır
+async def _capture(app: ASGIApp, scope: Scope, receive: Receive) -> CapturedResponse:
+    status_code = 500
+    headers: List[Tuple[bytes, bytes]] = []
+    chunks: List[bytes] = []
+
+    async def capture(message: Message) -> None:
+        nonlocal status_code, headers
+        if message["type"] == "http.response.start":
+            status_code = message["status"]
+            headers = list(message.get("headers", []))
+        elif message["type"] == "http.response.body":
+            chunks.append(message.get("body", b""))
+
+    await app(scope, receive, capture)
+    return status_code, headers, b"".join(chunks)
+
+async def _replay(response: CapturedResponse, send: Send, coalesced: bool = False) -> None:
+    status_code, headers, body = response
+    if coalesced:
+        headers = headers + [(b"x-coalesced", b"true")]
+    await send({"type": "http.response.start", "status": status_code, "headers": headers})
+    await send({"type": "http.response.body", "body": body})
@@ -1,12 +1,121 @@
+from typing import Dict, List, Optional, Tuple
+from pydantic import BaseModel
 from pydantic_settings import BaseSettings
 
+class RouteLimit(BaseModel):
+    max_concurrency: int = 4      # aynı anda çalışan istek sayısı
+    max_queue: int = 16           # sırada bekleyebilecek istek sayısı
+    queue_timeout: float = 2.0    # saniye; bu süreyi aşacak istekler reddedilir
+    rate: float = 5.0             # istemci başına saniyelik token
+    burst: int = 10               # token bucket kapasitesi
+
 class Settings(BaseSettings):
     SECRET_KEY: str
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    REFRESH_TOKEN_EXPIRE_DAYS: int = 14
     DATABASE_URL: str
     ADMIN_PASSWORD: str
 
+    # Admission control: "METHOD /path" -> limit
+    ADMISSION_CONTROL_ENABLED: bool = True
+    ADMISSION_LIMITS: Dict[str, RouteLimit] = {
+        "POST /token": RouteLimit(max_concurrency=4, max_queue=32, queue_timeout=2.0, rate=5.0, burst=20),
+        "GET /rentals/available/vehicles": RouteLimit(max_concurrency=8, max_queue=32, queue_timeout=3.0, rate=5.0, burst=10),
+    }
+
+    # Idempotency-Key: aynı anahtarla tekrarlanan yazma isteklerine kayıtlı yanıt döner
+    IDEMPOTENCY_ENABLED: bool = True
+    IDEMPOTENCY_ROUTES: List[str] = [
+        r"POST /rentals/",
+        r"POST /rentals/fleet",
+        r"POST /passengers/rides/\d+/join",
+        r"POST /passengers/rides/join",
+    ]
+    IDEMPOTENCY_TTL_SECONDS: float = 86400.0
+    IDEMPOTENCY_MAX_ENTRIES: int = 50_000
+    IDEMPOTENCY_SWEEP_SECONDS: float = 60.0
+    IDEMPOTENCY_WAIT_TIMEOUT: float = 30.0
+
+    # Aynı anda gelen aynı okuma istekleri tek sorguyla yanıtlanır: "METHOD /path" regex -> kapsam.
+    # "public": yanıt kimlikten bağımsız; "user": yalnızca aynı kullanıcının istekleri birleştirilir
+    COALESCING_ENABLED: bool = True
+    COALESCE_ROUTES: Dict[str, str] = {
+        r"GET /reviews/": "public",
+        r"GET /vehicles/\d+": "user",
+    }
+    COALESCE_WAIT_TIMEOUT: float = 10.0
+
+    # Bellekteki araç kataloğu (arama ve listeleme için)
+    CATALOG_ENABLED: bool = True
+    CATALOG_REFRESH_SECONDS: float = 300.0
+
+    # Arşiv: bu kadar gün önce biten kiralama/yolculuklar arşiv tablolarına taşınır.
+    # ARCHIVE_DATABASE_PATH verilirse arşiv ayrı bir SQLite dosyasına ATTACH edilir.
+    ARCHIVE_AFTER_DAYS: int = 180
+    ARCHIVE_BATCH_SIZE: int = 1000
+    ARCHIVE_DATABASE_PATH: Optional[str] = None
+
+    # İstek profilleme: admin X-Profile başlığıyla tek isteği profiller; PROFILE_SAMPLE_RATE > 0 ise
+    # isteklerin bu oranı arka planda profillenip PROFILE_OUTPUT_DIR'a yazılır
+    PROFILING_ENABLED: bool = True
+    PROFILE_SAMPLE_INTERVAL: float = 0.002
+    PROFILE_MAX_SECONDS: float = 30.0
+    PROFILE_SAMPLE_RATE: float = 0.0
+    PROFILE_OUTPUT_DIR: str = "profiles"
+    PROFILE_MAX_FILES: int = 200
+
+    # Tek yazıcı modu: rezervasyon/yolculuk/yorum/katılım yazıları tek thread'de toplanıp
+    # gruplar halinde commit edilir (SQLite "database is locked" ve istek başına fsync yerine)
+    WRITE_COORDINATOR_ENABLED: bool = False
+    WRITE_QUEUE_SIZE: int = 1000
+    WRITE_MAX_BATCH: int = 64
+    WRITE_MAX_DELAY: float = 0.002     # saniye; grubun dolması için beklenen en uzun süre
+    WRITE_TIMEOUT: float = 30.0
+
+    # Trafik kaydı: eşleşen isteklerin temizlenmiş izi (rota, parametreler, gövde yapısı, süre, rol)
+    # CAPTURE_PATH'e JSONL olarak yazılır; benchmarks/replay.py ile tekrar oynatılır
+    CAPTURE_ENABLED: bool = False
+    CAPTURE_PATH: str = "traffic/capture.jsonl"
+    CAPTURE_ROUTES: List[str] = [r"(GET|POST|PUT|DELETE) /.*"]
+    CAPTURE_SAMPLE_RATE: float = 1.0
+    CAPTURE_MAX_BYTES: int = 100_000_000
+
+    # Liste endpoint'lerinde limit üst sınırı (limit verilmezse tüm kayıtlar döner)
+    LIST_MAX_PAGE_SIZE: int = 500
+
+    # Değişiklik akışı (/changes): eskimiş kayıtların sıkıştırılma aralığı
+    CHANGES_COMPACT_SECONDS: float = 3600.0
+
+    # Canlı koltuk akışı (SSE)
+    STREAM_BUFFER_SIZE: int = 100
+    STREAM_MAX_SUBSCRIBERS: int = 1000
+    STREAM_COALESCE_SECONDS: float = 0.25
+    STREAM_HEARTBEAT_SECONDS: float = 15.0
+
+    # Fiyatlandırma: araç daily_rate yoksa varsayılan günlük ücret kullanılır
+    DEFAULT_DAILY_RATE: float = 50.0
+    WEEKEND_RATE_MULTIPLIER: float = 1.25
+    # (minimum gün, indirim oranı)
+    DURATION_DISCOUNT_TIERS: List[Tuple[float, float]] = [(3, 0.05), (7, 0.15), (28, 0.30)]
+
+    # Token iptal listesi (bellekte Bloom filtresi + küme)
+    REVOCATION_SYNC_SECONDS: float = 5.0
+    REVOCATION_SWEEP_SECONDS: float = 3600.0
+    REVOCATION_BLOOM_CAPACITY: int = 100_000
+    REVOCATION_BLOOM_ERROR_RATE: float = 0.001
+
+    # Arka plan iş kuyruğu
+    JOBS_ENABLED: bool = True
+    JOB_WORKERS: int = 2
+    JOB_POLL_INTERVAL: float = 1.0
+    JOB_MAX_ATTEMPTS: int = 5
+    JOB_RETRY_BASE_SECONDS: float = 2.0
+    JOB_RETRY_MAX_SECONDS: float = 600.0
+    JOB_LEASE_SECONDS: int = 300
+    JOB_RETENTION_HOURS: int = 72
+    JOB_DRAIN_TIMEOUT: float = 10.0
+
     class Config:
         env_file = ".env"
 
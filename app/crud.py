@@ -1,9 +1,13 @@
+import re
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_
+from sqlalchemy import and_, delete, func, insert, literal, or_, select, union, union_all, update
 from fastapi import HTTPException, status
-from datetime import datetime
-from typing import List, Optional
-from app import models, schemas
+from datetime import datetime, timedelta, timezone
+from typing import Callable, List, Optional, Sequence, Union
+import numpy as np
+from app import models, schemas, geo, pricing, jobs, fulltext, archive, broker, changes, occupancy
+from app.catalog import catalog
+from app.schedule import PassengerSchedule
 from app.auth import get_password_hash
 from app.schemas import UserRoleEnum
 
@@ -45,8 +49,18 @@ def delete_user(db: Session, user_id: int) -> bool:
     if not db_user:
         return False
     
+    # ORM kullanıcının araç/kiralama/yolculuklarındaki yabancı anahtarı NULL yapar
+    orphaned = [("vehicle", v) for v in db_user.vehicles] + [("rental", r) for r in db_user.rentals] + \
+        [("ride", r) for r in db_user.rides_created]
+    vehicle_ids = [v.id for v in db_user.vehicles]
     db.delete(db_user)
+    db.flush()
+    for entity, row in orphaned:
+        changes.record(db, entity, row)
     db.commit()
+    # Sahipsiz kalan araçların katalogdaki owner_id'si de NULL olur
+    for vehicle_id in vehicle_ids:
+        catalog.upsert(db, vehicle_id)
     return True
 
 def get_all_users(db: Session) -> List[models.User]:
@@ -56,49 +70,239 @@ def get_all_users(db: Session) -> List[models.User]:
 def create_vehicle(db: Session, vehicle: schemas.VehicleCreate, owner_id: int) -> models.Vehicle:
     db_vehicle = models.Vehicle(**vehicle.dict(), owner_id=owner_id)
     db.add(db_vehicle)
+    db.flush()
+    changes.record(db, "vehicle", db_vehicle)
     db.commit()
     db.refresh(db_vehicle)
+    catalog.upsert(db, db_vehicle.id)
     return db_vehicle
 
 def get_vehicle(db: Session, vehicle_id: int) -> Optional[models.Vehicle]:
     return db.query(models.Vehicle).filter(models.Vehicle.id == vehicle_id).first()
 
-def get_all_vehicles(db: Session) -> List[models.Vehicle]:
-    return db.query(models.Vehicle).all()
+# Liste sorguları id sırasında sayfalanır; limit=None tüm satırları döner
+def _paginate(query, model, limit: Optional[int] = None, offset: int = 0) -> list:
+    query = query.order_by(model.id)
+    if offset:
+        query = query.offset(offset)
+    if limit is not None:
+        query = query.limit(limit)
+    return query.all()
+
+def get_all_vehicles(
+    db: Session,
+    options: Sequence = (),
+    limit: Optional[int] = None,
+    offset: int = 0
+) -> List[models.Vehicle]:
+    return _paginate(db.query(models.Vehicle).options(*options), models.Vehicle, limit, offset)
+
+# ix_vehicles_owner_id üzerinden sadece sahibin araçları okunur
+def get_vehicles_for_owner(
+    db: Session,
+    owner_id: int,
+    options: Sequence = (),
+    limit: Optional[int] = None,
+    offset: int = 0
+) -> List[models.Vehicle]:
+    query = db.query(models.Vehicle).options(*options).filter(models.Vehicle.owner_id == owner_id)
+    return _paginate(query, models.Vehicle, limit, offset)
+
+# Fieldset yoksa bellekteki katalogdan (VehicleOut alanlarıyla sözlükler) döner
+def get_all_available_vehicles(
+    db: Session,
+    options: Sequence = (),
+    limit: Optional[int] = None,
+    offset: int = 0
+) -> List[Union[models.Vehicle, dict]]:
+    if not options and catalog.ready:
+        return catalog.search(offset=offset, limit=limit)
+    query = db.query(models.Vehicle).options(*options).filter(models.Vehicle.available == True)
+    return _paginate(query, models.Vehicle, limit, offset)
+
+def search_available_vehicles(
+    db: Session,
+    brand: Optional[str] = None,
+    model: Optional[str] = None,
+    min_seats: Optional[int] = None,
+    min_luggage: Optional[int] = None
+) -> List[Union[models.Vehicle, dict]]:
+    if catalog.ready:
+        return catalog.search(brand=brand, model=model, min_seats=min_seats, min_luggage=min_luggage)
+    
+    query = db.query(models.Vehicle).filter(models.Vehicle.available == True)
+    if brand:
+        query = query.filter(models.Vehicle.brand.ilike(f"%{brand}%"))
+    if model:
+        query = query.filter(models.Vehicle.model.ilike(f"%{model}%"))
+    if min_seats:
+        query = query.filter(models.Vehicle.seats >= min_seats)
+    if min_luggage:
+        query = query.filter(models.Vehicle.luggage >= min_luggage)
+    return query.all()
+
+# Tek round-trip yazma yolu: sahiplik kontrolü WHERE içinde, güncel satır RETURNING ile döner.
+# Core tablo üzerinden çalışır (identity map'e dokunmaz); owner_id=None (admin) sahiplik filtresini atlar.
+def _update_returning(db: Session, model, row_id: int, values: dict, owner_column=None, owner_id: Optional[int] = None):
+    table = model.__table__
+    # Boş güncellemede (ör. PUT {}) sadece sahiplik kontrollü okuma yapılır
+    stmt = update(table).values(**values).returning(*table.c) if values else select(table)
+    stmt = stmt.where(table.c.id == row_id)
+    if owner_id is not None:
+        stmt = stmt.where(owner_column == owner_id)
+    row = db.execute(stmt).first()
+    if row is not None and values:
+        changes.record_table(db, table.name, row)
+    return row
+
+# Silinen satıra bağlı yabancı anahtarlar NULL yapılır (ORM'in cascade'siz ilişkilerdeki davranışı)
+_ORPHANED_ON_DELETE = {
+    models.Vehicle: [models.Review.vehicle_id],
+    models.Rental: [models.Ride.rental_id, models.Review.rental_id],
+    models.Ride: [models.Review.ride_id],
+    models.Review: [],
+}
 
-def get_all_available_vehicles(db: Session) -> List[models.Vehicle]:
-    return db.query(models.Vehicle).filter(models.Vehicle.available == True).all()
+# Silinen satırı döner (yoksa None)
+def _delete_returning(db: Session, model, row_id: int, owner_column=None, owner_id: Optional[int] = None):
+    table = model.__table__
+    stmt = delete(table).where(table.c.id == row_id)
+    if owner_id is not None:
+        stmt = stmt.where(owner_column == owner_id)
+    row = db.execute(stmt.returning(*table.c)).first()
+    if row is None:
+        return None
+    changes.record_table(db, table.name, row, "delete")
+    for column in _ORPHANED_ON_DELETE[model]:
+        orphans = db.execute(
+            update(column.table).where(column == row_id).values({column.key: None}).returning(*column.table.c)
+        ).all()
+        for orphan in orphans:
+            changes.record_table(db, column.table.name, orphan)
+    return row
 
 def update_vehicle(
     db: Session, 
     vehicle_id: int, 
     vehicle_update: schemas.VehicleCreate, 
-    owner_id: int
-) -> Optional[models.Vehicle]:
-    db_vehicle = db.query(models.Vehicle).filter(models.Vehicle.id == vehicle_id).first()
-    if not db_vehicle or db_vehicle.owner_id != owner_id:
+    owner_id: Optional[int]
+) -> Optional[schemas.VehicleOut]:
+    row = _update_returning(db, models.Vehicle, vehicle_id, vehicle_update.dict(), models.Vehicle.owner_id, owner_id)
+    if row is None:
         return None
-    
-    for key, value in vehicle_update.dict().items():
-        setattr(db_vehicle, key, value)
-    
     db.commit()
-    db.refresh(db_vehicle)
-    return db_vehicle
+    catalog.upsert(db, vehicle_id)
+    return schemas.VehicleOut.model_validate(row)
 
-def delete_vehicle(db: Session, vehicle_id: int, owner_id: int) -> bool:
-    db_vehicle = db.query(models.Vehicle).filter(models.Vehicle.id == vehicle_id).first()
-    if not db_vehicle or db_vehicle.owner_id != owner_id:
+def delete_vehicle(db: Session, vehicle_id: int, owner_id: Optional[int]) -> bool:
+    if _delete_returning(db, models.Vehicle, vehicle_id, models.Vehicle.owner_id, owner_id) is None:
         return False
-    
-    db.delete(db_vehicle)
+    db.execute(delete(models.VehicleBlackout).where(models.VehicleBlackout.vehicle_id == vehicle_id))
     db.commit()
+    catalog.remove(vehicle_id)
     return True
 
+# Sahip paneli: araçlar (puan ve yaklaşan kiralama özetiyle), yaklaşan kiralamalar ve puan dağılımı.
+# Üç sorgu; hepsi owner_id indeksinden başlar, satır başına ek sorgu yapılmaz.
+def get_owner_dashboard(db: Session, owner_id: int, upcoming_limit: int) -> schemas.OwnerDashboardOut:
+    now = datetime.now(timezone.utc)
+    owned = select(models.Vehicle.id).where(models.Vehicle.owner_id == owner_id)
+
+    ratings = (
+        select(
+            models.Review.vehicle_id,
+            func.avg(models.Review.rating).label("rating_average"),
+            func.count(models.Review.id).label("rating_count"),
+        )
+        .where(models.Review.vehicle_id.in_(owned))
+        .group_by(models.Review.vehicle_id)
+        .subquery()
+    )
+    upcoming = (
+        select(
+            models.Rental.vehicle_id,
+            func.count(models.Rental.id).label("upcoming_rentals"),
+            func.min(models.Rental.start_date).label("next_rental_start"),
+            func.sum(models.Rental.total_price).label("upcoming_revenue"),
+        )
+        .where(models.Rental.vehicle_id.in_(owned), models.Rental.end_date > now)
+        .group_by(models.Rental.vehicle_id)
+        .subquery()
+    )
+    rows = db.execute(
+        select(
+            models.Vehicle.__table__,
+            ratings.c.rating_average,
+            func.coalesce(ratings.c.rating_count, 0).label("rating_count"),
+            func.coalesce(upcoming.c.upcoming_rentals, 0).label("upcoming_rentals"),
+            upcoming.c.next_rental_start,
+            func.coalesce(upcoming.c.upcoming_revenue, 0.0).label("upcoming_revenue"),
+        )
+        .outerjoin(ratings, ratings.c.vehicle_id == models.Vehicle.id)
+        .outerjoin(upcoming, upcoming.c.vehicle_id == models.Vehicle.id)
+        .where(models.Vehicle.owner_id == owner_id)
+        .order_by(models.Vehicle.id)
+    ).all()
+
+    upcoming_rentals = db.execute(
+        select(models.Rental.__table__)
+        .where(models.Rental.vehicle_id.in_(owned), models.Rental.end_date > now)
+        .order_by(models.Rental.start_date, models.Rental.id)
+        .limit(upcoming_limit)
+    ).all()
+
+    by_category = dict(db.execute(
+        select(models.Review.rating_category, func.count(models.Review.id))
+        .where(models.Review.vehicle_id.in_(owned))
+        .group_by(models.Review.rating_category)
+    ).all())
+
+    rated = [row for row in rows if row.rating_count]
+    rating_total = sum(row.rating_count for row in rated)
+    return schemas.OwnerDashboardOut(
+        vehicles=[schemas.VehicleSummaryOut.model_validate(row) for row in rows],
+        upcoming_rentals=[schemas.RentalOut.model_validate(row) for row in upcoming_rentals],
+        ratings=schemas.RatingSummaryOut(
+            count=rating_total,
+            average=round(sum(row.rating_average * row.rating_count for row in rated) / rating_total, 2) if rating_total else None,
+            by_category=by_category,
+        ),
+        upcoming_revenue=round(sum(row.upcoming_revenue for row in rows), 2),
+    )
+
 # Rental CRUD operations
+def quote_rental(db: Session, vehicle_id: int, start_date: datetime, end_date: datetime) -> float:
+    vehicle = db.query(models.Vehicle.id, models.Vehicle.daily_rate).filter(models.Vehicle.id == vehicle_id).first()
+    if not vehicle:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Vehicle not found"
+        )
+    return pricing.engine.quote(vehicle.daily_rate, start_date, end_date)
+
+def quote_rentals(db: Session, vehicle_ids: List[int], windows: List[schemas.QuoteWindow]) -> List[List[float]]:
+    rates = dict(db.query(models.Vehicle.id, models.Vehicle.daily_rate).filter(models.Vehicle.id.in_(vehicle_ids)).all())
+    missing = set(vehicle_ids) - set(rates)
+    if missing:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Vehicles not found: {sorted(missing)}"
+        )
+    prices = pricing.engine.quote_matrix(
+        pricing.engine.rates(rates[vehicle_id] for vehicle_id in vehicle_ids),
+        pricing.to_epoch_hours(w.start_date for w in windows),
+        pricing.to_epoch_hours(w.end_date for w in windows)
+    )
+    return prices.tolist()
+
 def create_rental(db: Session, rental: schemas.RentalCreate, user_id: int) -> models.Rental:
-    db_rental = models.Rental(**rental.dict(), user_id=user_id)
+    rental_data = rental.dict()
+    rental_data["total_price"] = quote_rental(db, rental.vehicle_id, rental.start_date, rental.end_date)
+    db_rental = models.Rental(**rental_data, user_id=user_id)
     db.add(db_rental)
+    db.flush()
+    changes.record(db, "rental", db_rental)
+    jobs.enqueue(db, "rental.created", {"rental_id": db_rental.id}, key=f"rental.created:{db_rental.id}")
     db.commit()
     db.refresh(db_rental)
     return db_rental
@@ -106,38 +310,84 @@ def create_rental(db: Session, rental: schemas.RentalCreate, user_id: int) -> mo
 def get_rental(db: Session, rental_id: int) -> Optional[models.Rental]:
     return db.query(models.Rental).filter(models.Rental.id == rental_id).first()
 
-def get_all_rentals(db: Session, user_id: Optional[int] = None) -> List[models.Rental]:
-    query = db.query(models.Rental)
+# include_archived=True: sıcak kayıtlar + arşiv satırları (RentalOut alanlarıyla), id sırasında.
+# İki kaynak da id sıralı olduğundan her birinden en fazla offset+limit satır okumak yeterli.
+def _with_archived(
+    db: Session,
+    query,
+    model,
+    archive_table,
+    where: Optional[Callable],
+    limit: Optional[int],
+    offset: int
+) -> list:
+    window = None if limit is None else offset + limit
+    hot = _paginate(query, model, window)
+    archived = archive.archived_rows(db, model.__table__, archive_table, where, limit=window)
+    merged = sorted(hot + archived, key=lambda item: item.id)
+    return merged[offset:] if limit is None else merged[offset:offset + limit]
+
+def get_all_rentals(
+    db: Session,
+    user_id: Optional[int] = None,
+    options: Sequence = (),
+    include_archived: bool = False,
+    limit: Optional[int] = None,
+    offset: int = 0
+) -> List[models.Rental]:
+    query = db.query(models.Rental).options(*options)
     if user_id:
         query = query.filter(models.Rental.user_id == user_id)
-    return query.all()
+    if not include_archived:
+        return _paginate(query, models.Rental, limit, offset)
+    return _with_archived(
+        db, query, models.Rental, archive.rentals_archive,
+        (lambda t: t.c.user_id == user_id) if user_id else None,
+        limit, offset
+    )
 
-def get_rentals_for_owner_vehicles(db: Session, owner_id: int) -> List[models.Rental]:
-    return db.query(models.Rental).join(models.Vehicle).filter(models.Vehicle.owner_id == owner_id).all()
+def get_rentals_for_owner_vehicles(
+    db: Session,
+    owner_id: int,
+    options: Sequence = (),
+    include_archived: bool = False,
+    limit: Optional[int] = None,
+    offset: int = 0
+) -> List[models.Rental]:
+    query = db.query(models.Rental).options(*options).join(models.Vehicle).filter(models.Vehicle.owner_id == owner_id)
+    if not include_archived:
+        return _paginate(query, models.Rental, limit, offset)
+    owned = select(models.Vehicle.id).where(models.Vehicle.owner_id == owner_id)
+    return _with_archived(
+        db, query, models.Rental, archive.rentals_archive,
+        lambda t: t.c.vehicle_id.in_(owned),
+        limit, offset
+    )
 
 def update_rental(
     db: Session, 
     rental_id: int, 
     rental_update: schemas.RentalCreate, 
-    user_id: int
-) -> Optional[models.Rental]:
-    db_rental = db.query(models.Rental).filter(models.Rental.id == rental_id).first()
-    if not db_rental or db_rental.user_id != user_id:
+    user_id: Optional[int]
+) -> Optional[schemas.RentalOut]:
+    # Kiralamanın kendisi hariç, yeni aralıkta başka kiralama ya da bakım kapaması olmamalı
+    busy = _booked_vehicle_ids(
+        rental_update.start_date, rental_update.end_date,
+        vehicle_ids=[rental_update.vehicle_id], exclude_rental_ids=[rental_id]
+    ).limit(1)
+    if db.execute(busy).first() is not None:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Vehicle not available for the selected dates")
+    rental_data = rental_update.dict()
+    rental_data["total_price"] = quote_rental(db, rental_update.vehicle_id, rental_update.start_date, rental_update.end_date)
+    row = _update_returning(db, models.Rental, rental_id, rental_data, models.Rental.user_id, user_id)
+    if row is None:
         return None
-    
-    for key, value in rental_update.dict().items():
-        setattr(db_rental, key, value)
-    
     db.commit()
-    db.refresh(db_rental)
-    return db_rental
+    return schemas.RentalOut.model_validate(row)
 
-def delete_rental(db: Session, rental_id: int, user_id: int) -> bool:
-    db_rental = db.query(models.Rental).filter(models.Rental.id == rental_id).first()
-    if not db_rental or db_rental.user_id != user_id:
+def delete_rental(db: Session, rental_id: int, user_id: Optional[int]) -> bool:
+    if _delete_returning(db, models.Rental, rental_id, models.Rental.user_id, user_id) is None:
         return False
-    
-    db.delete(db_rental)
     db.commit()
     return True
 
@@ -147,29 +397,285 @@ def is_vehicle_available(
     start_date: datetime, 
     end_date: datetime
 ) -> bool:
-    overlapping_rentals = db.query(models.Rental).filter(
-        models.Rental.vehicle_id == vehicle_id,
-        or_(
-            and_(models.Rental.start_date <= start_date, models.Rental.end_date > start_date),
-            and_(models.Rental.start_date < end_date, models.Rental.end_date >= end_date),
-            and_(models.Rental.start_date >= start_date, models.Rental.end_date <= end_date)
-        )
-    ).first()
-    return overlapping_rentals is None
+    busy = _booked_vehicle_ids(start_date, end_date, vehicle_ids=[vehicle_id]).limit(1)
+    return db.execute(busy).first() is None
+
+# Aralıkla kesişen kiralaması ya da bakım kapaması olan araçlar, tek UNION sorgusunda
+# (ix_rentals_vehicle_period ve ix_vehicle_blackouts_vehicle_period üzerinden)
+def _booked_vehicle_ids(
+    start_date: datetime,
+    end_date: datetime,
+    vehicle_ids: Optional[List[int]] = None,
+    exclude_rental_ids: Sequence[int] = ()
+):
+    rentals = select(models.Rental.vehicle_id).where(
+        models.Rental.vehicle_id.isnot(None),
+        models.Rental.start_date < end_date,
+        models.Rental.end_date > start_date
+    )
+    blackouts = select(models.VehicleBlackout.vehicle_id).where(
+        models.VehicleBlackout.start_date < end_date,
+        models.VehicleBlackout.end_date > start_date
+    )
+    if vehicle_ids is not None:
+        rentals = rentals.where(models.Rental.vehicle_id.in_(vehicle_ids))
+        blackouts = blackouts.where(models.VehicleBlackout.vehicle_id.in_(vehicle_ids))
+    if exclude_rental_ids:
+        rentals = rentals.where(models.Rental.id.notin_(exclude_rental_ids))
+    return union(rentals, blackouts)
 
 def get_available_vehicles_by_date_range(
     db: Session, 
     start_date: datetime, 
     end_date: datetime
 ) -> List[models.Vehicle]:
-    vehicles = db.query(models.Vehicle).filter(models.Vehicle.available == True).all()
-    available_vehicles = []
-    
-    for vehicle in vehicles:
-        if is_vehicle_available(db, vehicle.id, start_date, end_date):
-            available_vehicles.append(vehicle)
-    
-    return available_vehicles
+    return db.query(models.Vehicle).filter(
+        models.Vehicle.available == True,
+        models.Vehicle.id.notin_(_booked_vehicle_ids(start_date, end_date))
+    ).order_by(models.Vehicle.id).all()
+
+# Dolu aracın yerine en az aynı koltuk/bagaj kapasitesindeki en küçük boş araç seçilir.
+# Kısıtı en sıkı olan (en büyük) araçlar önce eşleştirilir.
+def _pick_substitutes(unavailable: List[models.Vehicle], candidates: List[models.Vehicle]) -> dict:
+    picked = {}
+    free = sorted(candidates, key=lambda v: (v.seats, v.luggage or 0, v.daily_rate or 0, v.id))
+    for vehicle in sorted(unavailable, key=lambda v: (-v.seats, -(v.luggage or 0), v.id)):
+        for i, candidate in enumerate(free):
+            if candidate.seats >= vehicle.seats and (candidate.luggage or 0) >= (vehicle.luggage or 0):
+                picked[vehicle.id] = free.pop(i)
+                break
+    return picked
+
+# Tüm araçlar tek transaction'da kiralanır ya da hiçbiri kiralanmaz
+def create_fleet_booking(
+    db: Session,
+    booking: schemas.FleetBookingCreate,
+    user_id: int
+) -> schemas.FleetBookingOut:
+    vehicle_ids = list(dict.fromkeys(booking.vehicle_ids))
+    start_date, end_date = booking.start_date, booking.end_date
+    vehicles = {v.id: v for v in db.query(models.Vehicle).filter(models.Vehicle.id.in_(vehicle_ids)).all()}
+    missing = set(vehicle_ids) - set(vehicles)
+    if missing:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Vehicles not found: {sorted(missing)}"
+        )
+
+    booked = {row[0] for row in db.execute(
+        _booked_vehicle_ids(start_date, end_date, vehicle_ids=vehicle_ids)
+    )}
+    unavailable = [vehicles[i] for i in vehicle_ids if i in booked or not vehicles[i].available]
+    substitutes = {}
+    if unavailable and booking.substitute:
+        candidates = db.query(models.Vehicle).filter(
+            models.Vehicle.available == True,
+            models.Vehicle.id.notin_(vehicle_ids),
+            models.Vehicle.id.notin_(_booked_vehicle_ids(start_date, end_date)),
+            models.Vehicle.seats >= min(v.seats for v in unavailable)
+        ).all()
+        substitutes = _pick_substitutes(unavailable, candidates)
+    errors = [
+        {"vehicle_id": v.id, "reason": "Vehicle not available for the selected dates"}
+        for v in unavailable if v.id not in substitutes
+    ]
+    if errors:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=errors)
+
+    assigned = [substitutes.get(i, vehicles[i]) for i in vehicle_ids]
+    prices = pricing.engine.quote_matrix(
+        pricing.engine.rates(v.daily_rate for v in assigned),
+        pricing.to_epoch_hours([start_date]),
+        pricing.to_epoch_hours([end_date])
+    )[:, 0].tolist()
+    rentals = [
+        models.Rental(vehicle_id=v.id, user_id=user_id, start_date=start_date, end_date=end_date, total_price=price)
+        for v, price in zip(assigned, prices)
+    ]
+    db.add_all(rentals)
+    db.flush()
+
+    # Flush yazma kilidini aldı; kontrol ile yazma arasında araya giren kiralama burada yakalanır
+    new_ids = [r.id for r in rentals]
+    raced = {row[0] for row in db.execute(
+        _booked_vehicle_ids(start_date, end_date, vehicle_ids=[v.id for v in assigned], exclude_rental_ids=new_ids)
+    )}
+    if raced:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=[{"vehicle_id": i, "reason": "Vehicle was booked concurrently"} for i in sorted(raced)]
+        )
+
+    for rental in rentals:
+        changes.record(db, "rental", rental)
+        jobs.enqueue(db, "rental.created", {"rental_id": rental.id}, key=f"rental.created:{rental.id}")
+    db.commit()
+    return schemas.FleetBookingOut(
+        rentals=[schemas.RentalOut.model_validate(r) for r in rentals],
+        substitutions=[
+            schemas.FleetSubstitution(requested_vehicle_id=requested, vehicle_id=vehicle.id)
+            for requested, vehicle in substitutes.items()
+        ],
+        total_price=round(sum(prices), 2)
+    )
+
+# Araçların aralıkla kesişen dolu aralıkları (kiralama + bakım kapaması), (vehicle_id, start_date) sırasında
+def _busy_intervals(vehicle_ids, start_date: datetime, end_date: datetime):
+    busy = union_all(
+        select(models.Rental.vehicle_id, models.Rental.start_date, models.Rental.end_date).where(
+            models.Rental.vehicle_id.in_(vehicle_ids),
+            models.Rental.start_date < end_date,
+            models.Rental.end_date > start_date
+        ),
+        select(models.VehicleBlackout.vehicle_id, models.VehicleBlackout.start_date, models.VehicleBlackout.end_date).where(
+            models.VehicleBlackout.vehicle_id.in_(vehicle_ids),
+            models.VehicleBlackout.start_date < end_date,
+            models.VehicleBlackout.end_date > start_date
+        )
+    ).subquery()
+    return select(busy.c.vehicle_id, busy.c.start_date, busy.c.end_date).order_by(busy.c.vehicle_id, busy.c.start_date)
+
+# Verilen araçların aralıkla kesişen kiralama ve bakım aralıkları, tek sorguda
+def get_busy_intervals(
+    db: Session,
+    vehicle_ids: List[int],
+    start_date: datetime,
+    end_date: datetime
+) -> List[tuple]:
+    return db.execute(_busy_intervals(vehicle_ids, start_date, end_date)).all()
+
+# Filtreye uyan araçlar ve pencereyle kesişen kiralama/bakım aralıkları iki sorguda; boşluklar tek geçişte bulunur
+def find_free_slots(
+    db: Session,
+    duration: timedelta,
+    start_date: datetime,
+    horizon_end: datetime,
+    limit: int,
+    min_seats: Optional[int] = None,
+    min_luggage: Optional[int] = None,
+    brand: Optional[str] = None
+) -> List[schemas.FreeSlotOut]:
+    vehicles = select(models.Vehicle.id).where(models.Vehicle.available == True)
+    if min_seats is not None:
+        vehicles = vehicles.where(models.Vehicle.seats >= min_seats)
+    if min_luggage is not None:
+        vehicles = vehicles.where(func.coalesce(models.Vehicle.luggage, 0) >= min_luggage)
+    if brand:
+        vehicles = vehicles.where(func.lower(models.Vehicle.brand) == brand.lower())
+    vehicle_ids = db.execute(vehicles).scalars().all()
+
+    # Aday başlangıç horizon_end'e kadar; kiralama onun ötesine uzayabilir
+    window_end = horizon_end + duration
+    intervals = db.execute(_busy_intervals(vehicles, start_date, window_end))
+    slots = occupancy.free_slots(vehicle_ids, intervals, start_date, window_end, duration, limit)
+    return [
+        schemas.FreeSlotOut(vehicle_id=vehicle_id, start_date=start, end_date=start + duration, free_until=free_until)
+        for start, vehicle_id, free_until in slots
+    ]
+
+# Bakım kapamaları
+MAX_BLACKOUTS_PER_REQUEST = 50_000
+
+def _owned_vehicle_ids(owner_id: int):
+    return select(models.Vehicle.id).where(models.Vehicle.owner_id == owner_id)
+
+# owner_id None ise (admin) her araca yazılabilir. Tüm kapamalar tek executemany INSERT ile eklenir;
+# çakışan kiralamalar tek sorguyla bulunup raporlanır.
+def create_blackouts(
+    db: Session,
+    batch: schemas.BlackoutBulkCreate,
+    user_id: int,
+    owner_id: Optional[int]
+) -> schemas.BlackoutBulkOut:
+    if batch.vehicle_ids is None:
+        query = select(models.Vehicle.id) if owner_id is None else _owned_vehicle_ids(owner_id)
+        vehicle_ids = list(db.execute(query.order_by(models.Vehicle.id)).scalars())
+    else:
+        vehicle_ids = list(dict.fromkeys(batch.vehicle_ids))
+        owners = dict(db.execute(
+            select(models.Vehicle.id, models.Vehicle.owner_id).where(models.Vehicle.id.in_(vehicle_ids))
+        ).all())
+        missing = set(vehicle_ids) - set(owners)
+        if missing:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Vehicles not found: {sorted(missing)}"
+            )
+        foreign = [i for i in vehicle_ids if owner_id is not None and owners[i] != owner_id]
+        if foreign:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail=f"Not authorized for vehicles: {foreign}"
+            )
+
+    if len(vehicle_ids) * len(batch.windows) > MAX_BLACKOUTS_PER_REQUEST:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {MAX_BLACKOUTS_PER_REQUEST} blackouts per request"
+        )
+    if not vehicle_ids:
+        return schemas.BlackoutBulkOut(created=0, vehicle_ids=[], conflicts=[])
+
+    now = datetime.utcnow()
+    db.execute(insert(models.VehicleBlackout), [
+        {
+            "vehicle_id": vehicle_id,
+            "start_date": window.start_date,
+            "end_date": window.end_date,
+            "reason": window.reason,
+            "created_by": user_id,
+            "created_at": now,
+        }
+        for vehicle_id in vehicle_ids
+        for window in batch.windows
+    ])
+    conflicts = db.execute(
+        select(models.Rental.vehicle_id, models.Rental.id.label("rental_id"), models.Rental.start_date, models.Rental.end_date)
+        .where(
+            models.Rental.vehicle_id.in_(vehicle_ids),
+            or_(*[
+                and_(models.Rental.start_date < window.end_date, models.Rental.end_date > window.start_date)
+                for window in batch.windows
+            ])
+        )
+        .order_by(models.Rental.vehicle_id, models.Rental.start_date)
+    ).all()
+    db.commit()
+    return schemas.BlackoutBulkOut(
+        created=len(vehicle_ids) * len(batch.windows),
+        vehicle_ids=vehicle_ids,
+        conflicts=[schemas.BlackoutConflict(**row._mapping) for row in conflicts]
+    )
+
+def get_blackouts(
+    db: Session,
+    owner_id: Optional[int],
+    vehicle_id: Optional[int] = None,
+    ending_after: Optional[datetime] = None,
+    limit: Optional[int] = None,
+    offset: int = 0
+) -> List[models.VehicleBlackout]:
+    query = db.query(models.VehicleBlackout)
+    if owner_id is not None:
+        query = query.filter(models.VehicleBlackout.vehicle_id.in_(_owned_vehicle_ids(owner_id)))
+    if vehicle_id is not None:
+        query = query.filter(models.VehicleBlackout.vehicle_id == vehicle_id)
+    if ending_after is not None:
+        query = query.filter(models.VehicleBlackout.end_date > ending_after)
+    return _paginate(query, models.VehicleBlackout, limit, offset)
+
+def delete_blackout(db: Session, blackout_id: int, owner_id: Optional[int]) -> bool:
+    stmt = delete(models.VehicleBlackout).where(models.VehicleBlackout.id == blackout_id)
+    if owner_id is not None:
+        stmt = stmt.where(models.VehicleBlackout.vehicle_id.in_(_owned_vehicle_ids(owner_id)))
+    if db.execute(stmt.returning(models.VehicleBlackout.id)).first() is None:
+        return False
+    db.commit()
+    return True
+
+def get_existing_vehicle_ids(db: Session, vehicle_ids: List[int]) -> set:
+    return {row[0] for row in db.query(models.Vehicle.id).filter(models.Vehicle.id.in_(vehicle_ids)).all()}
 
 # Ride CRUD operations
 def create_ride(db: Session, ride: schemas.RideCreate, user_id: int) -> models.Ride:
@@ -205,9 +711,14 @@ def create_ride(db: Session, ride: schemas.RideCreate, user_id: int) -> models.R
 
     db_ride = models.Ride(
         **ride.dict(),
-        renter_id=user_id
+        renter_id=user_id,
+        start_geohash=_geohash_or_none(ride.start_lat, ride.start_lon),
+        end_geohash=_geohash_or_none(ride.end_lat, ride.end_lon)
     )
     db.add(db_ride)
+    db.flush()
+    changes.record(db, "ride", db_ride)
+    broker.stage(db, broker.ride_event("created", db_ride))
     db.commit()
     db.refresh(db_ride)
 
@@ -218,38 +729,176 @@ def create_ride(db: Session, ride: schemas.RideCreate, user_id: int) -> models.R
 def get_ride(db: Session, ride_id: int) -> Optional[models.Ride]:
     return db.query(models.Ride).filter(models.Ride.id == ride_id).first()
 
-def get_all_rides(db: Session) -> List[models.Ride]:
-    return db.query(models.Ride).all()
+def get_all_rides(
+    db: Session,
+    options: Sequence = (),
+    renter_id: Optional[int] = None,
+    include_archived: bool = False,
+    limit: Optional[int] = None,
+    offset: int = 0
+) -> List[models.Ride]:
+    query = db.query(models.Ride).options(*options)
+    if renter_id:
+        query = query.filter(models.Ride.renter_id == renter_id)
+    if not include_archived:
+        return _paginate(query, models.Ride, limit, offset)
+    return _with_archived(
+        db, query, models.Ride, archive.rides_archive,
+        (lambda t: t.c.renter_id == renter_id) if renter_id else None,
+        limit, offset
+    )
 
-def get_available_rides(db: Session) -> List[models.Ride]:
-    return db.query(models.Ride).filter(models.Ride.available_seats > 0).all()
+def get_rides_by_ids(db: Session, ride_ids: List[int]) -> List[models.Ride]:
+    return db.query(models.Ride).filter(models.Ride.id.in_(ride_ids)).order_by(models.Ride.start_date).all()
+
+# Varsayılan olarak kalkışı geçmiş yolculuklar hariç tutulur
+def get_available_rides(
+    db: Session,
+    depart_after: Optional[datetime] = None,
+    depart_before: Optional[datetime] = None,
+    min_seats: int = 1,
+    options: Sequence = (),
+    limit: Optional[int] = None,
+    offset: int = 0
+) -> List[models.Ride]:
+    depart_after = schemas.ensure_aware_utc(depart_after) if depart_after else datetime.now(timezone.utc)
+    query = db.query(models.Ride).options(*options).filter(
+        models.Ride.start_date >= depart_after,
+        models.Ride.available_seats >= min_seats
+    )
+    if depart_before:
+        query = query.filter(models.Ride.start_date < schemas.ensure_aware_utc(depart_before))
+    query = query.order_by(models.Ride.start_date, models.Ride.id)
+    if offset:
+        query = query.offset(offset)
+    if limit is not None:
+        query = query.limit(limit)
+    return query.all()
+
+_RIDE_LOCATION_FIELDS = {"start_lat", "start_lon", "end_lat", "end_lon"}
 
 def update_ride(
     db: Session, 
     ride_id: int, 
-    ride_update: schemas.RideUpdate
-) -> Optional[models.Ride]:
-    db_ride = db.query(models.Ride).filter(models.Ride.id == ride_id).first()
-    if not db_ride:
+    ride_update: schemas.RideUpdate,
+    renter_id: Optional[int] = None
+) -> Optional[schemas.RideOut]:
+    update_data = ride_update.dict(exclude_unset=True)
+    row = _update_returning(db, models.Ride, ride_id, update_data, models.Ride.renter_id, renter_id)
+    if row is None:
         return None
+    ride = dict(row._mapping)
     
-    for key, value in ride_update.dict(exclude_unset=True).items():
-        setattr(db_ride, key, value)
+    # Geohash'ler birleşik (güncel) koordinatlardan hesaplanır; sadece konum değiştiyse ek yazma yapılır
+    if _RIDE_LOCATION_FIELDS & update_data.keys():
+        geohashes = {
+            "start_geohash": _geohash_or_none(ride["start_lat"], ride["start_lon"]),
+            "end_geohash": _geohash_or_none(ride["end_lat"], ride["end_lon"]),
+        }
+        if any(ride[key] != value for key, value in geohashes.items()):
+            db.execute(update(models.Ride.__table__).where(models.Ride.id == ride_id).values(**geohashes))
     
+    # Katılımcı takvim projeksiyonunu güncel tut
+    if {"start_date", "end_date"} & update_data.keys():
+        db.execute(update(models.RideParticipant.__table__).where(models.RideParticipant.ride_id == ride_id).values(
+            ride_start=ride["start_date"],
+            ride_end=ride["end_date"]
+        ))
+    
+    broker.stage(db, broker.ride_event("updated", row))
     db.commit()
-    db.refresh(db_ride)
-    return db_ride
+    return schemas.RideOut.model_validate(ride)
 
-def delete_ride(db: Session, ride_id: int) -> bool:
-    db_ride = db.query(models.Ride).filter(models.Ride.id == ride_id).first()
-    if not db_ride:
+def delete_ride(db: Session, ride_id: int, renter_id: Optional[int] = None) -> bool:
+    row = _delete_returning(db, models.Ride, ride_id, models.Ride.renter_id, renter_id)
+    if row is None:
         return False
-    
-    db.delete(db_ride)
+    db.execute(delete(models.RideParticipant.__table__).where(models.RideParticipant.ride_id == ride_id))
+    broker.stage(db, broker.ride_event("deleted", row, available_seats=0))
     db.commit()
     return True
 
+def _geohash_or_none(lat: Optional[float], lon: Optional[float]) -> Optional[str]:
+    if lat is None or lon is None:
+        return None
+    return geo.encode_geohash(lat, lon)
+
+def _ride_point_columns(point: str):
+    if point == "end":
+        return models.Ride.end_geohash, models.Ride.end_lat, models.Ride.end_lon
+    return models.Ride.start_geohash, models.Ride.start_lat, models.Ride.start_lon
+
+# Geohash hücre önekleriyle adayları daralt, sadece koordinat kolonlarını çek
+def _ride_location_candidates(db: Session, cells: List[str], point: str):
+    geohash_col, lat_col, lon_col = _ride_point_columns(point)
+    prefix_filters = []
+    for cell in cells:
+        low, high = geo.prefix_range(cell)
+        prefix_filters.append(and_(geohash_col >= low, geohash_col < high))
+    rows = db.query(models.Ride.id, lat_col, lon_col, models.Ride.start_date).filter(
+        or_(*prefix_filters),
+        models.Ride.available_seats > 0,
+        models.Ride.start_date >= datetime.now(timezone.utc)
+    ).all()
+    ids = np.fromiter((r[0] for r in rows), dtype=np.int64, count=len(rows))
+    lats = np.fromiter((r[1] for r in rows), dtype=np.float64, count=len(rows))
+    lons = np.fromiter((r[2] for r in rows), dtype=np.float64, count=len(rows))
+    starts = np.array([r[3].replace(tzinfo=None) for r in rows], dtype="datetime64[us]")
+    return ids, lats, lons, starts
+
+# Mesafe, sonra kalkış zamanına göre sırala; ORM nesnelerini tek sorguda yükle
+def _rides_ordered_by_distance(db: Session, ids, starts, distances, mask, limit: int) -> List[models.Ride]:
+    ids, starts, distances = ids[mask], starts[mask], distances[mask]
+    order = np.lexsort((starts, distances))[:limit]
+    if not len(order):
+        return []
+    rides = {r.id: r for r in db.query(models.Ride).filter(models.Ride.id.in_(ids[order].tolist())).all()}
+    result = []
+    for idx in order:
+        ride = rides.get(int(ids[idx]))
+        if ride is not None:
+            ride.distance_km = round(float(distances[idx]), 3)
+            result.append(ride)
+    return result
+
+def search_rides_near(
+    db: Session,
+    lat: float,
+    lon: float,
+    radius_km: float,
+    point: str = "start",
+    limit: int = 50
+) -> List[models.Ride]:
+    ids, lats, lons, starts = _ride_location_candidates(db, geo.cells_for_radius(lat, lon, radius_km), point)
+    distances = geo.haversine_km(lat, lon, lats, lons)
+    return _rides_ordered_by_distance(db, ids, starts, distances, distances <= radius_km, limit)
+
+def search_rides_in_bbox(
+    db: Session,
+    min_lat: float,
+    min_lon: float,
+    max_lat: float,
+    max_lon: float,
+    point: str = "start",
+    limit: int = 50
+) -> List[models.Ride]:
+    cells = geo.cells_for_bbox(min_lat, min_lon, max_lat, max_lon)
+    ids, lats, lons, starts = _ride_location_candidates(db, cells, point)
+    mask = (lats >= min_lat) & (lats <= max_lat) & (lons >= min_lon) & (lons <= max_lon)
+    distances = geo.haversine_km((min_lat + max_lat) / 2, (min_lon + max_lon) / 2, lats, lons)
+    return _rides_ordered_by_distance(db, ids, starts, distances, mask, limit)
+
 # Ride Participant CRUD operations
+# Koltuk ayrılırsa kalan koltuk sayısını, yer yoksa None döner
+def _reserve_seat(db: Session, ride_id: int) -> Optional[int]:
+    rides = models.Ride.__table__
+    return db.execute(
+        update(rides)
+        .where(rides.c.id == ride_id, rides.c.available_seats > 0)
+        .values(available_seats=rides.c.available_seats - 1)
+        .returning(rides.c.available_seats)
+    ).scalar()
+
 def join_ride(db: Session, ride_id: int, user_id: int) -> bool:
     ride = db.query(models.Ride).filter(models.Ride.id == ride_id).first()
     if not ride or ride.available_seats <= 0:
@@ -258,28 +907,113 @@ def join_ride(db: Session, ride_id: int, user_id: int) -> bool:
     if check_passenger_time_conflict(db, user_id, ride.start_date, ride.end_date):
         return False
     
+    remaining = _reserve_seat(db, ride_id)
+    if remaining is None:
+        db.rollback()
+        return False
+    
     participant = models.RideParticipant(
         ride_id=ride_id,
-        user_id=user_id
+        user_id=user_id,
+        ride_start=ride.start_date,
+        ride_end=ride.end_date
     )
     db.add(participant)
-    ride.available_seats -= 1
+    _enqueue_ride_joined(db, ride_id, user_id)
+    changes.record(db, "ride", ride)
+    broker.stage(db, broker.ride_event("updated", ride, available_seats=remaining))
     db.commit()
     return True
 
+def _enqueue_ride_joined(db: Session, ride_id: int, user_id: int) -> None:
+    jobs.enqueue(db, "ride.joined", {"ride_id": ride_id, "user_id": user_id}, key=f"ride.joined:{ride_id}:{user_id}")
+
+def join_rides(db: Session, ride_ids: List[int], user_id: int) -> List[models.RideParticipant]:
+    ride_ids = list(dict.fromkeys(ride_ids))
+    rides = db.query(models.Ride).filter(models.Ride.id.in_(ride_ids)).order_by(models.Ride.start_date).all()
+    missing = set(ride_ids) - {ride.id for ride in rides}
+    if missing:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Rides not found: {sorted(missing)}"
+        )
+
+    # Yolcu takvimi bir kez yüklenir; seçilen yolculuklar birbirine karşı da kontrol edilir
+    schedule = get_passenger_schedule(
+        db, user_id,
+        not_before=rides[0].start_date.replace(tzinfo=None),
+        not_after=max(ride.end_date for ride in rides).replace(tzinfo=None)
+    )
+    errors = []
+    for ride in rides:
+        if ride.available_seats <= 0:
+            errors.append({"ride_id": ride.id, "reason": "No available seats"})
+            continue
+        start, end = ride.start_date.replace(tzinfo=None), ride.end_date.replace(tzinfo=None)
+        conflict = schedule.find_conflict(start, end)
+        if conflict is not None:
+            errors.append({"ride_id": ride.id, "reason": f"Time conflict with ride {conflict}"})
+            continue
+        schedule.add(start, end, ride.id)
+    if errors:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=errors)
+
+    participants = []
+    for ride in rides:
+        remaining = _reserve_seat(db, ride.id)
+        if remaining is None:
+            db.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail=[{"ride_id": ride.id, "reason": "No available seats"}]
+            )
+        participant = models.RideParticipant(
+            ride_id=ride.id,
+            user_id=user_id,
+            ride_start=ride.start_date,
+            ride_end=ride.end_date
+        )
+        db.add(participant)
+        participants.append(participant)
+        _enqueue_ride_joined(db, ride.id, user_id)
+        changes.record(db, "ride", ride)
+        broker.stage(db, broker.ride_event("updated", ride, available_seats=remaining))
+    db.commit()
+    for participant in participants:
+        db.refresh(participant)
+    return participants
+
+def get_passenger_schedule(
+    db: Session,
+    user_id: int,
+    not_before: Optional[datetime] = None,
+    not_after: Optional[datetime] = None
+) -> PassengerSchedule:
+    query = db.query(
+        models.RideParticipant.ride_id,
+        models.RideParticipant.ride_start,
+        models.RideParticipant.ride_end
+    ).filter(models.RideParticipant.user_id == user_id)
+    if not_before is not None:
+        query = query.filter(models.RideParticipant.ride_end > not_before)
+    if not_after is not None:
+        query = query.filter(models.RideParticipant.ride_start < not_after)
+    return PassengerSchedule(
+        (ride_id, start.replace(tzinfo=None), end.replace(tzinfo=None))
+        for ride_id, start, end in query.all()
+    )
+
 def check_passenger_time_conflict(
     db: Session, 
     user_id: int, 
     start_date: datetime, 
     end_date: datetime
 ) -> bool:
-    conflict = db.query(models.RideParticipant).join(models.Ride).filter(
+    # Tek kontrol için takvim yüklenmez; yalnızca çakışan bir kayıt aranır (user_id, ride_start, ride_end indeksi)
+    conflict = db.query(models.RideParticipant.id).filter(
         models.RideParticipant.user_id == user_id,
-        or_(
-            and_(models.Ride.start_date <= start_date, models.Ride.end_date > start_date),
-            and_(models.Ride.start_date < end_date, models.Ride.end_date >= end_date),
-            and_(models.Ride.start_date >= start_date, models.Ride.end_date <= end_date)
-        )
+        models.RideParticipant.ride_start < end_date.replace(tzinfo=None),
+        models.RideParticipant.ride_end > start_date.replace(tzinfo=None)
     ).first()
     return conflict is not None
 
@@ -307,9 +1041,15 @@ def search_reviews(
     vehicle_id: Optional[int] = None,
     ride_id: Optional[int] = None,
     renter_id: Optional[int] = None,
-    review_type: Optional[models.ReviewType] = None
+    review_type: Optional[models.ReviewType] = None,
+    options: Sequence = (),
+    q: Optional[str] = None,
+    min_rating: Optional[int] = None,
+    max_rating: Optional[int] = None,
+    limit: Optional[int] = None,
+    offset: int = 0
 ) -> List[models.Review]:
-    query = db.query(models.Review)
+    query = db.query(models.Review).options(*options)
     
     if vehicle_id:
         query = query.filter(models.Review.vehicle_id == vehicle_id)
@@ -319,36 +1059,63 @@ def search_reviews(
         query = query.filter(models.Review.renter_id == renter_id)
     if review_type:
         query = query.filter(models.Review.type == review_type)
+    if min_rating is not None:
+        query = query.filter(models.Review.rating >= min_rating)
+    if max_rating is not None:
+        query = query.filter(models.Review.rating <= max_rating)
     
+    if q is not None:
+        return _search_review_text(query, q, limit, offset)
+    if limit:
+        query = query.order_by(models.Review.id).offset(offset).limit(limit)
     return query.all()
 
+# Tam metin arama: filtreler ve BM25 sıralaması tek sorguda; sonuçlara score ve snippet eklenir
+def _search_review_text(query, q: str, limit: Optional[int], offset: int) -> List[models.Review]:
+    expression = fulltext.match_expression(q)
+    if expression is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Search query must contain at least one word"
+        )
+    
+    if fulltext.fts_available:
+        rank = fulltext.rank()
+        query = query.join(fulltext.reviews_fts, fulltext.reviews_fts.c.rowid == models.Review.id) \
+            .add_columns(rank, fulltext.snippet()) \
+            .filter(fulltext.match(expression)) \
+            .order_by(rank, models.Review.id)
+    else:
+        for term in re.findall(r"\w+", q):
+            query = query.filter(models.Review.comment.ilike(f"%{term}%"))
+        query = query.add_columns(literal(None), literal(None)).order_by(models.Review.id)
+    
+    reviews = []
+    for review, score, snippet in query.offset(offset).limit(limit).all():
+        review.score = None if score is None else round(-score, 4)
+        review.snippet = snippet
+        reviews.append(review)
+    return reviews
+
 def update_review(
     db: Session, 
     review_id: int, 
     review_update: schemas.ReviewUpdate, 
     user_id: int
-) -> Optional[models.Review]:
-    db_review = db.query(models.Review).filter(models.Review.id == review_id).first()
-    if not db_review or db_review.user_id != user_id:
-        return None
-    
+) -> Optional[schemas.ReviewOut]:
     update_data = review_update.dict(exclude_unset=True)
-    for key, value in update_data.items():
-        setattr(db_review, key, value)
-    
     if 'rating' in update_data:
-        db_review.rating_category = categorize_rating(update_data['rating'])
+        update_data['rating_category'] = categorize_rating(update_data['rating'])
     
+    row = _update_returning(db, models.Review, review_id, update_data, models.Review.user_id, user_id)
+    if row is None:
+        return None
     db.commit()
-    db.refresh(db_review)
-    return db_review
+    return schemas.ReviewOut.model_validate(row)
 
 def delete_review(db: Session, review_id: int, user_id: int) -> bool:
-    db_review = db.query(models.Review).filter(models.Review.id == review_id).first()
-    if not db_review or db_review.user_id != user_id:
+    if _delete_returning(db, models.Review, review_id, models.Review.user_id, user_id) is None:
         return False
-    
-    db.delete(db_review)
     db.commit()
     return True
 
@@ -0,0 +1,100 @@
+from datetime import datetime
+from typing import Dict, List, NamedTuple, Optional, Sequence, Type
+from fastapi import HTTPException
+from fastapi.encoders import jsonable_encoder
+from pydantic import BaseModel
+from sqlalchemy.orm import load_only, selectinload
+from app import models, schemas
+
+class Include(NamedTuple):
+    relationship: object
+    schema: Type[BaseModel]
+
+class Resource(NamedTuple):
+    model: type
+    schema: Type[BaseModel]
+    # Yetki kontrolleri ve include'lar için her zaman yüklenen kolonlar
+    always: Sequence[str]
+    includes: Dict[str, Include]
+
+RESOURCES: Dict[str, Resource] = {
+    "vehicle": Resource(models.Vehicle, schemas.VehicleOut, ("id", "owner_id"), {
+        "owner": Include(models.Vehicle.owner, schemas.UserPublicOut),
+        "reviews": Include(models.Vehicle.reviews, schemas.ReviewOut),
+    }),
+    "rental": Resource(models.Rental, schemas.RentalOut, ("id", "user_id", "vehicle_id"), {
+        "vehicle": Include(models.Rental.vehicle, schemas.VehicleOut),
+        "rides": Include(models.Rental.rides, schemas.RideOut),
+        "reviews": Include(models.Rental.reviews, schemas.ReviewOut),
+    }),
+    "ride": Resource(models.Ride, schemas.RideOut, ("id", "renter_id", "rental_id"), {
+        "renter": Include(models.Ride.renter, schemas.UserPublicOut),
+        "participants": Include(models.Ride.participants, schemas.RideParticipantOut),
+        "reviews": Include(models.Ride.reviews, schemas.ReviewOut),
+    }),
+    "review": Resource(models.Review, schemas.ReviewOut, ("id", "user_id", "vehicle_id", "ride_id", "renter_id"), {
+        "user": Include(models.Review.user, schemas.UserPublicOut),
+        "vehicle": Include(models.Review.vehicle, schemas.VehicleOut),
+        "ride": Include(models.Review.ride, schemas.RideOut),
+    }),
+}
+
+class Fieldset(NamedTuple):
+    resource: Resource
+    fields: Optional[List[str]]
+    include: List[str]
+
+def _split(value: Optional[str]) -> List[str]:
+    return [item.strip() for item in (value or "").split(",") if item.strip()]
+
+# fields=None ve include=None ise None döner; endpoint normal yolu kullanır
+def parse(resource_name: str, fields: Optional[str], include: Optional[str]) -> Optional[Fieldset]:
+    if fields is None and include is None:
+        return None
+    resource = RESOURCES[resource_name]
+    requested = _split(fields) or None
+    if requested:
+        unknown = [f for f in requested if f not in resource.schema.model_fields]
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    includes = _split(include)
+    unknown = [i for i in includes if i not in resource.includes]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown includes: {', '.join(unknown)}")
+    return Fieldset(resource, requested, includes)
+
+def query_options(fieldset: Optional[Fieldset]) -> list:
+    if fieldset is None:
+        return []
+    resource = fieldset.resource
+    options = []
+    if fieldset.fields:
+        columns = dict.fromkeys([*resource.always, *fieldset.fields])
+        options.append(load_only(*(getattr(resource.model, name) for name in columns)))
+    for name in fieldset.include:
+        options.append(selectinload(resource.includes[name].relationship))
+    return options
+
+def _value(value):
+    # *Out şemalarıyla aynı biçim: UTC, "Z" son ekli
+    if isinstance(value, datetime):
+        return schemas.ensure_aware_utc(value).isoformat().replace("+00:00", "Z")
+    return value
+
+def _dump_related(include: Include, value):
+    if value is None:
+        return None
+    if isinstance(value, list):
+        return [include.schema.model_validate(item).model_dump(mode="json") for item in value]
+    return include.schema.model_validate(value).model_dump(mode="json")
+
+def serialize(fieldset: Fieldset, items: Sequence) -> list:
+    resource = fieldset.resource
+    names = fieldset.fields or list(resource.schema.model_fields)
+    result = []
+    for item in items:
+        data = {name: _value(getattr(item, name)) for name in names}
+        for name in fieldset.include:
+            data[name] = _dump_related(resource.includes[name], getattr(item, name))
+        result.append(data)
+    return jsonable_encoder(result)
@@ -0,0 +1,76 @@
+import logging
+import re
+from typing import Optional
+from sqlalchemy import column, func, inspect, literal_column, table, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import OperationalError
+
+logger = logging.getLogger(__name__)
+
+# reviews.comment için FTS5 external-content indeksi; içerik reviews tablosunda kalır,
+# tetikleyiciler ORM ve Core (UPDATE/DELETE ... RETURNING) yazılarında da indeksi güncel tutar
+REVIEW_INDEX_DDL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS reviews_fts USING fts5(
+        comment,
+        content='reviews',
+        content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS reviews_fts_ai AFTER INSERT ON reviews BEGIN
+        INSERT INTO reviews_fts(rowid, comment) VALUES (new.id, new.comment);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS reviews_fts_ad AFTER DELETE ON reviews BEGIN
+        INSERT INTO reviews_fts(reviews_fts, rowid, comment) VALUES ('delete', old.id, old.comment);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS reviews_fts_au AFTER UPDATE OF comment ON reviews BEGIN
+        INSERT INTO reviews_fts(reviews_fts, rowid, comment) VALUES ('delete', old.id, old.comment);
+        INSERT INTO reviews_fts(rowid, comment) VALUES (new.id, new.comment);
+    END
+    """,
+]
+
+reviews_fts = table("reviews_fts", column("rowid"))
+_fts_ref = literal_column("reviews_fts")
+
+# SQLite FTS5 olmadan derlenmişse arama LIKE'a düşer
+fts_available = False
+
+def ensure_review_index(engine: Engine) -> None:
+    global fts_available
+    try:
+        created = not inspect(engine).has_table("reviews_fts")
+        with engine.begin() as conn:
+            for statement in REVIEW_INDEX_DDL:
+                conn.execute(text(statement))
+            # İndeks ilk kez oluşturulduysa mevcut yorumları doldur
+            if created:
+                conn.execute(text("INSERT INTO reviews_fts(reviews_fts) VALUES ('rebuild')"))
+        fts_available = True
+    except OperationalError:
+        logger.warning("SQLite FTS5 is not available; review search falls back to LIKE", exc_info=True)
+        fts_available = False
+
+# Kullanıcı girdisi FTS sorgu sözdizimine hiç ulaşmaz: her kelime tırnaklanır ve önek
+# araması yapılır (Türkçe ekler için "temiz" -> "temizdi"), kelimeler AND ile birleşir
+def match_expression(q: str) -> Optional[str]:
+    terms = re.findall(r"\w+", q)
+    if not terms:
+        return None
+    return " ".join(f'"{term}"*' for term in terms)
+
+def match(expression: str):
+    return _fts_ref.op("MATCH")(expression)
+
+# bm25 küçük = daha alakalı; dışarıya büyük = daha alakalı olacak şekilde verilir
+def rank():
+    return func.bm25(_fts_ref)
+
+def snippet(tokens: int = 12):
+    return func.snippet(_fts_ref, 0, "[", "]", "…", tokens)
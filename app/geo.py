@@ -0,0 +1,129 @@
+import math
+from typing import List, Tuple
+import numpy as np
+
+EARTH_RADIUS_KM = 6371.0088
+MAX_PRECISION = 9
+_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+_DECODE = {c: i for i, c in enumerate(_BASE32)}
+
+def encode_geohash(lat: float, lon: float, precision: int = MAX_PRECISION) -> str:
+    lat_lo, lat_hi = -90.0, 90.0
+    lon_lo, lon_hi = -180.0, 180.0
+    chars = []
+    bits, bit_count, even = 0, 0, True
+    while len(chars) < precision:
+        if even:
+            mid = (lon_lo + lon_hi) / 2
+            if lon >= mid:
+                bits = (bits << 1) | 1
+                lon_lo = mid
+            else:
+                bits <<= 1
+                lon_hi = mid
+        else:
+            mid = (lat_lo + lat_hi) / 2
+            if lat >= mid:
+                bits = (bits << 1) | 1
+                lat_lo = mid
+            else:
+                bits <<= 1
+                lat_hi = mid
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(_BASE32[bits])
+            bits, bit_count = 0, 0
+    return "".join(chars)
+
+# Hücrenin merkezi ve yarı boyutları: (lat, lon, lat_err, lon_err)
+def decode_geohash(geohash: str) -> Tuple[float, float, float, float]:
+    lat_lo, lat_hi = -90.0, 90.0
+    lon_lo, lon_hi = -180.0, 180.0
+    even = True
+    for char in geohash:
+        value = _DECODE[char]
+        for shift in range(4, -1, -1):
+            bit = (value >> shift) & 1
+            if even:
+                mid = (lon_lo + lon_hi) / 2
+                if bit:
+                    lon_lo = mid
+                else:
+                    lon_hi = mid
+            else:
+                mid = (lat_lo + lat_hi) / 2
+                if bit:
+                    lat_lo = mid
+                else:
+                    lat_hi = mid
+            even = not even
+    return (lat_lo + lat_hi) / 2, (lon_lo + lon_hi) / 2, (lat_hi - lat_lo) / 2, (lon_hi - lon_lo) / 2
+
+def cell_size_degrees(precision: int) -> Tuple[float, float]:
+    lat_bits = (5 * precision) // 2
+    lon_bits = 5 * precision - lat_bits
+    return 180.0 / (1 << lat_bits), 360.0 / (1 << lon_bits)
+
+def _wrap_lon(lon: float) -> float:
+    return (lon + 180.0) % 360.0 - 180.0
+
+def geohash_neighbors(geohash: str) -> List[str]:
+    lat, lon, lat_err, lon_err = decode_geohash(geohash)
+    cells = []
+    for dlat in (-1, 0, 1):
+        for dlon in (-1, 0, 1):
+            if dlat == 0 and dlon == 0:
+                continue
+            n_lat = lat + dlat * 2 * lat_err
+            if not -90.0 < n_lat < 90.0:
+                continue
+            cells.append(encode_geohash(n_lat, _wrap_lon(lon + dlon * 2 * lon_err), len(geohash)))
+    return cells
+
+# Yarıçapı tek hücre boyutu içinde kalan en ince precision; merkez + 8 komşu daireyi kapsar
+def precision_for_radius(radius_km: float, lat: float) -> int:
+    km_per_deg = math.pi * EARTH_RADIUS_KM / 180.0
+    cos_lat = max(math.cos(math.radians(lat)), 1e-6)
+    for precision in range(MAX_PRECISION, 0, -1):
+        lat_deg, lon_deg = cell_size_degrees(precision)
+        if lat_deg * km_per_deg >= radius_km and lon_deg * km_per_deg * cos_lat >= radius_km:
+            return precision
+    return 1
+
+def cells_for_radius(lat: float, lon: float, radius_km: float) -> List[str]:
+    center = encode_geohash(lat, lon, precision_for_radius(radius_km, lat))
+    return sorted({center, *geohash_neighbors(center)})
+
+def cells_for_bbox(min_lat: float, min_lon: float, max_lat: float, max_lon: float) -> List[str]:
+    for precision in range(MAX_PRECISION, 0, -1):
+        lat_deg, lon_deg = cell_size_degrees(precision)
+        # Kutunun kenarları en fazla 3x3 hücreye yayılacak kadar kaba seç
+        if lat_deg * 2 >= max_lat - min_lat and lon_deg * 2 >= max_lon - min_lon:
+            break
+    lat_deg, lon_deg = cell_size_degrees(precision)
+    cells = set()
+    lat = min_lat
+    while True:
+        lon = min_lon
+        while True:
+            cells.add(encode_geohash(min(lat, 89.999999), lon, precision))
+            if lon >= max_lon:
+                break
+            lon = min(lon + lon_deg, max_lon)
+        if lat >= max_lat:
+            break
+        lat = min(lat + lat_deg, max_lat)
+    return sorted(cells)
+
+# Geohash önekleri için indekslenebilir aralık: prefix <= value < prefix + "{"
+def prefix_range(prefix: str) -> Tuple[str, str]:
+    return prefix, prefix + "{"
+
+def haversine_km(lat: float, lon: float, lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
+    lat1 = math.radians(lat)
+    lat2 = np.radians(lats)
+    dlat = lat2 - lat1
+    dlon = np.radians(lons) - math.radians(lon)
+    a = np.sin(dlat / 2) ** 2 + math.cos(lat1) * np.cos(lat2) * np.sin(dlon / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
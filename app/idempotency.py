@@ -0,0 +1,273 @@
+import asyncio
+import hashlib
+import logging
+import re
+import time
+from collections import OrderedDict
+from typing import List, Optional, Sequence, Tuple
+from jose import JWTError
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app import auth
+from app.config import settings
+from app.revocation import revocations
+
+logger = logging.getLogger(__name__)
+
+MAX_KEY_LENGTH = 255
+
+StoredResponse = Tuple[int, List[Tuple[bytes, bytes]], bytes]
+
+class IdempotencyEntry:
+    __slots__ = ("fingerprint", "expires", "done", "response")
+
+    def __init__(self, fingerprint: str, expires: float):
+        self.fingerprint = fingerprint
+        self.expires = expires
+        self.done = asyncio.Event()
+        self.response: Optional[StoredResponse] = None
+
+# Event loop thread'inden kullanılır; kilit gerekmez
+class IdempotencyStore:
+    def __init__(self, ttl: float, max_entries: int, sweep_interval: float):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.sweep_interval = sweep_interval
+        self.entries: "OrderedDict[Tuple[str, str], IdempotencyEntry]" = OrderedDict()
+        self._sweeper: Optional[asyncio.Task] = None
+        self.executed = 0
+        self.replayed = 0
+        self.mismatched = 0
+        self.rejected = 0
+
+    def get(self, key: Tuple[str, str]) -> Optional[IdempotencyEntry]:
+        entry = self.entries.get(key)
+        if entry is not None and entry.expires <= time.monotonic() and entry.response is not None:
+            del self.entries[key]
+            return None
+        return entry
+
+    # Yer açılamazsa (tüm kayıtlar hâlâ çalışıyor) None döner
+    def begin(self, key: Tuple[str, str], fingerprint: str) -> Optional[IdempotencyEntry]:
+        self._ensure_sweeper()
+        if len(self.entries) >= self.max_entries:
+            self.sweep()
+            if not self._evict(len(self.entries) - self.max_entries + 1):
+                self.rejected += 1
+                return None
+        entry = self.entries[key] = IdempotencyEntry(fingerprint, time.monotonic() + self.ttl)
+        self.executed += 1
+        return entry
+
+    # En eski tamamlanmış kayıtlar atılır. Çalışan kayıt atılmaz: atılırsa aynı anahtarla gelen
+    # eşzamanlı kopya onu bulamaz ve yan etkiyi ikinci kez çalıştırır.
+    def _evict(self, count: int) -> bool:
+        if count <= 0:
+            return True
+        victims = []
+        for key, entry in self.entries.items():
+            if entry.response is not None:
+                victims.append(key)
+                if len(victims) == count:
+                    break
+        if len(victims) < count:
+            return False
+        for key in victims:
+            del self.entries[key]
+        return True
+
+    def complete(self, entry: IdempotencyEntry, response: StoredResponse) -> None:
+        entry.response = response
+        entry.done.set()
+
+    # Hata ya da 5xx: kayıt silinir, bekleyenlerden biri isteği yeniden çalıştırır
+    def abandon(self, key: Tuple[str, str], entry: IdempotencyEntry) -> None:
+        if self.entries.get(key) is entry:
+            del self.entries[key]
+        entry.done.set()
+
+    def sweep(self) -> int:
+        now = time.monotonic()
+        expired = [k for k, e in self.entries.items() if e.expires <= now and e.response is not None]
+        for key in expired:
+            del self.entries[key]
+        return len(expired)
+
+    def _ensure_sweeper(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._sweeper is None or self._sweeper.done() or self._sweeper.get_loop() is not loop:
+            self._sweeper = loop.create_task(self._sweep_forever())
+
+    async def _sweep_forever(self) -> None:
+        while True:
+            await asyncio.sleep(self.sweep_interval)
+            try:
+                self.sweep()
+            except Exception:
+                logger.exception("Idempotency sweep failed")
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self.entries),
+            "in_flight": sum(1 for e in self.entries.values() if e.response is None),
+            "executed": self.executed,
+            "replayed": self.replayed,
+            "mismatched": self.mismatched,
+            "rejected": self.rejected,
+        }
+
+def _error(status_code: int, detail: str, headers: Optional[dict] = None) -> JSONResponse:
+    return JSONResponse(status_code=status_code, content={"detail": detail}, headers=headers)
+
+class IdempotencyMiddleware:
+    def __init__(
+        self,
+        app: ASGIApp,
+        store: IdempotencyStore,
+        routes: Sequence[str],
+        wait_timeout: float
+    ):
+        self.app = app
+        self.store = store
+        self.routes = [re.compile(pattern) for pattern in routes]
+        self.wait_timeout = wait_timeout
+
+    # Anahtarlar kullanıcı başına ayrıdır; geçerli access token yoksa (refresh token dahil) istek olduğu
+    # gibi geçer ve endpoint 401 döner.
+    # İptal edilmiş (çıkış yapılmış) token ile saklı yanıt tekrar oynatılmaz.
+    def _subject(self, scope: Scope) -> Optional[str]:
+        for name, value in scope.get("headers", []):
+            if name == b"authorization":
+                scheme, _, token = value.decode("latin-1").partition(" ")
+                if scheme.lower() != "bearer" or not token:
+                    return None
+                try:
+                    payload = auth.decode_token(token, "access")
+                except JWTError:
+                    return None
+                if revocations.is_revoked(payload.get("jti"), payload.get("fam")):
+                    return None
+                sub = payload.get("sub")
+                return str(sub) if sub is not None else None
+        return None
+
+    def _matches(self, scope: Scope) -> bool:
+        route = f"{scope['method']} {scope['path']}"
+        return any(pattern.fullmatch(route) for pattern in self.routes)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not self._matches(scope):
+            await self.app(scope, receive, send)
+            return
+
+        idempotency_key = None
+        for name, value in scope.get("headers", []):
+            if name == b"idempotency-key":
+                idempotency_key = value.decode("latin-1").strip()
+                break
+        if not idempotency_key:
+            await self.app(scope, receive, send)
+            return
+        if len(idempotency_key) > MAX_KEY_LENGTH:
+            await _error(400, "Idempotency-Key is too long")(scope, receive, send)
+            return
+        subject = self._subject(scope)
+        if subject is None:
+            await self.app(scope, receive, send)
+            return
+
+        body = await _read_body(receive)
+        digest = hashlib.sha256()
+        for part in (scope["method"].encode(), scope["path"].encode(), scope.get("query_string", b""), body):
+            digest.update(part + b"\0")
+        fingerprint = digest.hexdigest()
+        key = (subject, idempotency_key)
+
+        while True:
+            entry = self.store.get(key)
+            if entry is None:
+                break
+            if entry.fingerprint != fingerprint:
+                self.store.mismatched += 1
+                await _error(422, "Idempotency-Key was already used with a different request")(scope, receive, send)
+                return
+            if entry.response is not None:
+                self.store.replayed += 1
+                await _replay(entry.response, send)
+                return
+            # Aynı istek hâlâ çalışıyor; sonucunu bekle
+            try:
+                await asyncio.wait_for(entry.done.wait(), timeout=self.wait_timeout)
+            except asyncio.TimeoutError:
+                await _error(409, "A request with this Idempotency-Key is still being processed",
+                             {"Retry-After": "1"})(scope, receive, send)
+                return
+
+        entry = self.store.begin(key, fingerprint)
+        if entry is None:
+            await _error(503, "Too many requests in progress, please retry later",
+                         {"Retry-After": "1"})(scope, receive, send)
+            return
+        await self._execute(scope, _replay_receive(body, receive), send, key, entry)
+
+    async def _execute(self, scope: Scope, receive: Receive, send: Send, key, entry: IdempotencyEntry) -> None:
+        status_code: Optional[int] = None
+        headers: List[Tuple[bytes, bytes]] = []
+        chunks: List[bytes] = []
+
+        async def capture(message: Message) -> None:
+            nonlocal status_code, headers
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                headers = list(message.get("headers", []))
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, capture)
+        except BaseException:
+            self.store.abandon(key, entry)
+            raise
+        # 5xx ve kimliğe bağlı 401/403 saklanmaz; aynı anahtarla yeniden deneme isteği tekrar çalıştırır
+        if status_code is not None and status_code < 500 and status_code not in (401, 403):
+            self.store.complete(entry, (status_code, headers, b"".join(chunks)))
+        else:
+            self.store.abandon(key, entry)
+
+async def _read_body(receive: Receive) -> bytes:
+    chunks = []
+    while True:
+        message = await receive()
+        if message["type"] != "http.request":
+            break
+        chunks.append(message.get("body", b""))
+        if not message.get("more_body", False):
+            break
+    return b"".join(chunks)
+
+def _replay_receive(body: bytes, receive: Receive) -> Receive:
+    sent = False
+
+    async def replay() -> Message:
+        nonlocal sent
+        if not sent:
+            sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        return await receive()
+    return replay
+
+async def _replay(response: StoredResponse, send: Send) -> None:
+    status_code, headers, body = response
+    await send({
+        "type": "http.response.start",
+        "status": status_code,
+        "headers": headers + [(b"idempotent-replayed", b"true")],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+store = IdempotencyStore(
+    settings.IDEMPOTENCY_TTL_SECONDS,
+    settings.IDEMPOTENCY_MAX_ENTRIES,
+    settings.IDEMPOTENCY_SWEEP_SECONDS
+)
@@ -0,0 +1,252 @@
+import json
+import logging
+import random
+import threading
+import time
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Callable, Deque, Dict, List, Optional
+from sqlalchemy import and_, delete, event, func, or_, select, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+from app import models
+from app.config import settings
+from app.database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+JobHandler = Callable[[Session, dict], None]
+_handlers: Dict[str, JobHandler] = {}
+
+def handler(name: str):
+    def register(fn: JobHandler) -> JobHandler:
+        _handlers[name] = fn
+        return fn
+    return register
+
+# İş, çağıranın transaction'ına eklenir; CRUD yazısıyla birlikte commit edilir
+def enqueue(
+    db: Session,
+    name: str,
+    payload: Optional[dict] = None,
+    key: Optional[str] = None,
+    delay: float = 0.0,
+    max_attempts: Optional[int] = None
+) -> None:
+    now = datetime.utcnow()
+    stmt = sqlite_insert(models.Job).values(
+        name=name,
+        key=key,
+        payload=json.dumps(payload or {}),
+        status=models.JobStatus.pending,
+        attempts=0,
+        max_attempts=max_attempts or settings.JOB_MAX_ATTEMPTS,
+        run_after=now + timedelta(seconds=delay),
+        enqueued_at=now
+    ).on_conflict_do_nothing(index_elements=["key"])
+    db.execute(stmt)
+    db.info["jobs_enqueued"] = True
+
+def retry_delay(attempts: int) -> float:
+    delay = min(settings.JOB_RETRY_MAX_SECONDS, settings.JOB_RETRY_BASE_SECONDS * 2 ** (attempts - 1))
+    return delay * random.uniform(0.8, 1.2)
+
+def _percentiles(samples: List[float]) -> dict:
+    if not samples:
+        return {"count": 0, "p50_ms": None, "p95_ms": None, "max_ms": None}
+    ordered = sorted(samples)
+    pick = lambda q: round(ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000, 2)
+    return {"count": len(ordered), "p50_ms": pick(0.5), "p95_ms": pick(0.95), "max_ms": round(ordered[-1] * 1000, 2)}
+
+class JobMetrics:
+    def __init__(self, window: int = 1000):
+        self.lock = threading.Lock()
+        self.succeeded = 0
+        self.retried = 0
+        self.failed = 0
+        self.wait_times: Deque[float] = deque(maxlen=window)
+        self.run_times: Deque[float] = deque(maxlen=window)
+
+    def record(self, outcome: str, wait: float, run: float) -> None:
+        with self.lock:
+            setattr(self, outcome, getattr(self, outcome) + 1)
+            self.wait_times.append(wait)
+            self.run_times.append(run)
+
+    def snapshot(self, db: Session) -> dict:
+        depth = dict(db.query(models.Job.status, func.count(models.Job.id)).group_by(models.Job.status).all())
+        with self.lock:
+            return {
+                "depth": {status.value: depth.get(status, 0) for status in models.JobStatus},
+                "succeeded": self.succeeded,
+                "retried": self.retried,
+                "failed": self.failed,
+                "queue_latency": _percentiles(list(self.wait_times)),
+                "run_time": _percentiles(list(self.run_times)),
+            }
+
+class JobWorkerPool:
+    def __init__(self, workers: int, poll_interval: float, session_factory: Callable[[], Session] = SessionLocal):
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.session_factory = session_factory
+        self.metrics = JobMetrics()
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._threads: List[threading.Thread] = []
+        self._purge_lock = threading.Lock()
+        self._last_purge = 0.0
+
+    def start(self) -> None:
+        self._stopping.clear()
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._run, name=f"job-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def wake(self) -> None:
+        self._wake.set()
+
+    # Yeni iş alınmaz, çalışan işler bitene kadar (timeout'a kadar) beklenir
+    def shutdown(self, timeout: float) -> None:
+        self._stopping.set()
+        self._wake.set()
+        deadline = time.monotonic() + timeout
+        for thread in self._threads:
+            thread.join(max(0.0, deadline - time.monotonic()))
+        self._threads = [t for t in self._threads if t.is_alive()]
+        if self._threads:
+            logger.warning("%d job workers still busy after drain timeout", len(self._threads))
+
+    def _run(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                worked = self.run_once()
+                self._maybe_purge()
+            except Exception:
+                logger.exception("Job worker loop failed")
+                worked = False
+            if not worked:
+                self._wake.wait(self.poll_interval)
+                self._wake.clear()
+
+    def _claim(self, db: Session):
+        now = datetime.utcnow()
+        # Son denemesinde lease'i dolan iş yeniden alınmaz; max_attempts aşılmasın diye başarısız sayılır
+        db.execute(
+            update(models.Job)
+            .where(
+                models.Job.status == models.JobStatus.running,
+                models.Job.locked_until < now,
+                models.Job.attempts >= models.Job.max_attempts
+            )
+            .values(status=models.JobStatus.failed, finished_at=now, locked_until=None,
+                    last_error="Lease expired on the final attempt")
+        )
+        candidate = select(models.Job.id).where(or_(
+            and_(models.Job.status == models.JobStatus.pending, models.Job.run_after <= now),
+            # Lease süresi dolmuş (çöken worker'dan kalan) işler yeniden alınır
+            and_(
+                models.Job.status == models.JobStatus.running,
+                models.Job.locked_until < now,
+                models.Job.attempts < models.Job.max_attempts
+            )
+        )).order_by(models.Job.run_after).limit(1).scalar_subquery()
+        row = db.execute(
+            update(models.Job)
+            .where(models.Job.id == candidate)
+            .values(
+                status=models.JobStatus.running,
+                attempts=models.Job.attempts + 1,
+                started_at=now,
+                locked_until=now + timedelta(seconds=settings.JOB_LEASE_SECONDS)
+            )
+            .returning(models.Job.id, models.Job.name, models.Job.payload, models.Job.attempts,
+                       models.Job.max_attempts, models.Job.enqueued_at)
+        ).first()
+        db.commit()
+        return row
+
+    def run_once(self) -> bool:
+        db = self.session_factory()
+        try:
+            job = self._claim(db)
+            if job is None:
+                return False
+            started = time.monotonic()
+            wait = max(0.0, (datetime.utcnow() - job.enqueued_at).total_seconds())
+            try:
+                fn = _handlers.get(job.name)
+                if fn is None:
+                    raise LookupError(f"No handler registered for job '{job.name}'")
+                fn(db, json.loads(job.payload))
+                db.execute(update(models.Job).where(models.Job.id == job.id).values(
+                    status=models.JobStatus.done, finished_at=datetime.utcnow(), locked_until=None, last_error=None
+                ))
+                db.commit()
+                self.metrics.record("succeeded", wait, time.monotonic() - started)
+            except Exception as exc:
+                db.rollback()
+                exhausted = job.attempts >= job.max_attempts
+                values = {"last_error": repr(exc)[:1000], "locked_until": None}
+                if exhausted:
+                    values.update(status=models.JobStatus.failed, finished_at=datetime.utcnow())
+                else:
+                    values.update(
+                        status=models.JobStatus.pending,
+                        run_after=datetime.utcnow() + timedelta(seconds=retry_delay(job.attempts))
+                    )
+                db.execute(update(models.Job).where(models.Job.id == job.id).values(**values))
+                db.commit()
+                logger.warning("Job %s (%s) attempt %d failed: %r", job.id, job.name, job.attempts, exc)
+                self.metrics.record("failed" if exhausted else "retried", wait, time.monotonic() - started)
+            return True
+        finally:
+            db.close()
+
+    def _maybe_purge(self) -> None:
+        if time.monotonic() - self._last_purge < 3600 or not self._purge_lock.acquire(blocking=False):
+            return
+        try:
+            self._last_purge = time.monotonic()
+            self.purge(datetime.utcnow() - timedelta(hours=settings.JOB_RETENTION_HOURS))
+        finally:
+            self._purge_lock.release()
+
+    # Bitmiş işler saklama süresinden sonra silinir; başarısız işler incelenmek üzere kalır
+    def purge(self, cutoff: datetime) -> int:
+        db = self.session_factory()
+        try:
+            deleted = db.execute(delete(models.Job).where(
+                models.Job.status == models.JobStatus.done,
+                models.Job.finished_at < cutoff
+            )).rowcount
+            db.commit()
+            return deleted
+        finally:
+            db.close()
+
+pool = JobWorkerPool(settings.JOB_WORKERS, settings.JOB_POLL_INTERVAL)
+
+@event.listens_for(Session, "after_commit")
+def _wake_workers(session: Session) -> None:
+    if session.info.pop("jobs_enqueued", False):
+        pool.wake()
+
+# Bildirim kancaları: şimdilik yalnızca log yazar, gerçek gönderim (e-posta, push) yapılmaz.
+# Bir gönderici aynı adla handler(...) ile kaydedilerek bunların yerine geçer.
+@handler("rental.created")
+def notify_rental_created(db: Session, payload: dict) -> None:
+    rental = db.query(models.Rental).filter(models.Rental.id == payload["rental_id"]).first()
+    if rental is None or rental.vehicle is None:
+        return
+    logger.info("Notify owner %s: vehicle %s booked (rental %s, %s - %s)",
+                rental.vehicle.owner_id, rental.vehicle_id, rental.id, rental.start_date, rental.end_date)
+
+@handler("ride.joined")
+def notify_ride_joined(db: Session, payload: dict) -> None:
+    ride = db.query(models.Ride).filter(models.Ride.id == payload["ride_id"]).first()
+    if ride is None:
+        return
+    logger.info("Notify renter %s: passenger %s joined ride %s (%s seats left)",
+                ride.renter_id, payload["user_id"], ride.id, ride.available_seats)
@@ -0,0 +1,78 @@
+import logging
+from typing import Dict, List
+from sqlalchemy import Table, delete, func, inspect, select, text, update
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.schema import CreateTable
+from app import archive, models
+
+logger = logging.getLogger(__name__)
+
+def _has_autoincrement(conn: Connection, table: Table) -> bool:
+    sql = conn.execute(
+        text("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = :name"), {"name": table.name}
+    ).scalar()
+    return "AUTOINCREMENT" in (sql or "").upper()
+
+# SQLite mevcut tabloya AUTOINCREMENT ekleyemez: yeni tablo kurulur, satırlar kopyalanır, eskisi
+# silinip yenisi yeniden adlandırılır. İndeksler upgrade sonunda yeniden oluşturulur.
+def _rebuild_with_autoincrement(conn: Connection, table: Table) -> None:
+    staging = f"{table.name}__rebuild"
+    ddl = str(CreateTable(table).compile(dialect=conn.dialect)).strip()
+    conn.exec_driver_sql(ddl.replace(f"CREATE TABLE {table.name} ", f'CREATE TABLE "{staging}" ', 1))
+    columns = ", ".join(f'"{column.name}"' for column in table.columns)
+    conn.exec_driver_sql(f'INSERT INTO "{staging}" ({columns}) SELECT {columns} FROM "{table.name}"')
+    conn.exec_driver_sql(f'DROP TABLE "{table.name}"')
+    conn.exec_driver_sql(f'ALTER TABLE "{staging}" RENAME TO "{table.name}"')
+    # Daha önce arşive taşınmış id'ler sıcak tabloda olmadığından sayaç arşivdeki en büyük id'den başlatılır
+    archived = archive.ARCHIVE_TABLES.get(table.name)
+    seq = conn.execute(select(func.max(archived.c.id))).scalar() if archived is not None else None
+    if seq:
+        updated = conn.execute(
+            text("UPDATE sqlite_sequence SET seq = MAX(seq, :seq) WHERE name = :name"), {"seq": seq, "name": table.name}
+        ).rowcount
+        if not updated:
+            conn.execute(text("INSERT INTO sqlite_sequence (name, seq) VALUES (:name, :seq)"), {"seq": seq, "name": table.name})
+
+# create_all mevcut tablolara kolon veya indeks eklemez; eski car_sharing.db dosyaları
+# uygulama açılırken burada güncel şemaya getirilir. create_all'dan sonra çağrılmalı.
+def upgrade(engine: Engine) -> Dict[str, List[str]]:
+    inspector = inspect(engine)
+    added: Dict[str, List[str]] = {}
+    with engine.begin() as conn:
+        for table in models.Base.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing:
+                    continue
+                # SQLite varsayılansız NOT NULL kolon ekleyemez; kolon NULL'a izinli eklenip aşağıda doldurulur
+                column_type = column.type.compile(dialect=engine.dialect)
+                conn.exec_driver_sql(f'ALTER TABLE "{table.name}" ADD COLUMN "{column.name}" {column_type}')
+                added.setdefault(table.name, []).append(column.name)
+
+        # Yolcu takvimi kolonları yolculuğun zamanlarından kopyalanır
+        participants, rides = models.RideParticipant.__table__, models.Ride.__table__
+        for target, source in (("ride_start", "start_date"), ("ride_end", "end_date")):
+            if target in added.get(participants.name, ()):
+                conn.execute(update(participants).values({
+                    target: select(rides.c[source]).where(rides.c.id == participants.c.ride_id).scalar_subquery()
+                }))
+        if "ride_start" in added.get(participants.name, ()):
+            # Yolculuğu silinmiş katılımcıların takvimi doldurulamaz; bu yetim satırlar NOT NULL
+            # kolonlu yeniden kurulumdan önce atılır
+            conn.execute(delete(participants).where(participants.c.ride_start.is_(None)))
+
+        for table in models.Base.metadata.sorted_tables:
+            if (table.dialect_options["sqlite"]["autoincrement"] and inspector.has_table(table.name)
+                    and not _has_autoincrement(conn, table)):
+                _rebuild_with_autoincrement(conn, table)
+                added.setdefault(table.name, []).append("AUTOINCREMENT")
+
+        for table in models.Base.metadata.sorted_tables:
+            for index in table.indexes:
+                index.create(bind=conn, checkfirst=True)
+
+    for table_name, columns in added.items():
+        logger.info("Upgraded %s: %s", table_name, ", ".join(columns))
+    return added
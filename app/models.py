@@ -1,7 +1,7 @@
 from enum import Enum
 from sqlalchemy import (
     Column, Integer, String, Float, Boolean, ForeignKey, 
-    Enum as SQLEnum, DateTime, Text
+    Enum as SQLEnum, DateTime, Text, Index
 )
 from sqlalchemy.orm import relationship
 from app.database import Base
@@ -39,8 +39,9 @@ class Vehicle(Base):
     seats = Column(Integer, nullable=False)
     luggage = Column(Integer, nullable=True)
     available = Column(Boolean, default=True)
+    daily_rate = Column(Float, nullable=True)
 
-    owner_id = Column(Integer, ForeignKey("users.id"))
+    owner_id = Column(Integer, ForeignKey("users.id"), index=True)
     owner = relationship("User", back_populates="vehicles")
     reviews = relationship("Review", back_populates="vehicle")
 
@@ -49,28 +50,65 @@ class Rental(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     vehicle_id = Column(Integer, ForeignKey("vehicles.id"))
-    user_id = Column(Integer, ForeignKey("users.id"))
+    user_id = Column(Integer, ForeignKey("users.id"), index=True)
     start_date = Column(DateTime(timezone=True), nullable=False)
     end_date = Column(DateTime(timezone=True), nullable=False)
     total_price = Column(Float)
 
+    __table_args__ = (
+        # Araç bazlı tarih çakışması ve takvim sorguları için
+        Index("ix_rentals_vehicle_period", "vehicle_id", "start_date", "end_date"),
+        # Arşive taşınan id'ler yeniden verilmesin (rides ve ride_participants için de aynısı)
+        {"sqlite_autoincrement": True},
+    )
+
     vehicle = relationship("Vehicle")
     user = relationship("User", back_populates="rentals")
     rides = relationship("Ride", back_populates="rental")
     reviews = relationship("Review", back_populates="rental")
 
+# Bakım/servis için aracın belirli bir aralıkta kiralanamaması; müsaitlik sorgularında kiralamalarla birlikte aranır
+class VehicleBlackout(Base):
+    __tablename__ = "vehicle_blackouts"
+
+    id = Column(Integer, primary_key=True, index=True)
+    vehicle_id = Column(Integer, ForeignKey("vehicles.id"), nullable=False)
+    start_date = Column(DateTime(timezone=True), nullable=False)
+    end_date = Column(DateTime(timezone=True), nullable=False)
+    reason = Column(String, nullable=True)
+    created_by = Column(Integer, ForeignKey("users.id"), nullable=True)
+    created_at = Column(DateTime, nullable=False)
+
+    __table_args__ = (
+        Index("ix_vehicle_blackouts_vehicle_period", "vehicle_id", "start_date", "end_date"),
+    )
+
 class Ride(Base):
     __tablename__ = "rides"
 
     id = Column(Integer, primary_key=True, index=True)
     rental_id = Column(Integer, ForeignKey("rentals.id"))
-    renter_id = Column(Integer, ForeignKey("users.id"))
+    renter_id = Column(Integer, ForeignKey("users.id"), index=True)
     start_date = Column(DateTime(timezone=True), nullable=False)
     end_date = Column(DateTime(timezone=True), nullable=False)
     start_location = Column(String, nullable=False)
     end_location = Column(String, nullable=False)
     available_seats = Column(Integer, nullable=False)
 
+    # Opsiyonel koordinatlar; geohash hücreleri yakınlık araması için indekslenir
+    start_lat = Column(Float, nullable=True)
+    start_lon = Column(Float, nullable=True)
+    end_lat = Column(Float, nullable=True)
+    end_lon = Column(Float, nullable=True)
+    start_geohash = Column(String(9), nullable=True, index=True)
+    end_geohash = Column(String(9), nullable=True, index=True)
+
+    __table_args__ = (
+        # Kalkış zamanı aralığı + boş koltuk filtresi için
+        Index("ix_rides_start_date_available_seats", "start_date", "available_seats"),
+        {"sqlite_autoincrement": True},
+    )
+
     rental = relationship("Rental", back_populates="rides")
     renter = relationship("User", back_populates="rides_created")
     participants = relationship("RideParticipant", back_populates="ride")
@@ -83,6 +121,14 @@ class RideParticipant(Base):
     ride_id = Column(Integer, ForeignKey("rides.id"))
     user_id = Column(Integer, ForeignKey("users.id"))
     passengers_count = Column(Integer, default=1)
+    # Yolculuk zamanlarının kopyası; yolcu takvimi tek indeksli sorguyla okunur
+    ride_start = Column(DateTime(timezone=True), nullable=False)
+    ride_end = Column(DateTime(timezone=True), nullable=False)
+
+    __table_args__ = (
+        Index("ix_ride_participants_user_schedule", "user_id", "ride_start", "ride_end"),
+        {"sqlite_autoincrement": True},
+    )
 
     user = relationship("User", back_populates="ride_participations")
     ride = relationship("Ride", back_populates="participants")
@@ -102,7 +148,7 @@ class Review(Base):
     comment = Column(Text, nullable=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
 
-    vehicle_id = Column(Integer, ForeignKey("vehicles.id"), nullable=True)
+    vehicle_id = Column(Integer, ForeignKey("vehicles.id"), nullable=True, index=True)
     ride_id = Column(Integer, ForeignKey("rides.id"), nullable=True)
     renter_id = Column(Integer, ForeignKey("users.id"), nullable=True)
     rental_id = Column(Integer, ForeignKey("rentals.id"), nullable=True)
@@ -111,4 +157,59 @@ class Review(Base):
     ride = relationship("Ride", back_populates="reviews")
     user = relationship("User", back_populates="reviews", foreign_keys=[user_id])
     renter = relationship("User", back_populates="received_reviews", foreign_keys=[renter_id])
-    rental = relationship("Rental", back_populates="reviews")
\ No newline at end of file
+    rental = relationship("Rental", back_populates="reviews")
+
+class RevokedToken(Base):
+    __tablename__ = "revoked_tokens"
+
+    id = Column(Integer, primary_key=True, index=True)
+    # Access/refresh token jti'si ya da refresh token ailesi (fam)
+    jti = Column(String, unique=True, nullable=False)
+    expires_at = Column(DateTime, nullable=False, index=True)
+    revoked_at = Column(DateTime, nullable=False)
+
+class JobStatus(str, Enum):
+    pending = "pending"
+    running = "running"
+    done = "done"
+    failed = "failed"
+
+class Job(Base):
+    __tablename__ = "jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    name = Column(String, nullable=False)
+    # Aynı anahtarla ikinci kez kuyruğa eklenen iş yok sayılır
+    key = Column(String, unique=True, nullable=True)
+    payload = Column(Text, nullable=False, default="{}")
+    status = Column(SQLEnum(JobStatus), nullable=False, default=JobStatus.pending)
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False)
+    run_after = Column(DateTime, nullable=False)
+    locked_until = Column(DateTime, nullable=True)
+    enqueued_at = Column(DateTime, nullable=False)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+    last_error = Column(Text, nullable=True)
+
+    __table_args__ = (
+        Index("ix_jobs_status_run_after", "status", "run_after"),
+    )
+
+class ChangeLog(Base):
+    __tablename__ = "change_log"
+
+    # İstemci imleci; AUTOINCREMENT sayesinde silinen (sıkıştırılan) seq'ler yeniden verilmez
+    seq = Column(Integer, primary_key=True)
+    entity = Column(String, nullable=False)     # vehicle | rental | ride
+    entity_id = Column(Integer, nullable=False)
+    op = Column(String, nullable=False)         # upsert | delete
+    # Erişim kapsamı: rental/ride için kiracı, vehicle/rental için araç sahibi
+    user_id = Column(Integer, nullable=True)
+    owner_id = Column(Integer, nullable=True)
+    changed_at = Column(DateTime, nullable=False)
+
+    __table_args__ = (
+        Index("ix_change_log_entity", "entity", "entity_id", "seq"),
+        {"sqlite_autoincrement": True},
+    )
@@ -0,0 +1,93 @@
+import base64
+import heapq
+import math
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, Iterator, List, Sequence, Tuple
+import numpy as np
+
+SLOT_SECONDS = {"hour": 3600, "day": 86400}
+
+def _epoch_seconds(value: datetime) -> float:
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+def slot_count(range_start: datetime, range_end: datetime, granularity: str) -> int:
+    return math.ceil((_epoch_seconds(range_end) - _epoch_seconds(range_start)) / SLOT_SECONDS[granularity])
+
+# (araç sayısı x slot sayısı) bool matris; bir slot kısmen bile doluysa dolu sayılır
+def occupancy_matrix(
+    vehicle_ids: Sequence[int],
+    intervals: Iterable[Tuple[int, datetime, datetime]],
+    range_start: datetime,
+    range_end: datetime,
+    granularity: str
+) -> np.ndarray:
+    slot = SLOT_SECONDS[granularity]
+    slots = slot_count(range_start, range_end, granularity)
+    origin = _epoch_seconds(range_start)
+    rows: Dict[int, int] = {vehicle_id: i for i, vehicle_id in enumerate(vehicle_ids)}
+
+    intervals = [(rows[v], _epoch_seconds(s), _epoch_seconds(e)) for v, s, e in intervals if v in rows]
+    diff = np.zeros((len(vehicle_ids), slots + 1), dtype=np.int32)
+    if intervals:
+        data = np.array(intervals, dtype=np.float64)
+        row_idx = data[:, 0].astype(np.int64)
+        first = np.clip(np.floor((data[:, 1] - origin) / slot), 0, slots).astype(np.int64)
+        last = np.clip(np.ceil((data[:, 2] - origin) / slot), 0, slots).astype(np.int64)
+        # Fark dizisi: başlangıca +1, bitişe -1, kümülatif toplam > 0 ise dolu
+        np.add.at(diff, (row_idx, first), 1)
+        np.add.at(diff, (row_idx, last), -1)
+    return np.cumsum(diff[:, :-1], axis=1) > 0
+
+# Bit sırası MSB önce; son bayttaki fazladan bitler 0
+def encode_bitmap(row: np.ndarray) -> str:
+    return base64.b64encode(np.packbits(row).tobytes()).decode("ascii")
+
+# [[durum, uzunluk], ...] durum 1 = dolu
+def encode_runs(row: np.ndarray) -> List[List[int]]:
+    if not len(row):
+        return []
+    boundaries = np.flatnonzero(np.diff(row.astype(np.int8))) + 1
+    starts = np.concatenate(([0], boundaries))
+    lengths = np.diff(np.concatenate((starts, [len(row)])))
+    return [[int(row[s]), int(n)] for s, n in zip(starts, lengths)]
+
+def _aware(value: datetime) -> datetime:
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value.astimezone(timezone.utc)
+
+def _gaps(
+    vehicle_ids: Sequence[int],
+    intervals: Iterable[Tuple[int, datetime, datetime]],
+    window_start: datetime,
+    window_end: datetime,
+    duration: timedelta
+) -> Iterator[Tuple[datetime, int, datetime]]:
+    booked = iter(intervals)
+    current = next(booked, None)
+    for vehicle_id in vehicle_ids:
+        cursor = window_start
+        while current is not None and current[0] < vehicle_id:
+            current = next(booked, None)
+        while current is not None and current[0] == vehicle_id:
+            start, end = _aware(current[1]), _aware(current[2])
+            if start - cursor >= duration:
+                yield cursor, vehicle_id, start
+            cursor = max(cursor, end)
+            current = next(booked, None)
+        if window_end - cursor >= duration:
+            yield cursor, vehicle_id, window_end
+
+# Araç başına (vehicle_id, start_date) sıralı kiralamalar tek geçişte taranır; süreye sığan
+# boşlukların başlangıçlarından en erken "limit" tanesi (başlangıç, araç, boşluk sonu) olarak döner
+def free_slots(
+    vehicle_ids: Sequence[int],
+    intervals: Iterable[Tuple[int, datetime, datetime]],
+    window_start: datetime,
+    window_end: datetime,
+    duration: timedelta,
+    limit: int
+) -> List[Tuple[datetime, int, datetime]]:
+    window_start, window_end = _aware(window_start), _aware(window_end)
+    gaps = _gaps(sorted(vehicle_ids), intervals, window_start, window_end, duration)
+    return heapq.nsmallest(limit, gaps, key=lambda gap: (gap[0], gap[1]))
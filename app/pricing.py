@@ -0,0 +1,65 @@
+from datetime import datetime, timezone
+from typing import Iterable, Optional, Sequence, Tuple
+import numpy as np
+from app.config import settings
+
+HOURS_PER_WEEK = 168.0
+# Unix epoch (1970-01-01) Perşembe; haftanın 48-96. saatleri Cumartesi ve Pazar
+WEEKEND_OFFSET_HOURS = 48.0
+WEEKEND_HOURS = 48.0
+
+def to_epoch_hours(values: Iterable[datetime]) -> np.ndarray:
+    return np.array([
+        (v if v.tzinfo else v.replace(tzinfo=timezone.utc)).timestamp() for v in values
+    ], dtype=np.float64) / 3600.0
+
+# Epoch'tan t saatine kadar geçen hafta sonu saatleri
+def weekend_hours_before(hours: np.ndarray) -> np.ndarray:
+    weeks = np.floor(hours / HOURS_PER_WEEK)
+    offset = hours - weeks * HOURS_PER_WEEK
+    return weeks * WEEKEND_HOURS + np.clip(offset - WEEKEND_OFFSET_HOURS, 0.0, WEEKEND_HOURS)
+
+class PricingEngine:
+    def __init__(
+        self,
+        default_daily_rate: float,
+        weekend_multiplier: float,
+        discount_tiers: Sequence[Tuple[float, float]]
+    ):
+        tiers = sorted(discount_tiers)
+        self.default_daily_rate = default_daily_rate
+        self.weekend_multiplier = weekend_multiplier
+        self.tier_days = np.array([days for days, _ in tiers], dtype=np.float64)
+        self.tier_discounts = np.array([0.0] + [discount for _, discount in tiers], dtype=np.float64)
+
+    def rates(self, daily_rates: Iterable[Optional[float]]) -> np.ndarray:
+        return np.array([
+            self.default_daily_rate if rate is None else rate for rate in daily_rates
+        ], dtype=np.float64)
+
+    # Her pencere için günlük ücretle çarpılacak katsayı (M,)
+    def window_factors(self, start_hours: np.ndarray, end_hours: np.ndarray) -> np.ndarray:
+        total = end_hours - start_hours
+        weekend = weekend_hours_before(end_hours) - weekend_hours_before(start_hours)
+        weekday = total - weekend
+        discount = self.tier_discounts[np.searchsorted(self.tier_days, total / 24.0, side="right")]
+        return (weekday + weekend * self.weekend_multiplier) / 24.0 * (1.0 - discount)
+
+    # N araç x M pencere fiyat matrisi
+    def quote_matrix(self, daily_rates: np.ndarray, start_hours: np.ndarray, end_hours: np.ndarray) -> np.ndarray:
+        factors = self.window_factors(start_hours, end_hours)
+        return np.round(daily_rates[:, None] * factors[None, :], 2)
+
+    def quote(self, daily_rate: Optional[float], start_date: datetime, end_date: datetime) -> float:
+        prices = self.quote_matrix(
+            self.rates([daily_rate]),
+            to_epoch_hours([start_date]),
+            to_epoch_hours([end_date])
+        )
+        return float(prices[0, 0])
+
+engine = PricingEngine(
+    settings.DEFAULT_DAILY_RATE,
+    settings.WEEKEND_RATE_MULTIPLIER,
+    settings.DURATION_DISCOUNT_TIERS
+)
@@ -0,0 +1,332 @@
+import asyncio
+import contextvars
+import json
+import logging
+import os
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from typing import List, Optional, Tuple
+from urllib.parse import parse_qs
+from jose import JWTError
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import JSONResponse, Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app import auth, models
+from app.database import SessionLocal
+from app.revocation import revocations
+
+logger = logging.getLogger(__name__)
+
+MAX_STACK_DEPTH = 128
+MAX_SQL_STATEMENTS = 2000
+SQL_PREVIEW_LENGTH = 500
+_LIBRARY_PREFIX = re.compile(r".*[/\\](?:(?:site|dist)-packages|lib[/\\]python\d+\.\d+)[/\\]")
+_PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__))) + os.sep
+
+class RequestProfile:
+    def __init__(self, method: str, path: str):
+        self.method = method
+        self.path = path
+        self.started = time.perf_counter()
+        self.started_at = datetime.utcnow()
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self.sql: List[dict] = []
+        self.sql_dropped = 0
+        self.duration = 0.0
+        self.status_code: Optional[int] = None
+        self.finished = False
+
+    def finish(self) -> None:
+        self.duration = time.perf_counter() - self.started
+        self.finished = True
+
+    def add_sql(self, statement: str, started: float, elapsed: float, rowcount: int) -> None:
+        if self.finished:
+            return
+        if len(self.sql) >= MAX_SQL_STATEMENTS:
+            self.sql_dropped += 1
+            return
+        self.sql.append({
+            "offset_ms": round((started - self.started) * 1000, 3),
+            "duration_ms": round(elapsed * 1000, 3),
+            "rowcount": rowcount,
+            "thread": threading.current_thread().name,
+            "statement": " ".join(statement.split())[:SQL_PREVIEW_LENGTH],
+        })
+
+    # Flame graph araçlarının (flamegraph.pl, speedscope) okuduğu "collapsed" biçim
+    def collapsed(self) -> str:
+        return "".join(f"{';'.join(stack)} {count}\n" for stack, count in self.stacks.most_common())
+
+    def top_functions(self, limit: int = 30) -> List[dict]:
+        own: Counter = Counter()
+        total: Counter = Counter()
+        for stack, count in self.stacks.items():
+            own[stack[-1]] += count
+            for frame in set(stack[1:]):
+                total[frame] += count
+        samples = self.samples or 1
+        return [
+            {"function": frame, "self_pct": round(100 * n / samples, 1), "total_pct": round(100 * total[frame] / samples, 1)}
+            for frame, n in own.most_common(limit)
+        ]
+
+    def report(self) -> dict:
+        sql_ms = sum(s["duration_ms"] for s in self.sql)
+        return {
+            "method": self.method,
+            "path": self.path,
+            "started_at": self.started_at,
+            "status_code": self.status_code,
+            "duration_ms": round(self.duration * 1000, 3),
+            "samples": self.samples,
+            "sql": {
+                "statements": len(self.sql) + self.sql_dropped,
+                "total_ms": round(sql_ms, 3),
+                "timeline": self.sql,
+            },
+            "top_functions": self.top_functions(),
+            "collapsed": self.collapsed(),
+        }
+
+# Profilin sahibi olan istek; run_in_threadpool context'i kopyaladığı için worker thread'lerde de görünür
+_active: contextvars.ContextVar[Optional[RequestProfile]] = contextvars.ContextVar("active_profile", default=None)
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    filename = code.co_filename
+    if filename.startswith(_PROJECT_ROOT):
+        filename = filename[len(_PROJECT_ROOT):]
+    else:
+        filename = _LIBRARY_PREFIX.sub("", filename)
+    return f"{code.co_name} ({filename}:{code.co_firstlineno})"
+
+def _stack(frame, thread_name: str) -> Tuple[str, ...]:
+    labels = []
+    while frame is not None and len(labels) < MAX_STACK_DEPTH:
+        labels.append(_frame_label(frame))
+        frame = frame.f_back
+    labels.append(thread_name)
+    labels.reverse()
+    return tuple(labels)
+
+# Worker thread'inin o an çalıştırdığı context (anyio WorkerThread.run içindeki "context" yereli)
+def _worker_context(frame) -> Optional[contextvars.Context]:
+    while frame is not None:
+        if frame.f_code.co_name == "run" and "anyio" in frame.f_code.co_filename:
+            context = frame.f_locals.get("context")
+            return context if isinstance(context, contextvars.Context) else None
+        frame = frame.f_back
+    return None
+
+# sys._current_frames() örnekleyicisi. Yalnızca profillenen isteğe ait yığınlar sayılır:
+# event loop thread'inde o an çalışan task'ın, worker thread'lerde çalıştırılan fonksiyonun context'i kontrol edilir.
+class StackSampler:
+    def __init__(self, profile: RequestProfile, loop: asyncio.AbstractEventLoop, interval: float, max_seconds: float):
+        self.profile = profile
+        self.loop = loop
+        self.loop_thread = threading.get_ident()
+        self.interval = interval
+        self.max_seconds = max_seconds
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _owns(self, thread_id: int, frame) -> bool:
+        if thread_id == self.loop_thread:
+            task = asyncio.tasks._current_tasks.get(self.loop)
+            context = getattr(task, "_context", None)
+        else:
+            context = _worker_context(frame)
+        return context is not None and context.get(_active) is self.profile
+
+    def _run(self) -> None:
+        own_id = threading.get_ident()
+        deadline = time.monotonic() + self.max_seconds
+        while not self._stop.wait(self.interval) and time.monotonic() < deadline:
+            frames = sys._current_frames()
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in frames.items():
+                if thread_id != own_id and self._owns(thread_id, frame):
+                    self.profile.stacks[_stack(frame, names.get(thread_id, str(thread_id)))] += 1
+                    self.profile.samples += 1
+
+def instrument(engine: Engine) -> None:
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        if _active.get() is not None:
+            conn.info.setdefault("profile_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        profile = _active.get()
+        if profile is not None and conn.info.get("profile_started"):
+            started = conn.info["profile_started"].pop()
+            profile.add_sql(statement, started, time.perf_counter() - started, cursor.rowcount)
+
+def _is_admin(token: str) -> bool:
+    try:
+        payload = auth.decode_token(token, "access")
+    except JWTError:
+        return False
+    if revocations.is_revoked(payload.get("jti"), payload.get("fam")):
+        return False
+    db = SessionLocal()
+    try:
+        role = db.query(models.User.role).filter(models.User.id == payload.get("sub")).scalar()
+    finally:
+        db.close()
+    return role == models.UserRoleEnum.admin
+
+def _save(directory: str, max_files: int, profile: RequestProfile) -> None:
+    os.makedirs(directory, exist_ok=True)
+    slug = re.sub(r"[^A-Za-z0-9]+", "_", profile.path).strip("_") or "root"
+    name = f"{profile.started_at:%Y%m%dT%H%M%S%f}-{profile.method}-{slug}"
+    report = profile.report()
+    with open(os.path.join(directory, name + ".collapsed"), "w") as f:
+        f.write(report.pop("collapsed"))
+    with open(os.path.join(directory, name + ".json"), "w") as f:
+        json.dump(report, f, default=str, indent=1)
+    # En eski profiller silinir
+    files = sorted(os.listdir(directory))
+    for stale in files[:max(0, len(files) - 2 * max_files)]:
+        os.remove(os.path.join(directory, stale))
+
+class ProfilingMiddleware:
+    # Admin isteği X-Profile: 1 başlığı ya da ?__profile=1 ile profillenir; yanıt yerine profil döner.
+    # Biçim: X-Profile-Format / ?__profile_format= "json" (varsayılan) ya da "collapsed".
+    def __init__(
+        self,
+        app: ASGIApp,
+        interval: float,
+        max_seconds: float,
+        sample_rate: float,
+        output_dir: str,
+        max_files: int
+    ):
+        self.app = app
+        self.interval = interval
+        self.max_seconds = max_seconds
+        self.sample_rate = sample_rate
+        self.output_dir = output_dir
+        self.max_files = max_files
+
+    def _options(self, scope: Scope) -> Tuple[Optional[str], str, Optional[str]]:
+        flag, output_format, token = None, "json", None
+        for name, value in scope.get("headers", []):
+            if name == b"x-profile":
+                flag = value.decode("latin-1").strip()
+            elif name == b"x-profile-format":
+                output_format = value.decode("latin-1").strip().lower()
+            elif name == b"authorization":
+                scheme, _, credentials = value.decode("latin-1").partition(" ")
+                if scheme.lower() == "bearer":
+                    token = credentials
+        query = parse_qs(scope.get("query_string", b"").decode("latin-1"))
+        flag = query.get("__profile", [flag])[-1]
+        output_format = query.get("__profile_format", [output_format])[-1].lower()
+        enabled = flag if flag and flag.lower() not in ("0", "false", "no") else None
+        return enabled, output_format, token
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        requested, output_format, token = self._options(scope)
+        if requested:
+            if output_format not in ("json", "collapsed"):
+                await JSONResponse({"detail": "Profile format must be 'json' or 'collapsed'"}, 400)(scope, receive, send)
+                return
+            if not token or not await run_in_threadpool(_is_admin, token):
+                await JSONResponse({"detail": "Profiling requires an admin token"}, 403)(scope, receive, send)
+                return
+            profile, response = await self._profile(scope, receive, send, capture=True)
+            await self._respond(profile, response, output_format)(scope, receive, send)
+            return
+
+        if self.sample_rate > 0 and random.random() < self.sample_rate:
+            await self._profile(scope, receive, send, capture=False)
+            return
+
+        await self.app(scope, receive, send)
+
+    async def _save_sampled(self, profile: RequestProfile) -> None:
+        try:
+            await run_in_threadpool(_save, self.output_dir, self.max_files, profile)
+        except OSError:
+            logger.exception("Could not write sampled profile")
+
+    # capture=True: yanıt tamponlanır ve yerine profil döner. capture=False (örnekleme): yanıt olduğu gibi
+    # akar, gövde tutulmaz; SSE akışında ya da max_seconds dolunca profil kapatılıp kaydedilir.
+    async def _profile(self, scope: Scope, receive: Receive, send: Send, capture: bool):
+        profile = RequestProfile(scope["method"], scope["path"])
+        chunks: List[bytes] = []
+        headers: List[Tuple[bytes, bytes]] = []
+        sampler = StackSampler(profile, asyncio.get_running_loop(), self.interval, self.max_seconds)
+
+        async def finish() -> None:
+            if profile.finished:
+                return
+            profile.finish()
+            await run_in_threadpool(sampler.stop)
+            if not capture:
+                await self._save_sampled(profile)
+
+        async def record(message: Message) -> None:
+            nonlocal headers
+            if message["type"] == "http.response.start":
+                profile.status_code = message["status"]
+                headers = list(message.get("headers", []))
+                if not capture and dict(headers).get(b"content-type", b"").startswith(b"text/event-stream"):
+                    await finish()
+            elif message["type"] == "http.response.body":
+                if capture:
+                    chunks.append(message.get("body", b""))
+                elif time.perf_counter() - profile.started >= self.max_seconds:
+                    await finish()
+            if not capture:
+                await send(message)
+
+        reset = _active.set(profile)
+        sampler.start()
+        try:
+            await self.app(scope, receive, record)
+        finally:
+            _active.reset(reset)
+            await finish()
+        return profile, (headers, b"".join(chunks))
+
+    def _respond(self, profile: RequestProfile, response, output_format: str) -> Response:
+        headers, body = response
+        filename = f"profile-{profile.started_at:%Y%m%dT%H%M%S}"
+        if output_format == "collapsed":
+            return Response(
+                profile.collapsed(),
+                media_type="text/plain",
+                headers={"Content-Disposition": f'attachment; filename="{filename}.collapsed"',
+                         "X-Profile-Status": str(profile.status_code)}
+            )
+        report = profile.report()
+        content_type = dict(headers).get(b"content-type", b"").decode("latin-1")
+        report["response"] = {"content_type": content_type, "bytes": len(body)}
+        return Response(
+            json.dumps(report, default=str),
+            media_type="application/json",
+            headers={"Content-Disposition": f'attachment; filename="{filename}.json"'}
+        )
+
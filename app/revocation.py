@@ -0,0 +1,156 @@
+import hashlib
+import logging
+import math
+import threading
+from datetime import datetime
+from typing import Dict, Optional
+from sqlalchemy import delete, select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+from app import models
+from app.config import settings
+from app.database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+class BloomFilter:
+    def __init__(self, capacity: int, error_rate: float):
+        capacity = max(1, capacity)
+        self.size = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    # Çift hash (Kirsch-Mitzenmacher): h1 + i * h2
+    def _positions(self, item: str):
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hashes))
+
+    def add(self, item: str) -> None:
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, item: str) -> bool:
+        bits = self.bits
+        return all(bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+# Filtre ve küme birlikte değiştirilir; okuyucular kilit almaz
+class _Snapshot:
+    __slots__ = ("bloom", "revoked")
+
+    def __init__(self, bloom: BloomFilter, revoked: Dict[str, datetime]):
+        self.bloom = bloom
+        self.revoked = revoked
+
+class RevocationList:
+    def __init__(self, capacity: int, error_rate: float, sync_seconds: float, sweep_seconds: float):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.sync_seconds = sync_seconds
+        self.sweep_seconds = sweep_seconds
+        self._snapshot = _Snapshot(BloomFilter(capacity, error_rate), {})
+        self._last_id = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    # Sıcak yol: çoğu token Bloom filtresinde yoktur ve DB'ye hiç gidilmez
+    def is_revoked(self, *identifiers: Optional[str]) -> bool:
+        snapshot = self._snapshot
+        for identifier in identifiers:
+            if identifier and identifier in snapshot.bloom and identifier in snapshot.revoked:
+                return True
+        return False
+
+    # Kayıt zaten varsa False döner (ör. aynı refresh token'ın ikinci kullanımı)
+    def revoke(self, db: Session, jti: str, expires_at: datetime) -> bool:
+        result = db.execute(sqlite_insert(models.RevokedToken).values(
+            jti=jti,
+            expires_at=expires_at,
+            revoked_at=datetime.utcnow()
+        ).on_conflict_do_nothing(index_elements=["jti"]))
+        db.commit()
+        with self._lock:
+            self._add(jti, expires_at)
+        return result.rowcount == 1
+
+    def _add(self, jti: str, expires_at: datetime) -> None:
+        snapshot = self._snapshot
+        if len(snapshot.revoked) >= self.capacity:
+            # Filtre dolarsa yanlış pozitif oranı artar; daha büyük filtreyle yeniden kur
+            self.capacity *= 2
+            revoked = dict(snapshot.revoked)
+            revoked[jti] = expires_at
+            self._snapshot = self._build(revoked)
+            return
+        snapshot.revoked[jti] = expires_at
+        snapshot.bloom.add(jti)
+
+    def _build(self, revoked: Dict[str, datetime]) -> _Snapshot:
+        bloom = BloomFilter(max(self.capacity, 2 * len(revoked)), self.error_rate)
+        for jti in revoked:
+            bloom.add(jti)
+        return _Snapshot(bloom, revoked)
+
+    # Süresi dolan kayıtları sil, filtreyi kalanlardan yeniden kur
+    def rebuild(self, db: Session) -> None:
+        now = datetime.utcnow()
+        db.execute(delete(models.RevokedToken).where(models.RevokedToken.expires_at < now))
+        db.commit()
+        rows = db.execute(select(models.RevokedToken.id, models.RevokedToken.jti, models.RevokedToken.expires_at)).all()
+        with self._lock:
+            self._snapshot = self._build({row.jti: row.expires_at for row in rows})
+            self._last_id = max((row.id for row in rows), default=self._last_id)
+
+    # Diğer process'lerin eklediği kayıtları artımlı olarak al
+    def sync(self, db: Session) -> None:
+        rows = db.execute(
+            select(models.RevokedToken.id, models.RevokedToken.jti, models.RevokedToken.expires_at)
+            .where(models.RevokedToken.id > self._last_id)
+            .order_by(models.RevokedToken.id)
+        ).all()
+        if not rows:
+            return
+        with self._lock:
+            for row in rows:
+                self._add(row.jti, row.expires_at)
+            self._last_id = rows[-1].id
+
+    def start(self) -> None:
+        db = SessionLocal()
+        try:
+            self.rebuild(db)
+        finally:
+            db.close()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="revocation-sync", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join(self.sync_seconds)
+
+    def _run(self) -> None:
+        since_sweep = 0.0
+        while not self._stop.wait(self.sync_seconds):
+            since_sweep += self.sync_seconds
+            db = SessionLocal()
+            try:
+                if since_sweep >= self.sweep_seconds:
+                    self.rebuild(db)
+                    since_sweep = 0.0
+                else:
+                    self.sync(db)
+            except Exception:
+                logger.exception("Revocation list sync failed")
+            finally:
+                db.close()
+
+revocations = RevocationList(
+    settings.REVOCATION_BLOOM_CAPACITY,
+    settings.REVOCATION_BLOOM_ERROR_RATE,
+    settings.REVOCATION_SYNC_SECONDS,
+    settings.REVOCATION_SWEEP_SECONDS
+)
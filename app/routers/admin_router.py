@@ -0,0 +1,104 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+from app import analytics, archive, auth, broker, capture, catalog, changes, coalescing, idempotency, jobs, models, schemas, writer
+from app.database import get_db
+from datetime import datetime
+from app.config import settings
+
+router = APIRouter(
+    prefix="/admin",
+    tags=["Admin"],
+    dependencies=[Depends(auth.require_role(models.UserRoleEnum.admin))]
+)
+
+MAX_BUCKETS = 1000
+
+def _validate_range(start_date: datetime, end_date: datetime, bucket: str):
+    start_date = schemas.ensure_aware_utc(start_date)
+    end_date = schemas.ensure_aware_utc(end_date)
+    if start_date >= end_date:
+        raise HTTPException(status_code=400, detail="End date must be after start date")
+    if len(analytics.bucket_edges(start_date, end_date, bucket)) - 1 > MAX_BUCKETS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BUCKETS} buckets per request")
+    return start_date, end_date
+
+@router.get("/analytics/utilization")
+def read_utilization(
+    start_date: datetime = Query(...),
+    end_date: datetime = Query(...),
+    bucket: str = Query("day", pattern="^(day|week|month)$"),
+    group_by: str = Query("vehicle", pattern="^(vehicle|owner)$"),
+    db: Session = Depends(get_db)
+):
+    start_date, end_date = _validate_range(start_date, end_date, bucket)
+    return analytics.utilization(db, start_date, end_date, bucket, group_by)
+
+@router.get("/analytics/revenue")
+def read_revenue(
+    start_date: datetime = Query(...),
+    end_date: datetime = Query(...),
+    bucket: str = Query("day", pattern="^(day|week|month)$"),
+    group_by: str = Query("vehicle", pattern="^(vehicle|owner)$"),
+    db: Session = Depends(get_db)
+):
+    start_date, end_date = _validate_range(start_date, end_date, bucket)
+    return analytics.revenue(db, start_date, end_date, bucket, group_by)
+
+@router.get("/analytics/ride-fill")
+def read_ride_fill_rates(
+    start_date: datetime = Query(...),
+    end_date: datetime = Query(...),
+    bucket: str = Query("day", pattern="^(day|week|month)$"),
+    db: Session = Depends(get_db)
+):
+    start_date, end_date = _validate_range(start_date, end_date, bucket)
+    return analytics.ride_fill_rates(db, start_date, end_date, bucket)
+
+@router.get("/analytics/ratings")
+def read_rating_distribution(db: Session = Depends(get_db)):
+    return analytics.rating_distribution(db)
+
+@router.get("/jobs/metrics")
+def read_job_metrics(db: Session = Depends(get_db)):
+    return jobs.pool.metrics.snapshot(db)
+
+@router.get("/idempotency/metrics")
+def read_idempotency_metrics():
+    return idempotency.store.stats()
+
+@router.get("/catalog/stats")
+def read_catalog_stats():
+    return catalog.catalog.stats()
+
+@router.get("/changes/stats")
+def read_change_log_stats(db: Session = Depends(get_db)):
+    return changes.stats(db)
+
+@router.post("/changes/compact")
+def compact_change_log(db: Session = Depends(get_db)):
+    return {"removed": changes.compact(db), **changes.stats(db)}
+
+@router.get("/stream/metrics")
+def read_stream_metrics():
+    return broker.broker.stats()
+
+@router.get("/coalescing/stats")
+def read_coalescing_stats():
+    return coalescing.flights.stats()
+
+@router.get("/capture/stats")
+def read_capture_stats():
+    return capture.recorder.stats()
+
+@router.get("/writer/stats")
+def read_writer_stats():
+    return writer.coordinator.stats()
+
+# Bitmiş kiralama/yolculukları arşive taşır; öncesi/sonrası sorgu süreleri raporlanır
+@router.post("/archive/run")
+def run_archive(
+    older_than_days: int = Query(settings.ARCHIVE_AFTER_DAYS, ge=1),
+    batch_size: int = Query(settings.ARCHIVE_BATCH_SIZE, ge=1, le=50_000),
+    db: Session = Depends(get_db)
+):
+    return archive.run(db, older_than_days, batch_size)
@@ -1,8 +1,12 @@
+from datetime import datetime, timedelta
+from typing import Optional
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
+from jose import JWTError
 from sqlalchemy.orm import Session
-from app import schemas, auth
+from app import schemas, auth, models
 from app.database import get_db
+from app.revocation import revocations
 
 router = APIRouter(tags=["Authentication"])
 
@@ -18,5 +22,53 @@ async def login_for_access_token(
             detail="Incorrect email or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    access_token = auth.create_access_token(data={"sub": str(user.id)})
-    return {"access_token": access_token, "token_type": "bearer"}
\ No newline at end of file
+    return auth.create_token_pair(user.id)
+
+# Refresh token rotasyonu: her kullanımda yenisi verilir, eskisi iptal edilir.
+# İptal edilmiş bir refresh token tekrar gelirse zincirin tamamı iptal edilir.
+@router.post("/token/refresh", response_model=schemas.Token)
+def refresh_access_token(body: schemas.RefreshRequest, db: Session = Depends(get_db)):
+    invalid = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Invalid refresh token",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+    try:
+        payload = auth.decode_token(body.refresh_token, "refresh")
+        user_id = int(payload.get("sub"))
+        jti, family = payload["jti"], payload["fam"]
+    except (JWTError, KeyError, TypeError, ValueError):
+        raise invalid
+
+    if revocations.is_revoked(family):
+        raise invalid
+    if revocations.is_revoked(jti) or not revocations.revoke(db, jti, auth.token_expiry(payload)):
+        family_expiry = datetime.utcnow() + timedelta(days=auth.REFRESH_TOKEN_EXPIRE_DAYS)
+        revocations.revoke(db, family, family_expiry)
+        raise invalid
+
+    if db.query(models.User.id).filter(models.User.id == user_id).first() is None:
+        raise invalid
+    return auth.create_token_pair(user_id, family)
+
+# Mevcut access token'ı ve aynı girişten türeyen tüm token'ları iptal eder
+@router.post("/logout", status_code=status.HTTP_204_NO_CONTENT)
+def logout(
+    body: Optional[schemas.LogoutRequest] = None,
+    token: str = Depends(auth.oauth2_scheme),
+    current_user: models.User = Depends(auth.get_current_user),
+    db: Session = Depends(get_db)
+):
+    payload = auth.decode_token(token, "access")
+    if payload.get("jti"):
+        revocations.revoke(db, payload["jti"], auth.token_expiry(payload))
+    family_expiry = datetime.utcnow() + timedelta(days=auth.REFRESH_TOKEN_EXPIRE_DAYS)
+    if payload.get("fam"):
+        revocations.revoke(db, payload["fam"], family_expiry)
+    if body and body.refresh_token:
+        try:
+            refresh = auth.decode_token(body.refresh_token, "refresh")
+        except JWTError:
+            return
+        if refresh.get("sub") == str(current_user.id) and refresh.get("fam"):
+            revocations.revoke(db, refresh["fam"], family_expiry)
@@ -0,0 +1,19 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+from app import schemas, models, auth, changes
+from app.database import get_db
+
+router = APIRouter(prefix="/changes", tags=["Changes"])
+
+MAX_CHANGES_PER_PAGE = 1000
+
+# İstemci since=0 ile başlar, next_since'i saklar; has_more false olana kadar sayfalar.
+# Yalnızca kullanıcının liste endpoint'lerinde görebildiği varlıklar döner.
+@router.get("/", response_model=schemas.ChangeFeedOut)
+def read_changes(
+    since: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=MAX_CHANGES_PER_PAGE),
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(auth.get_current_user)
+):
+    return changes.feed(db, current_user, since, limit)
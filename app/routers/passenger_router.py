@@ -1,19 +1,82 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+import asyncio
+from fastapi import APIRouter, Depends, HTTPException, Request, status, Query
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
-from app import schemas, crud, models, auth
+from app import schemas, crud, models, auth, broker, writer
+from app.config import settings
 from app.database import get_db
-from typing import List
+from typing import List, Optional
+from datetime import datetime
 
 router = APIRouter(prefix="/passengers", tags=["Passengers"])
 
 @router.get("/rides", response_model=List[schemas.RideOut])
 def read_available_rides(
+    depart_after: Optional[datetime] = Query(None),
+    depart_before: Optional[datetime] = Query(None),
     db: Session = Depends(get_db),
     current_user: models.User = Depends(auth.get_current_user)
 ):
     if current_user.role != models.UserRoleEnum.passenger:
         raise HTTPException(status_code=403, detail="Only passengers can view rides")
-    return crud.get_available_rides(db)
+    return crud.get_available_rides(db, depart_after=depart_after, depart_before=depart_before)
+
+# Server-Sent Events: önce eşleşen yolculukların anlık görüntüsü ("snapshot"), sonra koltuk değişiklikleri.
+# Olaylar STREAM_COALESCE_SECONDS penceresinde birleştirilir; "resync" gelirse istemci yeniden bağlanmalı.
+@router.get("/rides/stream")
+async def stream_rides(
+    request: Request,
+    ride_ids: Optional[List[int]] = Query(None),
+    start_location: Optional[str] = Query(None),
+    end_location: Optional[str] = Query(None),
+    depart_after: Optional[datetime] = Query(None),
+    depart_before: Optional[datetime] = Query(None),
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(auth.get_current_user)
+):
+    if current_user.role != models.UserRoleEnum.passenger:
+        raise HTTPException(status_code=403, detail="Only passengers can view rides")
+
+    ride_filter = broker.RideFilter(set(ride_ids or ()), start_location, end_location, depart_after, depart_before)
+    # Snapshot ile abonelik arasında değişiklik kaçmasın diye önce abone olunur
+    subscription = broker.broker.subscribe(ride_filter)
+    if subscription is None:
+        raise HTTPException(status_code=503, detail="Too many live subscribers", headers={"Retry-After": "5"})
+    def load_snapshot():
+        if ride_ids:
+            rides = crud.get_rides_by_ids(db, ride_ids)
+        else:
+            rides = crud.get_available_rides(db, depart_after=depart_after, depart_before=depart_before)
+        return [e for e in (broker.ride_event("snapshot", ride) for ride in rides) if ride_filter.matches(e)]
+
+    # Senkron DB okuması event loop'u bloklamasın
+    try:
+        snapshot = await run_in_threadpool(load_snapshot)
+    except BaseException:
+        broker.broker.unsubscribe(subscription)
+        raise
+
+    async def events():
+        try:
+            yield broker.format_sse("snapshot", snapshot)
+            while not await request.is_disconnected():
+                try:
+                    await asyncio.wait_for(subscription.wakeup.wait(), timeout=settings.STREAM_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": heartbeat\n\n"
+                    continue
+                await asyncio.sleep(settings.STREAM_COALESCE_SECONDS)
+                for event in subscription.drain():
+                    yield broker.format_sse(event["type"], event)
+        finally:
+            broker.broker.unsubscribe(subscription)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 @router.post("/rides/{ride_id}/join", status_code=status.HTTP_201_CREATED)
 def join_ride(
@@ -24,7 +87,20 @@ def join_ride(
     if current_user.role != models.UserRoleEnum.passenger:
         raise HTTPException(status_code=403, detail="Only passengers can join rides")
     
-    if not crud.join_ride(db, ride_id, current_user.id):
+    user_id = current_user.id
+    if not writer.run(db, lambda session: crud.join_ride(session, ride_id, user_id)):
         raise HTTPException(status_code=400, detail="Unable to join ride")
     
-    return {"message": "Successfully joined the ride"}
\ No newline at end of file
+    return {"message": "Successfully joined the ride"}
+
+@router.post("/rides/join", response_model=List[schemas.RideParticipantOut], status_code=status.HTTP_201_CREATED)
+def join_rides(
+    batch: schemas.RideBatchJoin,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(auth.get_current_user)
+):
+    if current_user.role != models.UserRoleEnum.passenger:
+        raise HTTPException(status_code=403, detail="Only passengers can join rides")
+    
+    user_id = current_user.id
+    return writer.run(db, lambda session: crud.join_rides(session, batch.ride_ids, user_id))
@@ -1,12 +1,18 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi.responses import JSONResponse
 from sqlalchemy.orm import Session
-from app import schemas, crud, models, auth
+from app import schemas, crud, models, auth, fieldsets, writer
+from app.config import settings
 from app.database import get_db
-from typing import List
-from datetime import datetime
+from typing import List, Optional
+from datetime import datetime, timedelta, timezone
 
 router = APIRouter(prefix="/rentals", tags=["Rentals"])
 
+MAX_QUOTES_PER_REQUEST = 100_000
+MAX_SLOT_HORIZON_DAYS = 365
+MAX_SLOTS_PER_REQUEST = 100
+
 @router.post("/", response_model=schemas.RentalOut, status_code=status.HTTP_201_CREATED)
 def create_rental(
     rental: schemas.RentalCreate,
@@ -19,27 +25,79 @@ def create_rental(
     if rental.start_date >= rental.end_date:
         raise HTTPException(status_code=400, detail="End date must be after start date")
     
-    if not crud.is_vehicle_available(db, rental.vehicle_id, rental.start_date, rental.end_date):
-        raise HTTPException(
-            status_code=status.HTTP_409_CONFLICT,
-            detail="Vehicle not available for the selected dates"
-        )
+    user_id = current_user.id
     
-    return crud.create_rental(db=db, rental=rental, user_id=current_user.id)
+    def create(session: Session) -> models.Rental:
+        if not crud.is_vehicle_available(session, rental.vehicle_id, rental.start_date, rental.end_date):
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Vehicle not available for the selected dates"
+            )
+        return crud.create_rental(db=session, rental=rental, user_id=user_id)
+    
+    return writer.run(db, create)
+
+# Kurumsal müşteriler: aynı tarihler için birden çok araç, tek transaction'da
+@router.post("/fleet", response_model=schemas.FleetBookingOut, status_code=status.HTTP_201_CREATED)
+def create_fleet_booking(
+    booking: schemas.FleetBookingCreate,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(auth.get_current_user)
+):
+    if current_user.role != models.UserRoleEnum.renter:
+        raise HTTPException(status_code=403, detail="Only renters can create rentals")
+    
+    if booking.start_date >= booking.end_date:
+        raise HTTPException(status_code=400, detail="End date must be after start date")
+    
+    user_id = current_user.id
+    return writer.run(db, lambda session: crud.create_fleet_booking(session, booking, user_id))
+
+@router.post("/quotes", response_model=schemas.RentalQuoteOut)
+def quote_rentals(
+    quote_request: schemas.RentalQuoteRequest,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(auth.get_current_user)
+):
+    if len(quote_request.vehicle_ids) * len(quote_request.windows) > MAX_QUOTES_PER_REQUEST:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_QUOTES_PER_REQUEST} quotes per request")
+    
+    if any(w.start_date >= w.end_date for w in quote_request.windows):
+        raise HTTPException(status_code=400, detail="End date must be after start date")
+    
+    prices = crud.quote_rentals(db, quote_request.vehicle_ids, quote_request.windows)
+    return {"vehicle_ids": quote_request.vehicle_ids, "windows": quote_request.windows, "prices": prices}
 
 @router.get("/", response_model=List[schemas.RentalOut])
 def read_rentals(
+    fields: Optional[str] = Query(None, description="Comma separated fields to return"),
+    include: Optional[str] = Query(None, description="Comma separated related resources to embed"),
+    include_archived: bool = Query(False, description="Also return archived (finished) rentals"),
+    limit: Optional[int] = Query(None, ge=1, le=settings.LIST_MAX_PAGE_SIZE),
+    offset: int = Query(0, ge=0),
     db: Session = Depends(get_db),
     current_user: models.User = Depends(auth.get_current_user)
 ):
+    fieldset = fieldsets.parse("rental", fields, include)
+    if include_archived and fieldset and fieldset.include:
+        raise HTTPException(status_code=400, detail="include is not supported with include_archived")
+    options = fieldsets.query_options(fieldset)
     if current_user.role == models.UserRoleEnum.admin:
-        return crud.get_all_rentals(db)
+        rentals = crud.get_all_rentals(db, options=options, include_archived=include_archived, limit=limit, offset=offset)
     elif current_user.role == models.UserRoleEnum.owner:
-        return crud.get_rentals_for_owner_vehicles(db, current_user.id)
+        rentals = crud.get_rentals_for_owner_vehicles(
+            db, current_user.id, options=options, include_archived=include_archived, limit=limit, offset=offset
+        )
     elif current_user.role == models.UserRoleEnum.renter:
-        return crud.get_all_rentals(db, current_user.id)
+        rentals = crud.get_all_rentals(
+            db, current_user.id, options=options, include_archived=include_archived, limit=limit, offset=offset
+        )
     else:
         raise HTTPException(status_code=403, detail="Not authorized")
+    
+    if fieldset:
+        return JSONResponse(fieldsets.serialize(fieldset, rentals))
+    return rentals
 
 @router.get("/{rental_id}", response_model=schemas.RentalOut)
 def read_rental(
@@ -68,7 +126,8 @@ def update_rental(
     if current_user.role not in [models.UserRoleEnum.renter, models.UserRoleEnum.admin]:
         raise HTTPException(status_code=403, detail="Not authorized")
     
-    rental = crud.update_rental(db, rental_id, rental_update, current_user.id)
+    user_id = None if current_user.role == models.UserRoleEnum.admin else current_user.id
+    rental = crud.update_rental(db, rental_id, rental_update, user_id)
     if not rental:
         raise HTTPException(status_code=404, detail="Rental not found or not authorized")
     return rental
@@ -82,10 +141,39 @@ def delete_rental(
     if current_user.role not in [models.UserRoleEnum.renter, models.UserRoleEnum.admin]:
         raise HTTPException(status_code=403, detail="Not authorized")
     
-    if not crud.delete_rental(db, rental_id, current_user.id):
+    user_id = None if current_user.role == models.UserRoleEnum.admin else current_user.id
+    if not crud.delete_rental(db, rental_id, user_id):
         raise HTTPException(status_code=404, detail="Rental not found or not authorized")
     return None
 
+# "3 günlüğüne 7 kişilik bir araç en erken ne zaman boş?" sorusu, pencere pencere aramadan
+@router.get("/available/slots", response_model=List[schemas.FreeSlotOut])
+def find_free_slots(
+    duration_hours: float = Query(..., gt=0, le=MAX_SLOT_HORIZON_DAYS * 24),
+    start_date: Optional[datetime] = Query(None, description="Default: now"),
+    horizon_days: int = Query(30, ge=1, le=MAX_SLOT_HORIZON_DAYS),
+    min_seats: Optional[int] = Query(None, ge=1),
+    min_luggage: Optional[int] = Query(None, ge=0),
+    brand: Optional[str] = None,
+    limit: int = Query(10, ge=1, le=MAX_SLOTS_PER_REQUEST),
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(auth.get_current_user)
+):
+    if current_user.role not in [models.UserRoleEnum.renter, models.UserRoleEnum.admin]:
+        raise HTTPException(status_code=403, detail="Not authorized")
+    
+    start = schemas.ensure_aware_utc(start_date) if start_date else datetime.now(timezone.utc)
+    return crud.find_free_slots(
+        db,
+        duration=timedelta(hours=duration_hours),
+        start_date=start,
+        horizon_end=start + timedelta(days=horizon_days),
+        limit=limit,
+        min_seats=min_seats,
+        min_luggage=min_luggage,
+        brand=brand
+    )
+
 @router.get("/available/vehicles", response_model=List[schemas.VehicleOut])
 def get_available_vehicles(
     start_date: str = Query(..., description="Format: YYYY-MM-DD HH:MM"),
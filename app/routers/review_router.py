@@ -1,6 +1,7 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi.responses import JSONResponse
 from sqlalchemy.orm import Session
-from app import schemas, crud, models, auth
+from app import schemas, crud, models, auth, fieldsets, writer
 from app.database import get_db
 from typing import List, Optional
 
@@ -12,23 +13,47 @@ def create_review(
     db: Session = Depends(get_db),
     current_user: models.User = Depends(auth.get_current_user)
 ):
-    return crud.create_review(db, review, current_user.id)
+    user_id = current_user.id
+    return writer.run(db, lambda session: crud.create_review(session, review, user_id))
 
-@router.get("/", response_model=List[schemas.ReviewOut])
+MAX_SEARCH_RESULTS = 200
+
+@router.get("/", response_model=List[schemas.ReviewSearchOut], response_model_exclude_unset=True)
 def read_reviews(
     vehicle_id: Optional[int] = Query(None),
     ride_id: Optional[int] = Query(None),
     renter_id: Optional[int] = Query(None),
     review_type: Optional[schemas.ReviewType] = Query(None),
+    q: Optional[str] = Query(None, min_length=1, max_length=200, description="Full-text search in comments"),
+    min_rating: Optional[int] = Query(None, ge=0, le=10),
+    max_rating: Optional[int] = Query(None, ge=0, le=10),
+    limit: Optional[int] = Query(None, ge=1, le=MAX_SEARCH_RESULTS, description="Defaults to 50 when q is given"),
+    offset: int = Query(0, ge=0),
+    fields: Optional[str] = Query(None, description="Comma separated fields to return"),
+    include: Optional[str] = Query(None, description="Comma separated related resources to embed"),
     db: Session = Depends(get_db)
 ):
-    return crud.search_reviews(
+    if min_rating is not None and max_rating is not None and min_rating > max_rating:
+        raise HTTPException(status_code=400, detail="min_rating must not exceed max_rating")
+    
+    fieldset = fieldsets.parse("review", fields, include)
+    reviews = crud.search_reviews(
         db,
         vehicle_id=vehicle_id,
         ride_id=ride_id,
         renter_id=renter_id,
-        review_type=review_type
+        review_type=review_type,
+        options=fieldsets.query_options(fieldset),
+        q=q,
+        min_rating=min_rating,
+        max_rating=max_rating,
+        limit=limit or (50 if q is not None else None),
+        offset=offset
     )
+    
+    if fieldset:
+        return JSONResponse(fieldsets.serialize(fieldset, reviews))
+    return reviews
 
 @router.put("/{review_id}", response_model=schemas.ReviewOut)
 def update_review(
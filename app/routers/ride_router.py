@@ -1,6 +1,8 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi.responses import JSONResponse
 from sqlalchemy.orm import Session
-from app import schemas, crud, models, auth
+from app import schemas, crud, models, auth, fieldsets, writer
+from app.config import settings
 from app.database import get_db
 from typing import List, Optional
 from datetime import datetime
@@ -17,7 +19,8 @@ def create_ride(
         raise HTTPException(status_code=403, detail="Only renters can create rides")
     
     try:
-        return crud.create_ride(db, ride, current_user.id)
+        user_id = current_user.id
+        return writer.run(db, lambda session: crud.create_ride(session, ride, user_id))
     except HTTPException as e:
         raise e
     except Exception as e:
@@ -25,15 +28,30 @@ def create_ride(
 
 @router.get("/", response_model=List[schemas.RideOut])
 def read_rides(
+    fields: Optional[str] = Query(None, description="Comma separated fields to return"),
+    include: Optional[str] = Query(None, description="Comma separated related resources to embed"),
+    include_archived: bool = Query(False, description="Also return archived (finished) rides; admins and renters only"),
+    limit: Optional[int] = Query(None, ge=1, le=settings.LIST_MAX_PAGE_SIZE),
+    offset: int = Query(0, ge=0),
     db: Session = Depends(get_db),
     current_user: models.User = Depends(auth.get_current_user)
 ):
+    fieldset = fieldsets.parse("ride", fields, include)
+    if include_archived and fieldset and fieldset.include:
+        raise HTTPException(status_code=400, detail="include is not supported with include_archived")
+    options = fieldsets.query_options(fieldset)
     if current_user.role == models.UserRoleEnum.admin:
-        return crud.get_all_rides(db)
+        rides = crud.get_all_rides(db, options=options, include_archived=include_archived, limit=limit, offset=offset)
     elif current_user.role == models.UserRoleEnum.renter:
-        return [r for r in crud.get_all_rides(db) if r.renter_id == current_user.id]
+        rides = crud.get_all_rides(
+            db, options=options, renter_id=current_user.id, include_archived=include_archived, limit=limit, offset=offset
+        )
     else:
-        return crud.get_available_rides(db)
+        rides = crud.get_available_rides(db, options=options, limit=limit, offset=offset)
+    
+    if fieldset:
+        return JSONResponse(fieldsets.serialize(fieldset, rides))
+    return rides
 
 @router.get("/{ride_id}", response_model=schemas.RideOut)
 def read_ride(
@@ -61,9 +79,10 @@ def update_ride(
     if current_user.role not in [models.UserRoleEnum.renter, models.UserRoleEnum.admin]:
         raise HTTPException(status_code=403, detail="Not authorized")
     
-    ride = crud.update_ride(db, ride_id, ride_update)
+    renter_id = None if current_user.role == models.UserRoleEnum.admin else current_user.id
+    ride = crud.update_ride(db, ride_id, ride_update, renter_id)
     if not ride:
-        raise HTTPException(status_code=404, detail="Ride not found")
+        raise HTTPException(status_code=404, detail="Ride not found or not authorized")
     return ride
 
 @router.delete("/{ride_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -75,8 +94,9 @@ def delete_ride(
     if current_user.role not in [models.UserRoleEnum.renter, models.UserRoleEnum.admin]:
         raise HTTPException(status_code=403, detail="Not authorized")
     
-    if not crud.delete_ride(db, ride_id):
-        raise HTTPException(status_code=404, detail="Ride not found")
+    renter_id = None if current_user.role == models.UserRoleEnum.admin else current_user.id
+    if not crud.delete_ride(db, ride_id, renter_id):
+        raise HTTPException(status_code=404, detail="Ride not found or not authorized")
     return None
 
 @router.get("/search/available", response_model=List[schemas.RideOut])
@@ -84,15 +104,45 @@ def search_available_rides(
     start_location: Optional[str] = Query(None),
     end_location: Optional[str] = Query(None),
     min_seats: Optional[int] = Query(None, ge=1),
+    depart_after: Optional[datetime] = Query(None),
+    depart_before: Optional[datetime] = Query(None),
     db: Session = Depends(get_db)
 ):
-    rides = crud.get_available_rides(db)
+    rides = crud.get_available_rides(
+        db,
+        depart_after=depart_after,
+        depart_before=depart_before,
+        min_seats=min_seats or 1
+    )
     
     if start_location:
         rides = [r for r in rides if start_location.lower() in r.start_location.lower()]
     if end_location:
         rides = [r for r in rides if end_location.lower() in r.end_location.lower()]
-    if min_seats:
-        rides = [r for r in rides if r.available_seats >= min_seats]
     
-    return rides
\ No newline at end of file
+    return rides
+
+@router.get("/search/nearby", response_model=List[schemas.RideNearbyOut])
+def search_rides_nearby(
+    lat: float = Query(..., ge=-90, le=90),
+    lon: float = Query(..., ge=-180, le=180),
+    radius_km: float = Query(5.0, gt=0, le=500),
+    point: str = Query("start", pattern="^(start|end)$"),
+    limit: int = Query(50, ge=1, le=500),
+    db: Session = Depends(get_db)
+):
+    return crud.search_rides_near(db, lat, lon, radius_km, point=point, limit=limit)
+
+@router.get("/search/bbox", response_model=List[schemas.RideNearbyOut])
+def search_rides_in_bbox(
+    min_lat: float = Query(..., ge=-90, le=90),
+    min_lon: float = Query(..., ge=-180, le=180),
+    max_lat: float = Query(..., ge=-90, le=90),
+    max_lon: float = Query(..., ge=-180, le=180),
+    point: str = Query("start", pattern="^(start|end)$"),
+    limit: int = Query(50, ge=1, le=500),
+    db: Session = Depends(get_db)
+):
+    if min_lat > max_lat or min_lon > max_lon:
+        raise HTTPException(status_code=400, detail="Invalid bounding box")
+    return crud.search_rides_in_bbox(db, min_lat, min_lon, max_lat, max_lon, point=point, limit=limit)
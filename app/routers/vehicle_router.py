@@ -1,8 +1,16 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi.responses import JSONResponse
 from sqlalchemy.orm import Session
 from app import schemas, crud, models, auth
+from app.config import settings
 from app.database import get_db
 from typing import List, Optional
+from datetime import datetime, timezone
+from app import occupancy, fieldsets
+
+# Takvim isteği başına sınırlar
+MAX_CALENDAR_VEHICLES = 100
+MAX_CALENDAR_SLOTS = {"hour": 24 * 93, "day": 366}
 
 router = APIRouter(prefix="/vehicles", tags=["Vehicles"])
 
@@ -18,15 +26,81 @@ def create_vehicle(
 
 @router.get("/", response_model=List[schemas.VehicleOut])
 def read_vehicles(
+    fields: Optional[str] = Query(None, description="Comma separated fields to return"),
+    include: Optional[str] = Query(None, description="Comma separated related resources to embed"),
+    limit: Optional[int] = Query(None, ge=1, le=settings.LIST_MAX_PAGE_SIZE),
+    offset: int = Query(0, ge=0),
     db: Session = Depends(get_db),
     current_user: models.User = Depends(auth.get_current_user)
 ):
+    fieldset = fieldsets.parse("vehicle", fields, include)
+    options = fieldsets.query_options(fieldset)
     if current_user.role == models.UserRoleEnum.admin:
-        return crud.get_all_vehicles(db)
+        vehicles = crud.get_all_vehicles(db, options=options, limit=limit, offset=offset)
     elif current_user.role == models.UserRoleEnum.owner:
-        return [v for v in crud.get_all_vehicles(db) if v.owner_id == current_user.id]
+        vehicles = crud.get_vehicles_for_owner(db, current_user.id, options=options, limit=limit, offset=offset)
     else:
-        return crud.get_all_available_vehicles(db)
+        vehicles = crud.get_all_available_vehicles(db, options=options, limit=limit, offset=offset)
+    
+    if fieldset:
+        return JSONResponse(fieldsets.serialize(fieldset, vehicles))
+    return vehicles
+
+@router.get("/dashboard", response_model=schemas.OwnerDashboardOut)
+def read_owner_dashboard(
+    upcoming_limit: int = Query(20, ge=0, le=settings.LIST_MAX_PAGE_SIZE),
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(auth.get_current_user)
+):
+    if current_user.role != models.UserRoleEnum.owner:
+        raise HTTPException(status_code=403, detail="Only owners have a dashboard")
+    return crud.get_owner_dashboard(db, current_user.id, upcoming_limit)
+
+# Bakım kapamaları: kapalı aralıklarda araç kiralanamaz, müsaitlik ve slot aramalarında dolu sayılır
+@router.post("/blackouts", response_model=schemas.BlackoutBulkOut, status_code=status.HTTP_201_CREATED)
+def create_blackouts(
+    batch: schemas.BlackoutBulkCreate,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(auth.get_current_user)
+):
+    if current_user.role not in [models.UserRoleEnum.owner, models.UserRoleEnum.admin]:
+        raise HTTPException(status_code=403, detail="Only owners can schedule maintenance")
+    
+    if any(window.start_date >= window.end_date for window in batch.windows):
+        raise HTTPException(status_code=400, detail="End date must be after start date")
+    
+    owner_id = None if current_user.role == models.UserRoleEnum.admin else current_user.id
+    return crud.create_blackouts(db, batch, current_user.id, owner_id)
+
+@router.get("/blackouts", response_model=List[schemas.BlackoutOut])
+def read_blackouts(
+    vehicle_id: Optional[int] = Query(None),
+    include_past: bool = Query(False),
+    limit: Optional[int] = Query(None, ge=1, le=settings.LIST_MAX_PAGE_SIZE),
+    offset: int = Query(0, ge=0),
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(auth.get_current_user)
+):
+    if current_user.role not in [models.UserRoleEnum.owner, models.UserRoleEnum.admin]:
+        raise HTTPException(status_code=403, detail="Not authorized")
+    
+    owner_id = None if current_user.role == models.UserRoleEnum.admin else current_user.id
+    ending_after = None if include_past else datetime.now(timezone.utc)
+    return crud.get_blackouts(db, owner_id, vehicle_id=vehicle_id, ending_after=ending_after, limit=limit, offset=offset)
+
+@router.delete("/blackouts/{blackout_id}", status_code=status.HTTP_204_NO_CONTENT)
+def delete_blackout(
+    blackout_id: int,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(auth.get_current_user)
+):
+    if current_user.role not in [models.UserRoleEnum.owner, models.UserRoleEnum.admin]:
+        raise HTTPException(status_code=403, detail="Not authorized")
+    
+    owner_id = None if current_user.role == models.UserRoleEnum.admin else current_user.id
+    if not crud.delete_blackout(db, blackout_id, owner_id):
+        raise HTTPException(status_code=404, detail="Blackout not found or not authorized")
+    return None
 
 @router.get("/{vehicle_id}", response_model=schemas.VehicleOut)
 def read_vehicle(
@@ -83,15 +157,57 @@ def search_available_vehicles(
     min_luggage: Optional[int] = Query(None, ge=0),
     db: Session = Depends(get_db)
 ):
-    vehicles = crud.get_all_available_vehicles(db)
+    return crud.search_available_vehicles(
+        db,
+        brand=brand,
+        model=model,
+        min_seats=min_seats,
+        min_luggage=min_luggage
+    )
+
+@router.get("/availability/calendar", response_model=schemas.AvailabilityCalendarOut, response_model_exclude_none=True)
+def read_availability_calendar(
+    vehicle_ids: List[int] = Query(...),
+    start_date: datetime = Query(...),
+    end_date: datetime = Query(...),
+    granularity: str = Query("day", pattern="^(hour|day)$"),
+    encoding: str = Query("rle", pattern="^(rle|bitmap)$"),
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(auth.get_current_user)
+):
+    start_date = schemas.ensure_aware_utc(start_date)
+    end_date = schemas.ensure_aware_utc(end_date)
+    if start_date >= end_date:
+        raise HTTPException(status_code=400, detail="End date must be after start date")
+    
+    vehicle_ids = list(dict.fromkeys(vehicle_ids))
+    if len(vehicle_ids) > MAX_CALENDAR_VEHICLES:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_CALENDAR_VEHICLES} vehicles per request")
+    
+    slots = occupancy.slot_count(start_date, end_date, granularity)
+    if slots > MAX_CALENDAR_SLOTS[granularity]:
+        raise HTTPException(status_code=400, detail=f"Range too large for {granularity} granularity")
+    
+    missing = set(vehicle_ids) - crud.get_existing_vehicle_ids(db, vehicle_ids)
+    if missing:
+        raise HTTPException(status_code=404, detail=f"Vehicles not found: {sorted(missing)}")
     
-    if brand:
-        vehicles = [v for v in vehicles if brand.lower() in v.brand.lower()]
-    if model:
-        vehicles = [v for v in vehicles if model.lower() in v.model.lower()]
-    if min_seats:
-        vehicles = [v for v in vehicles if v.seats >= min_seats]
-    if min_luggage:
-        vehicles = [v for v in vehicles if v.luggage and v.luggage >= min_luggage]
+    intervals = crud.get_busy_intervals(db, vehicle_ids, start_date, end_date)
+    matrix = occupancy.occupancy_matrix(vehicle_ids, intervals, start_date, end_date, granularity)
+    vehicles = []
+    for vehicle_id, row in zip(vehicle_ids, matrix):
+        entry = {"vehicle_id": vehicle_id, "occupied_slots": int(row.sum())}
+        if encoding == "bitmap":
+            entry["bitmap"] = occupancy.encode_bitmap(row)
+        else:
+            entry["runs"] = occupancy.encode_runs(row)
+        vehicles.append(entry)
     
-    return vehicles
\ No newline at end of file
+    return {
+        "start_date": start_date,
+        "end_date": end_date,
+        "granularity": granularity,
+        "encoding": encoding,
+        "slots": slots,
+        "vehicles": vehicles
+    }
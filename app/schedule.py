@@ -0,0 +1,36 @@
+import bisect
+from datetime import datetime
+from itertools import accumulate
+from typing import Iterable, List, Optional, Tuple
+
+# Bir yolcunun katıldığı yolculukların başlangıca göre sıralı listesi.
+# max_ends[i] = ends[0..i] içindeki en geç bitiş (azalmayan); çakışan kayıtlar olsa bile
+# çakışma kontrolü iki bisect ile O(log n) yapılır.
+class PassengerSchedule:
+    def __init__(self, intervals: Iterable[Tuple[int, datetime, datetime]] = ()):
+        ordered = sorted(intervals, key=lambda item: item[1])
+        self.ride_ids: List[int] = [item[0] for item in ordered]
+        self.starts: List[datetime] = [item[1] for item in ordered]
+        self.ends: List[datetime] = [item[2] for item in ordered]
+        self.max_ends: List[datetime] = list(accumulate(self.ends, max))
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    # [start, end) ile çakışan en erken başlayan yolculuğun id'sini döner
+    def find_conflict(self, start: datetime, end: datetime) -> Optional[int]:
+        # Adaylar start'ı end'den önce olanlar; aralarında bitişi start'tan sonra olan ilk kayıt,
+        # max_ends'in start'ı ilk aştığı yerdir (orada max_ends[i] == ends[i])
+        index = bisect.bisect_left(self.starts, end)
+        first = bisect.bisect_right(self.max_ends, start, 0, index)
+        return self.ride_ids[first] if first < index else None
+
+    def add(self, start: datetime, end: datetime, ride_id: int) -> None:
+        index = bisect.bisect_right(self.starts, start)
+        self.starts.insert(index, start)
+        self.ends.insert(index, end)
+        self.ride_ids.insert(index, ride_id)
+        self.max_ends.insert(index, max(self.max_ends[index - 1], end) if index else end)
+        # Sonraki maksimumlardan yalnızca end'den küçük olanlar değişir; azalmayan dizide bunlar bitişiktir
+        stop = bisect.bisect_left(self.max_ends, end, index + 1)
+        self.max_ends[index + 1:stop] = [end] * (stop - index - 1)
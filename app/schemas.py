@@ -1,5 +1,5 @@
 from pydantic import BaseModel, EmailStr, Field, validator
-from typing import Optional
+from typing import Dict, List, Optional
 from datetime import datetime, timezone
 from enum import Enum
 from app import models
@@ -12,9 +12,10 @@ def ensure_aware_utc(dt: datetime) -> datetime:
 def parse_and_ensure_utc(value):
     if isinstance(value, str):
         value = datetime.fromisoformat(value)
-    if value.tzinfo is None:
-        value = value.replace(tzinfo=timezone.utc)
-    return value
+    return ensure_aware_utc(value)
+
+def parse_optional_and_ensure_utc(value):
+    return None if value is None else parse_and_ensure_utc(value)
 
 class PublicUserRoleEnum(str, Enum):
     owner = "owner"
@@ -42,6 +43,14 @@ class UserOut(BaseModel):
     class Config:
         from_attributes = True
 
+class UserPublicOut(BaseModel):
+    id: int
+    username: str
+    role: UserRoleEnum
+
+    class Config:
+        from_attributes = True
+
 class UserUpdate(BaseModel):
     username: Optional[str] = Field(None, min_length=3, max_length=50)
     email: Optional[EmailStr] = None
@@ -50,6 +59,13 @@ class UserUpdate(BaseModel):
 class Token(BaseModel):
     access_token: str
     token_type: str
+    refresh_token: Optional[str] = None
+
+class RefreshRequest(BaseModel):
+    refresh_token: str
+
+class LogoutRequest(BaseModel):
+    refresh_token: Optional[str] = None
 
 class VehicleBase(BaseModel):
     brand: str = Field(..., min_length=2, max_length=50)
@@ -57,22 +73,54 @@ class VehicleBase(BaseModel):
     license_plate: str = Field(..., min_length=4, max_length=15)
     seats: int = Field(..., gt=0)
     luggage: Optional[int] = Field(None, ge=0)
+    daily_rate: Optional[float] = Field(None, ge=0)
 
 class VehicleCreate(VehicleBase):
     pass
 
 class VehicleOut(VehicleBase):
     id: int
-    owner_id: int
+    # Sahip silinince NULL olur
+    owner_id: Optional[int] = None
     available: bool
 
     class Config:
         from_attributes = True
 
+class VehicleSummaryOut(VehicleOut):
+    rating_average: Optional[float] = None
+    rating_count: int = 0
+    upcoming_rentals: int = 0
+    next_rental_start: Optional[datetime] = None
+    upcoming_revenue: float = 0.0
+
+    _normalize_next_rental_start = validator("next_rental_start", allow_reuse=True)(parse_optional_and_ensure_utc)
+
+class RatingSummaryOut(BaseModel):
+    count: int
+    average: Optional[float] = None
+    # rating_category -> yorum sayısı
+    by_category: Dict[str, int]
+
+class VehicleCalendarOut(BaseModel):
+    vehicle_id: int
+    occupied_slots: int
+    runs: Optional[List[List[int]]] = None
+    bitmap: Optional[str] = None
+
+class AvailabilityCalendarOut(BaseModel):
+    start_date: datetime
+    end_date: datetime
+    granularity: str
+    encoding: str
+    slots: int
+    vehicles: List[VehicleCalendarOut]
+
 class RentalBase(BaseModel):
     vehicle_id: int
     start_date: datetime
     end_date: datetime
+    # Sunucu tarafında hesaplanır; istemcinin gönderdiği değer dikkate alınmaz
     total_price: Optional[float] = Field(None, ge=0)
 
     _normalize_start_date = validator("start_date", allow_reuse=True)(parse_and_ensure_utc)
@@ -81,19 +129,114 @@ class RentalBase(BaseModel):
 class RentalCreate(RentalBase):
     pass
 
+class QuoteWindow(BaseModel):
+    start_date: datetime
+    end_date: datetime
+
+    _normalize_start_date = validator("start_date", allow_reuse=True)(parse_and_ensure_utc)
+    _normalize_end_date = validator("end_date", allow_reuse=True)(parse_and_ensure_utc)
+
+class RentalQuoteRequest(BaseModel):
+    vehicle_ids: List[int] = Field(..., min_length=1, max_length=1000)
+    windows: List[QuoteWindow] = Field(..., min_length=1, max_length=1000)
+
+# prices[i][j] = vehicle_ids[i] aracının windows[j] penceresi için fiyatı
+class RentalQuoteOut(BaseModel):
+    vehicle_ids: List[int]
+    windows: List[QuoteWindow]
+    prices: List[List[float]]
+
 class RentalOut(RentalBase):
     id: int
-    user_id: int
+    user_id: Optional[int] = None
 
     class Config:
         from_attributes = True
 
+class BlackoutWindow(BaseModel):
+    start_date: datetime
+    end_date: datetime
+    reason: Optional[str] = Field(None, max_length=200)
+
+    _normalize_start_date = validator("start_date", allow_reuse=True)(parse_and_ensure_utc)
+    _normalize_end_date = validator("end_date", allow_reuse=True)(parse_and_ensure_utc)
+
+# vehicle_ids verilmezse sahibin bütün araçlarına (admin için tüm filoya) uygulanır
+class BlackoutBulkCreate(BaseModel):
+    vehicle_ids: Optional[List[int]] = Field(None, min_length=1, max_length=1000)
+    windows: List[BlackoutWindow] = Field(..., min_length=1, max_length=100)
+
+class BlackoutOut(BaseModel):
+    id: int
+    vehicle_id: int
+    start_date: datetime
+    end_date: datetime
+    reason: Optional[str] = None
+
+    _normalize_start_date = validator("start_date", allow_reuse=True)(parse_and_ensure_utc)
+    _normalize_end_date = validator("end_date", allow_reuse=True)(parse_and_ensure_utc)
+
+    class Config:
+        from_attributes = True
+
+# Kapamayla çakışan mevcut kiralama; kapama yine de oluşturulur, sahibin müşteriyle ilgilenmesi gerekir
+class BlackoutConflict(BaseModel):
+    vehicle_id: int
+    rental_id: int
+    start_date: datetime
+    end_date: datetime
+
+    _normalize_start_date = validator("start_date", allow_reuse=True)(parse_and_ensure_utc)
+    _normalize_end_date = validator("end_date", allow_reuse=True)(parse_and_ensure_utc)
+
+class BlackoutBulkOut(BaseModel):
+    created: int
+    vehicle_ids: List[int]
+    conflicts: List[BlackoutConflict]
+
+# free_until: boşluğun bittiği an; kiralama bu ana kadar uzatılabilir
+class FreeSlotOut(BaseModel):
+    vehicle_id: int
+    start_date: datetime
+    end_date: datetime
+    free_until: datetime
+
+class FleetBookingCreate(BaseModel):
+    vehicle_ids: List[int] = Field(..., min_length=1, max_length=50)
+    start_date: datetime
+    end_date: datetime
+    # Dolu araçların yerine en az aynı koltuk/bagaj kapasitesindeki boş araçlar kullanılsın mı
+    substitute: bool = False
+
+    _normalize_start_date = validator("start_date", allow_reuse=True)(parse_and_ensure_utc)
+    _normalize_end_date = validator("end_date", allow_reuse=True)(parse_and_ensure_utc)
+
+class FleetSubstitution(BaseModel):
+    requested_vehicle_id: int
+    vehicle_id: int
+
+class FleetBookingOut(BaseModel):
+    rentals: List[RentalOut]
+    substitutions: List[FleetSubstitution]
+    total_price: float
+
+class OwnerDashboardOut(BaseModel):
+    vehicles: List[VehicleSummaryOut]
+    # Devam eden ya da başlayacak kiralamalar, başlangıç sırasında
+    upcoming_rentals: List[RentalOut]
+    ratings: RatingSummaryOut
+    upcoming_revenue: float
+
 class RideBase(BaseModel):
     start_date: datetime
     end_date: datetime
     start_location: str = Field(..., min_length=2, max_length=100)
     end_location: str = Field(..., min_length=2, max_length=100)
     available_seats: int = Field(..., ge=0)
+    start_lat: Optional[float] = Field(None, ge=-90, le=90)
+    start_lon: Optional[float] = Field(None, ge=-180, le=180)
+    end_lat: Optional[float] = Field(None, ge=-90, le=90)
+    end_lon: Optional[float] = Field(None, ge=-180, le=180)
 
     _normalize_start_date = validator("start_date", allow_reuse=True)(parse_and_ensure_utc)
     _normalize_end_date = validator("end_date", allow_reuse=True)(parse_and_ensure_utc)
@@ -103,18 +246,26 @@ class RideCreate(RideBase):
 
 class RideOut(RideBase):
     id: int
-    rental_id: int
-    renter_id: int
+    # Kiralama ya da kiracı silinince NULL olur
+    rental_id: Optional[int] = None
+    renter_id: Optional[int] = None
 
     class Config:
         from_attributes = True
 
+class RideNearbyOut(RideOut):
+    distance_km: float
+
 class RideUpdate(BaseModel):
     start_date: Optional[datetime] = None
     end_date: Optional[datetime] = None
     start_location: Optional[str] = Field(None, min_length=2, max_length=100)
     end_location: Optional[str] = Field(None, min_length=2, max_length=100)
     available_seats: Optional[int] = Field(None, ge=0)
+    start_lat: Optional[float] = Field(None, ge=-90, le=90)
+    start_lon: Optional[float] = Field(None, ge=-180, le=180)
+    end_lat: Optional[float] = Field(None, ge=-90, le=90)
+    end_lon: Optional[float] = Field(None, ge=-180, le=180)
 
     _normalize_start_date = validator("start_date", allow_reuse=True)(parse_and_ensure_utc)
     _normalize_end_date = validator("end_date", allow_reuse=True)(parse_and_ensure_utc)
@@ -126,6 +277,9 @@ class RideParticipantBase(BaseModel):
 class RideParticipantCreate(RideParticipantBase):
     pass
 
+class RideBatchJoin(BaseModel):
+    ride_ids: List[int] = Field(..., min_length=1, max_length=20)
+
 class RideParticipantOut(RideParticipantBase):
     id: int
     user_id: int
@@ -162,3 +316,21 @@ class ReviewOut(ReviewBase):
 
     class Config:
         from_attributes = True
+
+# q= ile aramada doldurulur: score büyük = daha alakalı, snippet eşleşen kelimeler [ ] içinde
+class ReviewSearchOut(ReviewOut):
+    score: Optional[float] = None
+    snippet: Optional[str] = None
+
+class ChangeOut(BaseModel):
+    seq: int
+    entity: str
+    id: int
+    op: str
+    # upsert için varlığın güncel hali (VehicleOut / RentalOut / RideOut), delete için None
+    data: Optional[dict] = None
+
+class ChangeFeedOut(BaseModel):
+    changes: List[ChangeOut]
+    next_since: int
+    has_more: bool
@@ -0,0 +1,235 @@
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import CancelledError, Future, TimeoutError as FutureTimeoutError
+from typing import Callable, List, Optional, TypeVar
+from fastapi import HTTPException, status
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.database import engine as app_engine
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+WriteUnit = Callable[[Session], T]
+
+class WriterBusy(Exception):
+    pass
+
+# Grup içinde her istek kendi SAVEPOINT'inde çalışır. CRUD fonksiyonlarının commit() çağrısı yalnızca
+# flush eder, rollback() yalnızca isteğin kendi SAVEPOINT'ini geri alır; asıl commit grup sonunda tek sefer.
+class GroupSession(Session):
+    unit = None
+
+    def commit(self) -> None:
+        if self.unit is None:
+            super().commit()
+        else:
+            self.flush()
+
+    def rollback(self) -> None:
+        if self.unit is None:
+            super().rollback()
+        else:
+            self.unit.rollback()
+            self.info.clear()
+            self.unit = self.begin_nested()
+
+# pysqlite SAVEPOINT'leri kendi başlattığı transaction'larla bozar; transaction'ı biz açarız.
+# BEGIN IMMEDIATE: yazma kilidi grubun başında alınır, grup ortasında "database is locked" olmaz.
+def writer_engine(url) -> Engine:
+    engine = create_engine(url, connect_args={"check_same_thread": False})
+
+    @event.listens_for(engine, "connect")
+    def _connect(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+
+    @event.listens_for(engine, "begin")
+    def _begin(conn):
+        conn.exec_driver_sql("BEGIN IMMEDIATE")
+
+    return engine
+
+class _Unit:
+    __slots__ = ("fn", "future")
+
+    def __init__(self, fn: WriteUnit):
+        self.fn = fn
+        self.future: Future = Future()
+
+_STOP = object()
+
+# Yazma işlerini tek bir thread'de sıraya alıp gruplar halinde commit eder (group commit).
+# Her gruba tek BEGIN/COMMIT (tek fsync); başarısız istek yalnızca kendi SAVEPOINT'ini geri alır.
+class WriteCoordinator:
+    def __init__(self, engine: Engine, queue_size: int, max_batch: int, max_delay: float):
+        self.engine = engine
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self._queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self.groups = 0
+        self.committed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.largest_group = 0
+        self.group_failures = 0
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None
+
+    def start(self) -> None:
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="write-coordinator", daemon=True)
+                self._thread.start()
+
+    # Sıradaki işler bitirilir, sonra thread durur
+    def stop(self, timeout: Optional[float] = None) -> None:
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._queue.put(_STOP)
+            thread.join(timeout)
+
+    def submit(self, fn: WriteUnit) -> Future:
+        unit = _Unit(fn)
+        try:
+            self._queue.put_nowait(unit)
+        except queue.Full:
+            self.rejected += 1
+            raise WriterBusy("Write queue is full")
+        return unit.future
+
+    def execute(self, fn: WriteUnit, timeout: float) -> T:
+        future = self.submit(fn)
+        try:
+            return future.result(timeout)
+        except FutureTimeoutError:
+            # Henüz başlamadıysa iptal edilir; başladıysa grubun commit'i beklenir
+            if future.cancel():
+                raise WriterBusy("Write was not started in time")
+            return future.result()
+
+    def _next_batch(self) -> Optional[List[_Unit]]:
+        first = self._queue.get()
+        if first is _STOP:
+            return None
+        batch = [first]
+        deadline = time.monotonic() + self.max_delay
+        while len(batch) < self.max_batch:
+            try:
+                remaining = deadline - time.monotonic()
+                unit = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if unit is _STOP:
+                # Durdurma işareti geri konur; bu grup bitince döngü sonlanır
+                self._queue.put(_STOP)
+                break
+            batch.append(unit)
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+            try:
+                self.commit_group(batch)
+            except Exception:
+                logger.exception("Write group failed")
+
+    def commit_group(self, batch: List[_Unit]) -> None:
+        outcomes = []
+        staged: dict = {}
+        db = GroupSession(bind=self.engine, expire_on_commit=False)
+        try:
+            for unit in batch:
+                if not unit.future.set_running_or_notify_cancel():
+                    continue
+                db.unit = db.begin_nested()
+                try:
+                    result = unit.fn(db)
+                    db.flush()
+                except Exception as exc:
+                    db.unit.rollback()
+                    db.info.clear()
+                    outcomes.append((unit, None, exc))
+                    continue
+                # SAVEPOINT bırakılırken after_commit tetiklenir; commit sonrası yayınlar (SSE, iş kuyruğu)
+                # gerçek commit'e kadar session.info dışında tutulur
+                unit_info = dict(db.info)
+                db.info.clear()
+                db.unit.commit()
+                db.unit = None
+                for key, value in unit_info.items():
+                    if isinstance(value, list):
+                        staged.setdefault(key, []).extend(value)
+                    else:
+                        staged[key] = value
+                outcomes.append((unit, result, None))
+            db.unit = None
+            db.info.update(staged)
+            db.commit()
+        except Exception as exc:
+            db.unit = None
+            db.rollback()
+            self.group_failures += 1
+            # Grubun hiçbir yazısı kalıcı olmadı; henüz çalıştırılmamış işler de aynı hatayla döner
+            finished = {id(unit) for unit, _, _ in outcomes}
+            outcomes = [(unit, None, error or exc) for unit, _, error in outcomes] + [
+                (unit, None, exc) for unit in batch
+                if id(unit) not in finished and (unit.future.running() or unit.future.set_running_or_notify_cancel())
+            ]
+        finally:
+            db.close()
+
+        self.groups += 1
+        self.largest_group = max(self.largest_group, len(outcomes))
+        for unit, result, error in outcomes:
+            if error is None:
+                self.committed += 1
+                unit.future.set_result(result)
+            else:
+                self.failed += 1
+                unit.future.set_exception(error)
+
+    def stats(self) -> dict:
+        return {
+            "running": self.running,
+            "queued": self._queue.qsize(),
+            "groups": self.groups,
+            "committed": self.committed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            "group_failures": self.group_failures,
+            "largest_group": self.largest_group,
+            "average_group": round((self.committed + self.failed) / self.groups, 2) if self.groups else 0.0,
+        }
+
+coordinator = WriteCoordinator(
+    writer_engine(app_engine.url),
+    settings.WRITE_QUEUE_SIZE,
+    settings.WRITE_MAX_BATCH,
+    settings.WRITE_MAX_DELAY
+)
+
+# Koordinatör çalışıyorsa yazma işi onun thread'inde, değilse isteğin kendi session'ında yapılır.
+# İş, session dışına taşınabilir bir sonuç döndürmeli (kolonları yüklü nesne ya da şema).
+def run(db: Session, fn: WriteUnit) -> T:
+    if not coordinator.running:
+        return fn(db)
+    try:
+        return coordinator.execute(fn, settings.WRITE_TIMEOUT)
+    except (WriterBusy, CancelledError):
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Server is busy, please retry later",
+            headers={"Retry-After": "1"}
+        )
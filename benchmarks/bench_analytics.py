@@ -0,0 +1,66 @@
+# 1M kiralama üzerinde admin analitik sorgularının süresi
+# Kullanım: python -m benchmarks.bench_analytics [kiralama_sayısı]
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+os.environ.setdefault("SECRET_KEY", "bench")
+os.environ.setdefault("DATABASE_URL", "sqlite:///:memory:")
+os.environ.setdefault("ADMIN_PASSWORD", "bench")
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+from app import analytics, models
+
+def seed(session, rentals: int, vehicles: int = 2000, owners: int = 200):
+    rng = random.Random(7)
+    session.execute(insert(models.User), [
+        {"id": i, "username": f"user{i}", "email": f"user{i}@example.com", "hashed_password": "x",
+         "role": models.UserRoleEnum.owner}
+        for i in range(1, owners + 1)
+    ])
+    session.execute(insert(models.Vehicle), [
+        {"id": i, "brand": "Brand", "model": "Model", "license_plate": f"PL{i:06d}", "seats": rng.choice([2, 5, 7]),
+         "owner_id": rng.randint(1, owners), "available": True}
+        for i in range(1, vehicles + 1)
+    ])
+    base = datetime(2024, 1, 1)
+    batch = []
+    for i in range(rentals):
+        start = base + timedelta(hours=rng.randint(0, 24 * 365))
+        batch.append({"vehicle_id": rng.randint(1, vehicles), "user_id": 1, "start_date": start,
+                      "end_date": start + timedelta(hours=rng.randint(2, 24 * 10)), "total_price": rng.uniform(20, 900)})
+        if len(batch) == 50000:
+            session.execute(insert(models.Rental), batch)
+            batch = []
+    if batch:
+        session.execute(insert(models.Rental), batch)
+    session.commit()
+
+def timed(label, fn):
+    started = time.perf_counter()
+    fn()
+    print(f"{label:<28} {(time.perf_counter() - started) * 1000:9.1f} ms")
+
+def main():
+    rentals = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    path = os.path.join(tempfile.mkdtemp(), "analytics.db")
+    engine = create_engine(f"sqlite:///{path}")
+    models.Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+    print(f"seeding {rentals} rentals ...")
+    seed(session, rentals)
+
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    end = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    timed("utilization/vehicle/week", lambda: analytics.utilization(session, start, end, "week", "vehicle"))
+    timed("utilization/owner/month", lambda: analytics.utilization(session, start, end, "month", "owner"))
+    timed("revenue/owner/day", lambda: analytics.revenue(session, start, end, "day", "owner"))
+    timed("ride fill/week", lambda: analytics.ride_fill_rates(session, start, end, "week"))
+    timed("ratings", lambda: analytics.rating_distribution(session))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+# Eşzamanlı yazılar: istek başına commit ile tek yazıcı + group commit karşılaştırması
+# Kullanım: python -m benchmarks.bench_group_commit [thread_sayısı] [thread_başına_yazı]
+import os
+import sys
+import tempfile
+import threading
+import time
+
+os.environ.setdefault("SECRET_KEY", "bench")
+os.environ.setdefault("DATABASE_URL", "sqlite:///:memory:")
+os.environ.setdefault("ADMIN_PASSWORD", "bench")
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app import crud, models, schemas, writer
+
+def review(i):
+    return schemas.ReviewCreate(type=models.ReviewType.vehicle, rating=i % 11, comment=f"Review {i}", vehicle_id=1)
+
+def per_request(Session):
+    def write(i):
+        db = Session()
+        try:
+            crud.create_review(db, review(i), user_id=1)
+        finally:
+            db.close()
+    return write
+
+def grouped(coordinator):
+    return lambda i: coordinator.execute(lambda db: crud.create_review(db, review(i), user_id=1), timeout=60)
+
+def run(label, threads, writes, write):
+    latencies, errors = [], []
+    lock = threading.Lock()
+
+    def worker(n):
+        for i in range(writes):
+            started = time.perf_counter()
+            try:
+                write(n * writes + i)
+            except Exception as exc:
+                with lock:
+                    errors.append(exc)
+                continue
+            with lock:
+                latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    pool = [threading.Thread(target=worker, args=(n,)) for n in range(threads)]
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    ordered = sorted(latencies) or [0.0]
+    pick = lambda q: ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000
+    print(f"{label:<22} {len(latencies) / elapsed:8.0f} writes/s  p50 {pick(0.5):7.2f} ms  "
+          f"p95 {pick(0.95):7.2f} ms  p99 {pick(0.99):7.2f} ms  errors {len(errors)}")
+
+def main():
+    threads = int(sys.argv[1]) if len(sys.argv) > 1 else 32
+    writes = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    directory = tempfile.mkdtemp()
+
+    path = os.path.join(directory, "per_request.db")
+    engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False})
+    models.Base.metadata.create_all(bind=engine)
+    run("per-request commit", threads, writes, per_request(sessionmaker(bind=engine)))
+
+    path = os.path.join(directory, "grouped.db")
+    engine = writer.writer_engine(f"sqlite:///{path}")
+    models.Base.metadata.create_all(bind=engine)
+    coordinator = writer.WriteCoordinator(engine, queue_size=10_000, max_batch=64, max_delay=0.002)
+    coordinator.start()
+    try:
+        run("group commit", threads, writes, grouped(coordinator))
+    finally:
+        coordinator.stop()
+    stats = coordinator.stats()
+    print(f"groups {stats['groups']}, average size {stats['average_group']}, largest {stats['largest_group']}")
+
+if __name__ == "__main__":
+    main()
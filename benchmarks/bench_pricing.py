@@ -0,0 +1,42 @@
+# 10k fiyat teklifinin (100 araç x 100 pencere) vektörize ve tek tek hesaplanması
+# Kullanım: python -m benchmarks.bench_pricing
+import os
+import random
+import time
+from datetime import datetime, timedelta, timezone
+
+os.environ.setdefault("SECRET_KEY", "benchmark")
+os.environ.setdefault("DATABASE_URL", "sqlite:///./car_sharing.db")
+os.environ.setdefault("ADMIN_PASSWORD", "benchmark")
+
+from app import pricing
+
+VEHICLES = 100
+WINDOWS = 100
+ROUNDS = 20
+
+def main():
+    rng = random.Random(42)
+    base = datetime(2030, 1, 1, tzinfo=timezone.utc)
+    rates = [rng.choice([None, 40.0, 55.0, 80.0, 120.0]) for _ in range(VEHICLES)]
+    starts = [base + timedelta(hours=rng.randint(0, 24 * 90)) for _ in range(WINDOWS)]
+    ends = [s + timedelta(hours=rng.randint(4, 24 * 30)) for s in starts]
+    engine = pricing.engine
+
+    started = time.perf_counter()
+    for _ in range(ROUNDS):
+        matrix = engine.quote_matrix(engine.rates(rates), pricing.to_epoch_hours(starts), pricing.to_epoch_hours(ends))
+    vectorized = (time.perf_counter() - started) / ROUNDS
+
+    started = time.perf_counter()
+    scalar = [[engine.quote(rate, s, e) for s, e in zip(starts, ends)] for rate in rates]
+    looped = time.perf_counter() - started
+
+    assert matrix.tolist() == scalar
+    quotes = VEHICLES * WINDOWS
+    print(f"{quotes} quotes")
+    print(f"vectorized: {vectorized * 1000:8.2f} ms  ({quotes / vectorized:,.0f} quotes/s)")
+    print(f"per-quote:  {looped * 1000:8.2f} ms  ({quotes / looped:,.0f} quotes/s)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+# Yazma yolu: eski ORM akışı (SELECT, değiştir, commit, refresh) ile UPDATE/DELETE ... RETURNING karşılaştırması
+# Kullanım: python -m benchmarks.bench_writes [işlem_sayısı]
+import os
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("SECRET_KEY", "bench")
+os.environ.setdefault("DATABASE_URL", "sqlite:///:memory:")
+os.environ.setdefault("ADMIN_PASSWORD", "bench")
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+from app import crud, models, schemas
+
+VEHICLES = 2000
+
+def seed(session):
+    session.execute(insert(models.User), [
+        {"id": 1, "username": "owner", "email": "owner@example.com", "hashed_password": "x", "role": models.UserRoleEnum.owner}
+    ])
+    session.execute(insert(models.Vehicle), [
+        {"id": i, "brand": "Brand", "model": "Model", "license_plate": f"PL{i:06d}", "seats": 5, "owner_id": 1, "available": True}
+        for i in range(1, VEHICLES + 1)
+    ])
+    session.execute(insert(models.Review), [
+        {"id": i, "type": models.ReviewType.vehicle, "rating": 5, "rating_category": "Good", "user_id": 1, "vehicle_id": i}
+        for i in range(1, 2 * VEHICLES + 1)
+    ])
+    session.commit()
+
+# Önceki sürümün akışı (karşılaştırma için)
+def orm_update_vehicle(db, vehicle_id, vehicle_update, owner_id):
+    db_vehicle = db.query(models.Vehicle).filter(models.Vehicle.id == vehicle_id).first()
+    if not db_vehicle or db_vehicle.owner_id != owner_id:
+        return None
+    for key, value in vehicle_update.dict().items():
+        setattr(db_vehicle, key, value)
+    db.commit()
+    db.refresh(db_vehicle)
+    return schemas.VehicleOut.model_validate(db_vehicle)
+
+def orm_delete_review(db, review_id, user_id):
+    db_review = db.query(models.Review).filter(models.Review.id == review_id).first()
+    if not db_review or db_review.user_id != user_id:
+        return False
+    db.delete(db_review)
+    db.commit()
+    return True
+
+def run(label, Session, operations, fn):
+    started = time.perf_counter()
+    for i in range(operations):
+        # Her istek gibi kendi session'ı
+        db = Session()
+        try:
+            fn(db, i)
+        finally:
+            db.close()
+    elapsed = time.perf_counter() - started
+    print(f"{label:<28} {operations / elapsed:9.0f} writes/s")
+
+def main():
+    operations = int(sys.argv[1]) if len(sys.argv) > 1 else VEHICLES
+    path = os.path.join(tempfile.mkdtemp(), "writes.db")
+    engine = create_engine(f"sqlite:///{path}")
+    models.Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine)
+    seed(Session())
+
+    update = lambda i: schemas.VehicleCreate(brand="Brand", model=f"Model {i}", license_plate=f"PL{i % VEHICLES + 1:06d}", seats=5)
+    run("update_vehicle (ORM)", Session, operations,
+        lambda db, i: orm_update_vehicle(db, i % VEHICLES + 1, update(i), 1))
+    run("update_vehicle (RETURNING)", Session, operations,
+        lambda db, i: crud.update_vehicle(db, i % VEHICLES + 1, update(i), 1))
+    deletes = min(operations, VEHICLES)
+    run("delete_review (ORM)", Session, deletes, lambda db, i: orm_delete_review(db, i + 1, 1))
+    run("delete_review (RETURNING)", Session, deletes, lambda db, i: crud.delete_review(db, VEHICLES + i + 1, 1))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,363 @@
+# Kaydedilmiş trafiğin (app/capture.py) tohumlanmış yerel veritabanına karşı tekrar oynatılması ve
+# iki sürümün gecikme dağılımlarının karşılaştırılması.
+#
+#   python -m benchmarks.replay seed replay/car_sharing.db
+#   (her sürüm için: seed edilen dosyayı sunucunun çalışma dizinine car_sharing.db olarak kopyala, uvicorn'u başlat)
+#   python -m benchmarks.replay run traffic/capture.jsonl --manifest replay/car_sharing.json --out build-a.json
+#   python -m benchmarks.replay run traffic/capture.jsonl --manifest replay/car_sharing.json --out build-b.json \
+#       --base-url http://127.0.0.1:8001
+#   python -m benchmarks.replay compare build-a.json build-b.json
+#
+# --speed 1 kayıttaki zamanlamayı korur, 2 iki kat hızlı oynatır, 0 beklemeden gönderir.
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlencode
+
+os.environ.setdefault("SECRET_KEY", "replay")
+os.environ.setdefault("DATABASE_URL", "sqlite:///./car_sharing.db")
+os.environ.setdefault("ADMIN_PASSWORD", "replay")
+
+ROLES = ("admin", "owner", "renter", "passenger")
+PASSWORD = "replay-password"
+# Yol ve sorgu parametrelerindeki id'ler tohumlanmış tablo boyutuna göre eşlenir
+PATH_ENTITIES = {"vehicles": "vehicles", "rentals": "rentals", "rides": "rides", "reviews": "reviews", "users": "users"}
+QUERY_ENTITIES = {
+    "vehicle_id": "vehicles", "vehicle_ids": "vehicles", "rental_id": "rentals", "ride_id": "rides",
+    "ride_ids": "rides", "renter_id": "users", "user_id": "users",
+}
+
+def seed(args) -> None:
+    from sqlalchemy import create_engine, insert
+    from app import fulltext, models
+    from app.auth import get_password_hash
+
+    rng = random.Random(args.seed)
+    engine = create_engine(f"sqlite:///{args.database}")
+    models.Base.metadata.create_all(bind=engine)
+    fulltext.ensure_review_index(engine)
+    base = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+    hashed = get_password_hash(PASSWORD)
+
+    users, emails = [], {role: [] for role in ROLES}
+    for role in ROLES:
+        for i in range(args.users_per_role):
+            email = f"replay-{role}-{i}@example.com"
+            emails[role].append(email)
+            users.append({"id": len(users) + 1, "username": f"replay_{role}_{i}", "email": email,
+                          "hashed_password": hashed, "role": models.UserRoleEnum(role)})
+    by_role = {role: [u["id"] for u in users if u["role"].value == role] for role in ROLES}
+    vehicles = [
+        {"id": i, "brand": rng.choice(["VW", "Fiat", "Renault", "Toyota", "Ford"]), "model": "Model",
+         "license_plate": f"RP{i:06d}", "seats": rng.choice([2, 4, 5, 5, 7, 9]), "luggage": rng.randint(0, 5),
+         "daily_rate": rng.choice([None, 40.0, 55.0, 80.0]), "available": rng.random() > 0.05,
+         "owner_id": rng.choice(by_role["owner"])}
+        for i in range(1, args.vehicles + 1)
+    ]
+    rentals = []
+    for i in range(1, args.rentals + 1):
+        start = base + timedelta(hours=rng.randint(-24 * 30, 24 * 60))
+        rentals.append({"id": i, "vehicle_id": rng.randint(1, args.vehicles), "user_id": rng.choice(by_role["renter"]),
+                        "start_date": start, "end_date": start + timedelta(hours=rng.randint(4, 24 * 7)),
+                        "total_price": 100.0})
+    rides = []
+    for i in range(1, args.rides + 1):
+        rental = rentals[rng.randrange(len(rentals))]
+        rides.append({"id": i, "rental_id": rental["id"], "renter_id": rental["user_id"],
+                      "start_date": rental["start_date"], "end_date": rental["start_date"] + timedelta(hours=2),
+                      "start_location": rng.choice(["Ankara", "Istanbul", "Izmir"]),
+                      "end_location": rng.choice(["Konya", "Bursa", "Antalya"]), "available_seats": rng.randint(0, 4)})
+    reviews = [
+        {"id": i, "type": models.ReviewType.vehicle, "rating": rng.randint(0, 10), "rating_category": "Good",
+         "comment": rng.choice(["clean and fast", "late pickup", "great car", "noisy engine"]),
+         "user_id": rng.choice(by_role["renter"]), "vehicle_id": rng.randint(1, args.vehicles)}
+        for i in range(1, args.reviews + 1)
+    ]
+    with engine.begin() as conn:
+        for model, rows in ((models.User, users), (models.Vehicle, vehicles), (models.Rental, rentals),
+                            (models.Ride, rides), (models.Review, reviews)):
+            if rows:
+                conn.execute(insert(model), rows)
+
+    manifest = {
+        "database": os.path.abspath(args.database),
+        "seed": args.seed,
+        "base_time": base.isoformat(),
+        "password": PASSWORD,
+        "users": emails,
+        "counts": {"users": len(users), "vehicles": args.vehicles, "rentals": args.rentals,
+                   "rides": args.rides, "reviews": args.reviews},
+    }
+    path = args.manifest or os.path.splitext(args.database)[0] + ".json"
+    with open(path, "w") as f:
+        json.dump(manifest, f, indent=1)
+    print(f"seeded {args.database}; manifest {path}")
+
+def _remap(value: str, count: int) -> str:
+    return str((int(value) - 1) % count + 1) if value.isdigit() and count else value
+
+# Kayıt anındaki tarihler, tohum verisinin zamanına aynı uzaklıkta olacak şekilde kaydırılır
+def _shift(value: str, delta: timedelta) -> str:
+    try:
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return value
+    shifted = parsed + delta
+    if "T" in value:
+        return shifted.isoformat().replace("+00:00", "Z") if value.endswith("Z") else shifted.isoformat()
+    return shifted.strftime("%Y-%m-%d %H:%M" if len(value) <= 16 else "%Y-%m-%d %H:%M:%S")
+
+def _synthesize(shape, key: str, counts: dict, base: datetime):
+    if isinstance(shape, dict) and "list" in shape:
+        return [_synthesize(shape["item"], key, counts, base) for _ in range(shape["list"])]
+    if isinstance(shape, dict):
+        return {k: _synthesize(v, k, counts, base) for k, v in shape.items()}
+    if shape == "int":
+        entity = QUERY_ENTITIES.get(key)
+        return random.randint(1, counts[entity]) if entity else 1
+    if shape == "float":
+        return 0.0
+    if shape == "bool":
+        return True
+    if shape == "str":
+        if key.endswith("date"):
+            return (base + timedelta(days=random.randint(1, 30))).isoformat()
+        if key == "email":
+            return f"replay-{random.getrandbits(48):x}@example.com"
+        return "renter" if key == "role" else f"replay{random.getrandbits(32):x}"
+    return None
+
+class Replayer:
+    def __init__(self, base_url: str, manifest: dict, capture_start: float, include_writes: bool):
+        self.base_url = base_url.rstrip("/")
+        self.manifest = manifest
+        self.counts = manifest["counts"]
+        self.base = datetime.fromisoformat(manifest["base_time"])
+        self.delta = self.base - datetime.fromtimestamp(capture_start, timezone.utc)
+        self.include_writes = include_writes
+        self.identities: Dict[Tuple[str, str], str] = {}
+        self.tokens: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    # Kayıttaki her kullanıcı, aynı roldeki bir tohum kullanıcısına sabit olarak eşlenir
+    def identity(self, role: str, user: Optional[str]) -> Optional[str]:
+        if role not in ROLES:
+            return None
+        with self._lock:
+            key = (role, user or "")
+            if key not in self.identities:
+                pool = self.manifest["users"][role]
+                taken = sum(1 for r, _ in self.identities if r == role)
+                self.identities[key] = pool[taken % len(pool)]
+            return self.identities[key]
+
+    def login(self, email: str) -> str:
+        if email not in self.tokens:
+            status, body, _ = self.send("POST", "/token", form={"username": email, "password": self.manifest["password"]})
+            if status != 200:
+                raise RuntimeError(f"login failed for {email}: {status}")
+            self.tokens[email] = json.loads(body)["access_token"]
+        return self.tokens[email]
+
+    def send(self, method: str, path: str, query=(), form=None, payload=None, token=None):
+        url = self.base_url + path + (f"?{urlencode(query)}" if query else "")
+        headers, data = {}, None
+        if form is not None:
+            data = urlencode(form).encode()
+            headers["Content-Type"] = "application/x-www-form-urlencoded"
+        elif payload is not None:
+            data = json.dumps(payload).encode()
+            headers["Content-Type"] = "application/json"
+        if token:
+            headers["Authorization"] = f"Bearer {token}"
+        request = urllib.request.Request(url, data=data, headers=headers, method=method)
+        started = time.perf_counter()
+        try:
+            with urllib.request.urlopen(request, timeout=60) as response:
+                body, status = response.read(), response.status
+        except urllib.error.HTTPError as error:
+            body, status = error.read(), error.code
+        return status, body, time.perf_counter() - started
+
+    # None: oynatılmayan kayıt (gövde yapısından üretilemeyen yazma)
+    def prepare(self, entry: dict) -> Optional[dict]:
+        segments = entry["path"].split("/")
+        for i in range(1, len(segments)):
+            entity = PATH_ENTITIES.get(segments[i - 1])
+            if entity and segments[i].isdigit():
+                segments[i] = _remap(segments[i], self.counts[entity])
+        query = []
+        for key, value in entry["query"]:
+            entity = QUERY_ENTITIES.get(key)
+            query.append((key, _remap(value, self.counts[entity]) if entity else _shift(value, self.delta)))
+        email = self.identity(entry["role"], entry.get("user"))
+        request = {"method": entry["method"], "path": "/".join(segments), "query": query, "email": email}
+
+        body = entry.get("body")
+        if entry["path"] == "/token":
+            if email is None:
+                return None
+            request["form"] = {"username": email, "password": self.manifest["password"]}
+            request["email"] = None
+        elif body is not None:
+            if not self.include_writes or "form" in body or "bytes" in body:
+                return None
+            request["payload"] = _synthesize(body, "", self.counts, self.base)
+        return request
+
+    def execute(self, request: dict) -> Tuple[int, float]:
+        token = self.login(request["email"]) if request["email"] else None
+        status, _, elapsed = self.send(request["method"], request["path"], request["query"],
+                                       request.get("form"), request.get("payload"), token)
+        return status, elapsed
+
+def _load_capture(path: str, limit: Optional[int]) -> List[dict]:
+    with open(path) as f:
+        entries = [json.loads(line) for line in f if line.strip()]
+    entries.sort(key=lambda e: e["t"])
+    return entries[:limit] if limit else entries
+
+def _percentile(ordered: List[float], q: float) -> float:
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))] if ordered else 0.0
+
+def _summary(samples: List[list]) -> Dict[str, dict]:
+    routes: Dict[str, List[list]] = {}
+    for sample in samples:
+        routes.setdefault(sample[0], []).append(sample)
+    summary = {}
+    for route, rows in sorted(routes.items()):
+        ordered = sorted(row[2] for row in rows)
+        summary[route] = {
+            "count": len(rows),
+            "errors": sum(1 for row in rows if row[1] >= 500 or row[1] == 0),
+            "p50_ms": round(_percentile(ordered, 0.50), 3),
+            "p95_ms": round(_percentile(ordered, 0.95), 3),
+            "p99_ms": round(_percentile(ordered, 0.99), 3),
+        }
+    return summary
+
+def run(args) -> None:
+    with open(args.manifest) as f:
+        manifest = json.load(f)
+    entries = _load_capture(args.capture, args.limit)
+    if not entries:
+        sys.exit("capture is empty")
+    random.seed(manifest["seed"])
+    replayer = Replayer(args.base_url, manifest, entries[0]["t"], args.include_writes)
+    prepared = [(entry, replayer.prepare(entry)) for entry in entries]
+    skipped = sum(1 for _, request in prepared if request is None)
+    # Oturumlar önceden açılır; giriş süresi ölçüme karışmaz
+    for _, request in prepared:
+        if request and request["email"]:
+            replayer.login(request["email"])
+
+    samples: List[list] = []
+    lock = threading.Lock()
+
+    def fire(entry: dict, request: dict, due: float) -> None:
+        lag = time.perf_counter() - due
+        try:
+            status, elapsed = replayer.execute(request)
+        except (OSError, RuntimeError):
+            status, elapsed = 0, 0.0
+        with lock:
+            samples.append([f"{entry['method']} {entry['route']}", status, elapsed * 1000, lag * 1000])
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        for entry, request in prepared:
+            if request is None:
+                continue
+            due = started + ((entry["t"] - entries[0]["t"]) / args.speed if args.speed > 0 else 0.0)
+            delay = due - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            pool.submit(fire, entry, request, due)
+    elapsed = time.perf_counter() - started
+
+    summary = _summary(samples)
+    lags = sorted(sample[3] for sample in samples)
+    result = {
+        "meta": {"capture": os.path.abspath(args.capture), "base_url": args.base_url, "speed": args.speed,
+                 "requests": len(samples), "skipped": skipped, "seconds": round(elapsed, 3),
+                 "p95_schedule_lag_ms": round(_percentile(lags, 0.95), 3)},
+        "routes": summary,
+        "samples": samples,
+    }
+    with open(args.out, "w") as f:
+        json.dump(result, f)
+    print(f"{len(samples)} requests in {elapsed:.1f}s ({skipped} skipped), p95 schedule lag "
+          f"{result['meta']['p95_schedule_lag_ms']:.1f} ms -> {args.out}")
+    for route, stats in summary.items():
+        print(f"  {route:<48} n={stats['count']:<6} p50 {stats['p50_ms']:8.2f}  p95 {stats['p95_ms']:8.2f}  "
+              f"p99 {stats['p99_ms']:8.2f}  errors {stats['errors']}")
+
+def compare(args) -> None:
+    with open(args.baseline) as f:
+        baseline = json.load(f)["routes"]
+    with open(args.candidate) as f:
+        candidate = json.load(f)["routes"]
+    regressions = 0
+    print(f"{'route':<48} {'p50 a':>9} {'p50 b':>9} {'p95 a':>9} {'p95 b':>9} {'p99 a':>9} {'p99 b':>9}  p95 change")
+    for route in sorted(set(baseline) | set(candidate)):
+        a, b = baseline.get(route), candidate.get(route)
+        if a is None or b is None:
+            print(f"{route:<48} only in {'candidate' if a is None else 'baseline'}")
+            continue
+        change = (b["p95_ms"] - a["p95_ms"]) / a["p95_ms"] * 100 if a["p95_ms"] else 0.0
+        flag = ""
+        if change > args.threshold and min(a["count"], b["count"]) >= args.min_samples:
+            regressions += 1
+            flag = "  REGRESSION"
+        print(f"{route:<48} {a['p50_ms']:9.2f} {b['p50_ms']:9.2f} {a['p95_ms']:9.2f} {b['p95_ms']:9.2f} "
+              f"{a['p99_ms']:9.2f} {b['p99_ms']:9.2f}  {change:+7.1f}%{flag}")
+    if regressions:
+        sys.exit(f"{regressions} route(s) regressed by more than {args.threshold}% at p95")
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    p = commands.add_parser("seed", help="create a deterministic local database and manifest")
+    p.add_argument("database")
+    p.add_argument("--manifest")
+    p.add_argument("--seed", type=int, default=42)
+    p.add_argument("--users-per-role", type=int, default=20)
+    p.add_argument("--vehicles", type=int, default=2000)
+    p.add_argument("--rentals", type=int, default=10000)
+    p.add_argument("--rides", type=int, default=2000)
+    p.add_argument("--reviews", type=int, default=10000)
+    p.set_defaults(handler=seed)
+
+    p = commands.add_parser("run", help="replay a capture against a running build")
+    p.add_argument("capture")
+    p.add_argument("--manifest", required=True)
+    p.add_argument("--base-url", default="http://127.0.0.1:8000")
+    p.add_argument("--speed", type=float, default=1.0)
+    p.add_argument("--concurrency", type=int, default=32)
+    p.add_argument("--limit", type=int)
+    p.add_argument("--include-writes", action="store_true", help="replay writes with bodies synthesized from their shape")
+    p.add_argument("--out", required=True)
+    p.set_defaults(handler=run)
+
+    p = commands.add_parser("compare", help="compare latency distributions of two runs")
+    p.add_argument("baseline")
+    p.add_argument("candidate")
+    p.add_argument("--threshold", type=float, default=10.0, help="p95 regression threshold in percent")
+    p.add_argument("--min-samples", type=int, default=20)
+    p.set_defaults(handler=compare)
+
+    args = parser.parse_args()
+    args.handler(args)
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,13 @@
 from fastapi import FastAPI
 from sqlalchemy.orm import Session
-from app import models, crud, schemas
+from app import models, crud, schemas, jobs, fulltext, archive, changes, profiling, writer, coalescing, capture, migrations
 from app.database import engine, SessionLocal
-from app.routers import user_router, vehicle_router, rental_router, ride_router, passenger_router, auth_router, review_router
+from app.routers import user_router, vehicle_router, rental_router, ride_router, passenger_router, auth_router, review_router, admin_router, change_router
 from app.auth import get_password_hash
+from app.admission import AdmissionControlMiddleware
+from app.idempotency import IdempotencyMiddleware, store as idempotency_store
+from app.revocation import revocations
+from app.catalog import catalog
 from app.models import UserRoleEnum
 from app.config import settings 
 from app.config import settings
@@ -12,7 +16,12 @@ ADMIN_PASSWORD = settings.ADMIN_PASSWORD
 
 
 # Veritabanı tablolarını oluştur
+archive.setup(engine)
 models.Base.metadata.create_all(bind=engine)
+# Eski veritabanı dosyalarına sonradan eklenen kolon ve indeksleri ekle
+migrations.upgrade(engine)
+fulltext.ensure_review_index(engine)
+profiling.instrument(engine)
 
 app = FastAPI(
     title="Car Rental API",
@@ -20,6 +29,53 @@ app = FastAPI(
     description="API for managing users, vehicles, rentals, rides, and passengers."
 )
 
+# Aynı anda gelen aynı okumalar tek sorgu ve tek serileştirme paylaşır
+if settings.COALESCING_ENABLED:
+    app.add_middleware(
+        coalescing.CoalescingMiddleware,
+        table=coalescing.flights,
+        routes=settings.COALESCE_ROUTES,
+        wait_timeout=settings.COALESCE_WAIT_TIMEOUT,
+    )
+
+# Tekrarlanan rezervasyon/katılım isteklerine ilk yanıtı döndür
+if settings.IDEMPOTENCY_ENABLED:
+    app.add_middleware(
+        IdempotencyMiddleware,
+        store=idempotency_store,
+        routes=settings.IDEMPOTENCY_ROUTES,
+        wait_timeout=settings.IDEMPOTENCY_WAIT_TIMEOUT,
+    )
+
+# Pahalı endpoint'ler için eşzamanlılık ve istemci başına hız sınırı
+if settings.ADMISSION_CONTROL_ENABLED:
+    app.add_middleware(
+        AdmissionControlMiddleware,
+        limits=settings.ADMISSION_LIMITS,
+        secret_key=settings.SECRET_KEY,
+        algorithm=settings.ALGORITHM,
+    )
+
+# Gerçek trafik karışımını kaydeder (tekrar oynatma ve performans regresyon testleri için)
+if settings.CAPTURE_ENABLED:
+    app.add_middleware(
+        capture.TrafficCaptureMiddleware,
+        recorder=capture.recorder,
+        routes=settings.CAPTURE_ROUTES,
+        sample_rate=settings.CAPTURE_SAMPLE_RATE,
+        secret_key=settings.SECRET_KEY,
+    )
+
+# En dışta: diğer middleware'lerin süresi de profile dahil
+if settings.PROFILING_ENABLED:
+    app.add_middleware(
+        profiling.ProfilingMiddleware,
+        interval=settings.PROFILE_SAMPLE_INTERVAL,
+        max_seconds=settings.PROFILE_MAX_SECONDS,
+        sample_rate=settings.PROFILE_SAMPLE_RATE,
+        output_dir=settings.PROFILE_OUTPUT_DIR,
+        max_files=settings.PROFILE_MAX_FILES,
+    )
 
 def create_admin_user():
     db = SessionLocal()
@@ -43,6 +99,26 @@ def create_admin_user():
 @app.on_event("startup")
 def on_startup():
     create_admin_user()
+    revocations.start()
+    if settings.CATALOG_ENABLED:
+        catalog.start()
+    changes.compactor.start()
+    if settings.JOBS_ENABLED:
+        jobs.pool.start()
+    if settings.WRITE_COORDINATOR_ENABLED:
+        writer.coordinator.start()
+    if settings.CAPTURE_ENABLED:
+        capture.recorder.start()
+
+@app.on_event("shutdown")
+def on_shutdown():
+    revocations.stop()
+    catalog.stop()
+    writer.coordinator.stop(timeout=settings.WRITE_TIMEOUT)
+    capture.recorder.stop()
+    changes.compactor.stop()
+    if settings.JOBS_ENABLED:
+        jobs.pool.shutdown(timeout=settings.JOB_DRAIN_TIMEOUT)
 
 # Router'lar
 app.include_router(user_router.router)
@@ -52,6 +128,8 @@ app.include_router(rental_router.router)
 app.include_router(ride_router.router)
 app.include_router(passenger_router.router)
 app.include_router(review_router.router)
+app.include_router(admin_router.router)
+app.include_router(change_router.router)
 
 @app.get("/")
 def read_root():
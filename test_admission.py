@@ -0,0 +1,152 @@
+import asyncio
+import os
+import unittest
+from unittest import mock
+
+os.environ.setdefault("SECRET_KEY", "test")
+os.environ.setdefault("DATABASE_URL", "sqlite:///:memory:")
+os.environ.setdefault("ADMIN_PASSWORD", "test")
+
+from jose import jwt
+from app.admission import AdmissionControlMiddleware, RouteGate, TokenBucket
+from app.config import RouteLimit
+
+class TestTokenBucket(unittest.TestCase):
+    def test_burst_then_refill(self):
+        bucket = TokenBucket(rate=2.0, capacity=3, now=0.0)
+        self.assertEqual([bucket.take(0.0) for _ in range(3)], [0.0, 0.0, 0.0])
+        self.assertAlmostEqual(bucket.take(0.0), 0.5)
+        self.assertEqual(bucket.take(0.5), 0.0)
+        self.assertFalse(bucket.is_full(1.0))
+        # Kapasiteden fazla birikmez
+        self.assertTrue(bucket.is_full(100.0))
+        self.assertEqual(bucket.tokens, 3)
+
+class TestRouteGate(unittest.TestCase):
+    def test_rate_limit_is_per_client(self):
+        gate = RouteGate(RouteLimit(rate=1.0, burst=1))
+        self.assertEqual(gate.take_token("a"), 0.0)
+        self.assertGreater(gate.take_token("a"), 0.0)
+        self.assertEqual(gate.take_token("b"), 0.0)
+        self.assertEqual(gate.rate_limited, 1)
+
+    def test_queue_hand_off_and_shedding(self):
+        gate = RouteGate(RouteLimit(max_concurrency=1, max_queue=1, queue_timeout=1.0))
+
+        async def run():
+            self.assertIsNone(await gate.acquire())
+            queued = asyncio.ensure_future(gate.acquire())
+            await asyncio.sleep(0)
+            # Kuyruk dolu
+            shed = await gate.acquire()
+            gate.release(0.01)
+            admitted = await queued
+            gate.release(0.01)
+            return shed, admitted
+
+        shed, admitted = asyncio.run(run())
+        self.assertIsNotNone(shed)
+        self.assertIsNone(admitted)
+        self.assertEqual((gate.active, gate.admitted, gate.shed), (0, 2, 1))
+
+    def test_queue_timeout_sheds(self):
+        gate = RouteGate(RouteLimit(max_concurrency=1, max_queue=4, queue_timeout=0.05))
+
+        async def run():
+            await gate.acquire()
+            return await gate.acquire()
+
+        self.assertIsNotNone(asyncio.run(run()))
+        self.assertEqual((gate.active, gate.shed), (1, 1))
+        # Zaman aşan bekleyici kuyrukta kalmaz
+        self.assertEqual(len(gate.waiters), 0)
+
+    def test_abandoned_waiters_leave_the_queue(self):
+        gate = RouteGate(RouteLimit(max_concurrency=1, max_queue=2, queue_timeout=1.0))
+
+        async def run():
+            await gate.acquire()
+            queued = [asyncio.ensure_future(gate.acquire()) for _ in range(2)]
+            await asyncio.sleep(0)
+            for task in queued:
+                task.cancel()
+            await asyncio.gather(*queued, return_exceptions=True)
+            # Kuyruk boşaldığı için yeni istek reddedilmeden sıraya girer ve slotu alır
+            waiting = asyncio.ensure_future(gate.acquire())
+            await asyncio.sleep(0)
+            gate.release(0.01)
+            return await waiting
+
+        self.assertIsNone(asyncio.run(run()))
+        self.assertEqual((gate.active, gate.shed, len(gate.waiters)), (1, 0, 0))
+
+    def test_timeout_racing_hand_off_returns_slot(self):
+        gate = RouteGate(RouteLimit(max_concurrency=1, max_queue=4, queue_timeout=1.0))
+
+        # Slot devredildikten hemen sonra zaman aşımı tetiklenir
+        async def racing_wait_for(waiter, timeout):
+            gate.release(0.01)
+            raise asyncio.TimeoutError
+
+        async def run():
+            await gate.acquire()
+            with mock.patch("asyncio.wait_for", racing_wait_for):
+                return await gate.acquire()
+
+        self.assertIsNotNone(asyncio.run(run()))
+        self.assertEqual(gate.active, 0)
+        self.assertEqual(len(gate.waiters), 0)
+
+class SlowApp:
+    def __init__(self):
+        self.calls = 0
+
+    async def __call__(self, scope, receive, send):
+        self.calls += 1
+        await asyncio.sleep(0.05)
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"ok"})
+
+async def call(app, path="/rentals/available/vehicles", token=None, client="1.2.3.4"):
+    headers = [(b"authorization", f"Bearer {token}".encode())] if token else []
+    scope = {"type": "http", "method": "GET", "path": path, "headers": headers, "client": (client, 1)}
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        messages.append(message)
+
+    await app(scope, receive, send)
+    return messages[0]["status"], dict(messages[0]["headers"])
+
+class TestAdmissionControlMiddleware(unittest.TestCase):
+    def setUp(self):
+        self.inner = SlowApp()
+        limits = {"GET /rentals/available/vehicles": RouteLimit(max_concurrency=1, max_queue=0, queue_timeout=1.0, rate=1, burst=2)}
+        self.app = AdmissionControlMiddleware(self.inner, limits, "secret", "HS256")
+
+    def test_rate_limit_by_user_then_ip(self):
+        token = jwt.encode({"sub": "7"}, "secret", algorithm="HS256")
+
+        async def run():
+            by_user = [(await call(self.app, token=token))[0] for _ in range(3)]
+            by_ip = [(await call(self.app))[0] for _ in range(3)]
+            return by_user, by_ip
+
+        by_user, by_ip = asyncio.run(run())
+        self.assertEqual(by_user, [200, 200, 429])
+        self.assertEqual(by_ip, [200, 200, 429])
+
+    def test_sheds_when_busy_and_passes_other_routes(self):
+        async def run():
+            return await asyncio.gather(call(self.app, client="a"), call(self.app, client="b"), call(self.app, path="/vehicles/"))
+
+        (first, _), (second, headers), (other, _) = asyncio.run(run())
+        self.assertEqual((first, second, other), (200, 503, 200))
+        self.assertIn(b"retry-after", headers)
+        self.assertEqual(self.app.gates["GET /rentals/available/vehicles"].active, 0)
+
+if __name__ == "__main__":
+    unittest.main()
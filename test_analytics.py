@@ -0,0 +1,102 @@
+import os
+import unittest
+from datetime import datetime
+
+os.environ.setdefault("SECRET_KEY", "test")
+os.environ.setdefault("DATABASE_URL", "sqlite:///:memory:")
+os.environ.setdefault("ADMIN_PASSWORD", "test")
+
+import numpy as np
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app import analytics, models
+
+START = datetime(2024, 1, 1)
+END = datetime(2024, 1, 3)
+
+class TestSplitByBucket(unittest.TestCase):
+    def test_overlap_seconds_per_bucket(self):
+        edges = np.array([0, 10, 20, 30])
+        owner, buckets, seconds = analytics._split_by_bucket(
+            np.array([5.0, -5.0, 28.0, 10.0]), np.array([25.0, 3.0, 40.0, 20.0]), edges
+        )
+        pieces = sorted(zip(owner.tolist(), buckets.tolist(), seconds.tolist()))
+        self.assertEqual(pieces, [(0, 0, 5.0), (0, 1, 10.0), (0, 2, 5.0), (1, 0, 3.0), (2, 2, 2.0), (3, 1, 10.0)])
+
+    def test_month_edges_start_at_range(self):
+        edges = analytics.bucket_edges(datetime(2024, 1, 15), datetime(2024, 3, 1), "month")
+        self.assertEqual(analytics._bucket_labels(edges), ["2024-01-15T00:00:00+00:00", "2024-02-01T00:00:00+00:00"])
+
+class TestAnalytics(unittest.TestCase):
+    def setUp(self):
+        engine = create_engine("sqlite://")
+        models.Base.metadata.create_all(engine)
+        self.db = sessionmaker(bind=engine)()
+        self.db.add_all([
+            models.Vehicle(id=1, brand="VW", model="Golf", license_plate="AA1", seats=5, owner_id=10),
+            models.Vehicle(id=2, brand="VW", model="Polo", license_plate="AA2", seats=5, owner_id=10),
+            models.Vehicle(id=3, brand="VW", model="Up", license_plate="AA3", seats=4, owner_id=20),
+            # Pencerenin başından taşan: ilk günde 12 saat, gelire dahil değil (pencereden önce başladı)
+            models.Rental(vehicle_id=1, user_id=1, start_date=datetime(2023, 12, 31, 12), end_date=datetime(2024, 1, 1, 12), total_price=100),
+            # İki güne bölünen: 6 + 6 saat
+            models.Rental(vehicle_id=1, user_id=1, start_date=datetime(2024, 1, 1, 18), end_date=datetime(2024, 1, 2, 6), total_price=50),
+            # Pencerenin sonundan taşan: ikinci günde 24 saat
+            models.Rental(vehicle_id=3, user_id=1, start_date=datetime(2024, 1, 2), end_date=datetime(2024, 1, 4), total_price=200),
+            models.Ride(id=1, rental_id=2, renter_id=1, start_date=datetime(2024, 1, 1, 10), end_date=datetime(2024, 1, 1, 11),
+                        start_location="A", end_location="B", available_seats=2),
+            models.Ride(id=2, rental_id=3, renter_id=1, start_date=datetime(2024, 1, 2, 10), end_date=datetime(2024, 1, 2, 11),
+                        start_location="A", end_location="B", available_seats=4),
+            models.Ride(id=3, rental_id=3, renter_id=1, start_date=datetime(2024, 1, 5), end_date=datetime(2024, 1, 5, 1),
+                        start_location="A", end_location="B", available_seats=1),
+            models.RideParticipant(ride_id=1, user_id=5, passengers_count=1, ride_start=START, ride_end=START),
+            models.RideParticipant(ride_id=1, user_id=6, passengers_count=2, ride_start=START, ride_end=START),
+            models.RideParticipant(ride_id=3, user_id=5, passengers_count=1, ride_start=START, ride_end=START),
+            models.Review(type=models.ReviewType.vehicle, rating=8, rating_category="x", user_id=5),
+            models.Review(type=models.ReviewType.vehicle, rating=8, rating_category="x", user_id=5),
+            models.Review(type=models.ReviewType.vehicle, rating=3, rating_category="x", user_id=5),
+            models.Review(type=models.ReviewType.ride, rating=10, rating_category="x", user_id=5),
+        ])
+        self.db.commit()
+
+    def tearDown(self):
+        self.db.close()
+
+    def test_utilization_by_vehicle(self):
+        result = analytics.utilization(self.db, START, END, "day", "vehicle")
+        self.assertEqual(result["buckets"], ["2024-01-01T00:00:00+00:00", "2024-01-02T00:00:00+00:00"])
+        groups = {g["key"]: (g["rented_hours"], g["utilization"]) for g in result["groups"]}
+        self.assertEqual(groups, {
+            1: ([18.0, 6.0], [0.75, 0.25]),
+            2: ([0.0, 0.0], [0.0, 0.0]),
+            3: ([0.0, 24.0], [0.0, 1.0]),
+        })
+
+    def test_utilization_by_owner(self):
+        result = analytics.utilization(self.db, START, END, "day", "owner")
+        groups = {g["key"]: g["utilization"] for g in result["groups"]}
+        # Sahip 10'un iki aracı var: 18 / 48 ve 6 / 48
+        self.assertEqual(groups, {10: [0.375, 0.125], 20: [0.0, 1.0]})
+
+    def test_revenue_goes_to_start_bucket(self):
+        result = analytics.revenue(self.db, START, END, "day", "owner")
+        self.assertEqual(result["total_revenue"], 250.0)
+        groups = {g["key"]: (g["revenue"], g["rentals"]) for g in result["groups"]}
+        self.assertEqual(groups, {10: ([50.0, 0.0], [1, 0]), 20: ([0.0, 200.0], [0, 1])})
+
+    def test_ride_fill_rates(self):
+        result = analytics.ride_fill_rates(self.db, START, END, "day")
+        self.assertEqual(result["rides"], [1, 1])
+        self.assertEqual(result["seats_taken"], [3, 0])
+        self.assertEqual(result["seats_offered"], [5, 4])
+        self.assertEqual(result["fill_rate"], [0.6, 0.0])
+
+    def test_rating_distribution(self):
+        result = analytics.rating_distribution(self.db)
+        self.assertEqual(result["vehicle"]["count"], 3)
+        self.assertEqual(result["vehicle"]["average"], 6.33)
+        self.assertEqual(result["vehicle"]["histogram"], [0, 0, 0, 1, 0, 0, 0, 0, 2, 0, 0])
+        self.assertEqual(result["ride"]["histogram"][10], 1)
+        self.assertEqual(result["renter"], {"count": 0, "average": None, "histogram": [0] * 11})
+
+if __name__ == "__main__":
+    unittest.main()
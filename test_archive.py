@@ -0,0 +1,72 @@
+import os
+import unittest
+from datetime import datetime, timedelta
+
+os.environ.setdefault("SECRET_KEY", "test")
+os.environ.setdefault("DATABASE_URL", "sqlite:///:memory:")
+os.environ.setdefault("ADMIN_PASSWORD", "test")
+
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import sessionmaker
+from app import archive, changes, crud, models
+
+OLD = datetime(2020, 1, 1)
+NEW = datetime(2030, 1, 1)
+
+class TestArchive(unittest.TestCase):
+    def setUp(self):
+        engine = create_engine("sqlite://")
+        models.Base.metadata.create_all(engine)
+        archive.setup(engine)
+        self.db = sessionmaker(bind=engine)()
+        for i, start in enumerate([OLD, OLD, NEW, OLD], 1):
+            self.db.add(models.Rental(id=i, vehicle_id=1, user_id=1, start_date=start, end_date=start + timedelta(days=2)))
+            self.db.add(models.Ride(id=i, rental_id=i, renter_id=1, start_date=start, end_date=start + timedelta(hours=2),
+                                    start_location="A", end_location="B", available_seats=2))
+            self.db.add(models.RideParticipant(ride_id=i, user_id=2, ride_start=start, ride_end=start + timedelta(hours=2)))
+        self.db.commit()
+
+    def tearDown(self):
+        self.db.close()
+
+    def count(self, table):
+        return self.db.execute(select(func.count()).select_from(table)).scalar()
+
+    def test_moves_finished_rows_in_batches(self):
+        moved = archive.archive_finished(self.db, datetime(2025, 1, 1), batch_size=1)
+        self.assertEqual(moved, {"rides": 3, "ride_participants": 3, "rentals": 3, "batches": 6})
+        self.assertEqual(self.count(models.Ride.__table__), 1)
+        self.assertEqual(self.count(models.RideParticipant.__table__), 1)
+        self.assertEqual(self.count(archive.ride_participants_archive), 3)
+        self.assertEqual(self.count(archive.rentals_archive), 3)
+
+    def test_include_archived_unions_both(self):
+        archive.archive_finished(self.db, datetime(2025, 1, 1), batch_size=10)
+        self.assertEqual([r.id for r in crud.get_all_rentals(self.db, user_id=1)], [3])
+        self.assertEqual([r.id for r in crud.get_all_rentals(self.db, user_id=1, include_archived=True)], [1, 2, 3, 4])
+        self.assertEqual([r.id for r in crud.get_all_rides(self.db, renter_id=1, include_archived=True)], [1, 2, 3, 4])
+        self.assertEqual([r.id for r in crud.get_all_rides(self.db, renter_id=1)], [3])
+
+    def test_archived_rows_are_deleted_from_change_feed(self):
+        renter = models.User(id=1, username="renter", email="r@x.com", hashed_password="x", role=models.UserRoleEnum.renter)
+        changes.record(self.db, "rental", self.db.get(models.Rental, 1))
+        self.db.commit()
+        archive.archive_finished(self.db, datetime(2025, 1, 1), batch_size=10)
+        feed = changes.feed(self.db, renter, since=0, limit=100)
+        self.assertEqual(sorted((c.entity, c.id, c.op) for c in feed.changes), [
+            ("rental", 1, "delete"), ("rental", 2, "delete"), ("rental", 4, "delete"),
+            ("ride", 1, "delete"), ("ride", 2, "delete"), ("ride", 4, "delete")
+        ])
+
+    def test_ids_are_not_reused_after_archiving(self):
+        archive.archive_finished(self.db, datetime(2025, 1, 1), batch_size=10)
+        # Sıcak tablodaki tek kiralama silinince yeni satır arşivdeki id'leri almamalı
+        self.assertTrue(crud.delete_rental(self.db, 3, 1))
+        rental = models.Rental(vehicle_id=1, user_id=1, start_date=NEW, end_date=NEW + timedelta(days=1))
+        self.db.add(rental)
+        self.db.commit()
+        self.assertEqual(rental.id, 5)
+        self.assertEqual([r.id for r in crud.get_all_rentals(self.db, user_id=1, include_archived=True)], [1, 2, 4, 5])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,85 @@
+import os
+import unittest
+from datetime import datetime, timedelta, timezone
+
+os.environ.setdefault("SECRET_KEY", "test")
+os.environ.setdefault("DATABASE_URL", "sqlite:///:memory:")
+os.environ.setdefault("ADMIN_PASSWORD", "test")
+
+from fastapi import HTTPException
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app import crud, models, schemas
+
+T0 = datetime(2030, 1, 1, tzinfo=timezone.utc)
+
+def day(n):
+    return T0 + timedelta(days=n)
+
+def window(start, end, reason="Service"):
+    return schemas.BlackoutWindow(start_date=day(start), end_date=day(end), reason=reason)
+
+class TestBlackouts(unittest.TestCase):
+    def setUp(self):
+        engine = create_engine("sqlite://")
+        models.Base.metadata.create_all(engine)
+        self.db = sessionmaker(bind=engine)()
+        for i in range(1, 5):
+            self.db.add(models.Vehicle(id=i, brand="VW", model="Golf", license_plate=f"AB{i}000", seats=5,
+                                       owner_id=1 if i <= 3 else 2))
+        self.db.add(models.Rental(id=1, vehicle_id=2, user_id=9, start_date=day(1), end_date=day(3), total_price=10))
+        self.db.commit()
+
+    def tearDown(self):
+        self.db.close()
+
+    def test_bulk_create_for_owner_fleet(self):
+        result = crud.create_blackouts(self.db, schemas.BlackoutBulkCreate(windows=[window(2, 4), window(10, 11)]),
+                                       user_id=1, owner_id=1)
+        self.assertEqual((result.created, result.vehicle_ids), (6, [1, 2, 3]))
+        self.assertEqual([(c.vehicle_id, c.rental_id) for c in result.conflicts], [(2, 1)])
+        self.assertEqual(len(crud.get_blackouts(self.db, owner_id=1)), 6)
+        self.assertEqual(crud.get_blackouts(self.db, owner_id=2), [])
+
+        with self.assertRaises(HTTPException) as ctx:
+            crud.create_blackouts(self.db, schemas.BlackoutBulkCreate(vehicle_ids=[1, 4], windows=[window(5, 6)]),
+                                  user_id=1, owner_id=1)
+        self.assertEqual(ctx.exception.status_code, 403)
+        blackout = crud.get_blackouts(self.db, owner_id=1, limit=1)[0]
+        self.assertFalse(crud.delete_blackout(self.db, blackout.id, owner_id=2))
+        self.assertTrue(crud.delete_blackout(self.db, blackout.id, owner_id=1))
+
+    def test_blackouts_block_availability(self):
+        crud.create_blackouts(self.db, schemas.BlackoutBulkCreate(vehicle_ids=[1], windows=[window(5, 7)]),
+                              user_id=1, owner_id=1)
+        self.assertFalse(crud.is_vehicle_available(self.db, 1, day(6), day(8)))
+        self.assertTrue(crud.is_vehicle_available(self.db, 1, day(7), day(8)))
+        self.assertFalse(crud.is_vehicle_available(self.db, 2, day(2), day(4)))
+        available = crud.get_available_vehicles_by_date_range(self.db, day(2), day(6))
+        self.assertEqual([v.id for v in available], [3, 4])
+
+        slots = crud.find_free_slots(self.db, timedelta(days=2), day(4), day(20), limit=10)
+        self.assertIn((1, day(7)), [(s.vehicle_id, s.start_date) for s in slots])
+        self.assertNotIn((1, day(4)), [(s.vehicle_id, s.start_date) for s in slots])
+
+        booking = schemas.FleetBookingCreate(vehicle_ids=[1, 3], start_date=day(6), end_date=day(8))
+        with self.assertRaises(HTTPException) as ctx:
+            crud.create_fleet_booking(self.db, booking, user_id=9)
+        self.assertEqual(ctx.exception.detail[0]["vehicle_id"], 1)
+
+    def test_rental_update_respects_blackouts_and_other_rentals(self):
+        crud.create_blackouts(self.db, schemas.BlackoutBulkCreate(vehicle_ids=[2], windows=[window(5, 7)]),
+                              user_id=1, owner_id=1)
+        self.db.add(models.Rental(id=2, vehicle_id=2, user_id=9, start_date=day(8), end_date=day(9), total_price=10))
+        self.db.commit()
+        for start, end in [(6, 8), (8, 10)]:
+            update = schemas.RentalCreate(vehicle_id=2, start_date=day(start), end_date=day(end))
+            with self.assertRaises(HTTPException) as ctx:
+                crud.update_rental(self.db, 1, update, user_id=9)
+            self.assertEqual(ctx.exception.status_code, 409)
+        # Kendi aralığıyla çakışması sorun değil
+        update = schemas.RentalCreate(vehicle_id=2, start_date=day(2), end_date=day(4))
+        self.assertEqual(crud.update_rental(self.db, 1, update, user_id=9).end_date, day(4))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,62 @@
+import asyncio
+import os
+import unittest
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+os.environ.setdefault("SECRET_KEY", "test")
+os.environ.setdefault("DATABASE_URL", "sqlite:///:memory:")
+os.environ.setdefault("ADMIN_PASSWORD", "test")
+
+from app.broker import RideBroker, RideFilter, ride_event
+
+def ride(id, seats=3, start="Gent", end="Brussel", day=1):
+    return SimpleNamespace(id=id, available_seats=seats, start_location=start, end_location=end,
+                           start_date=datetime(2030, 1, day, 9, tzinfo=timezone.utc))
+
+class TestRideBroker(unittest.TestCase):
+    def run_async(self, coro):
+        return asyncio.run(coro)
+
+    def test_filter(self):
+        event = ride_event("updated", ride(1))
+        self.assertTrue(RideFilter(start_location="gent").matches(event))
+        self.assertFalse(RideFilter(ride_ids={2}).matches(event))
+        self.assertFalse(RideFilter(end_location="Antwerpen").matches(event))
+        self.assertFalse(RideFilter(depart_after=datetime(2030, 1, 2)).matches(event))
+        self.assertTrue(RideFilter(depart_before=datetime(2030, 1, 2)).matches(event))
+
+    def test_coalesces_per_ride(self):
+        async def scenario():
+            broker = RideBroker(buffer_size=10, max_subscribers=10)
+            subscription = broker.subscribe(RideFilter())
+            broker._dispatch([ride_event("updated", ride(1, seats=s)) for s in (3, 2, 1)])
+            broker._dispatch([ride_event("updated", ride(2))])
+            return subscription.drain(), broker.stats()
+        events, stats = self.run_async(scenario())
+        self.assertEqual([(e["ride_id"], e["available_seats"]) for e in events], [(1, 1), (2, 3)])
+        self.assertEqual(stats["coalesced"], 2)
+
+    def test_overflow_drops_oldest_and_requests_resync(self):
+        async def scenario():
+            broker = RideBroker(buffer_size=2, max_subscribers=10)
+            subscription = broker.subscribe(RideFilter())
+            broker._dispatch([ride_event("updated", ride(i)) for i in (1, 2, 3)])
+            return subscription.drain(), subscription.drain()
+        events, after = self.run_async(scenario())
+        self.assertEqual(events[0]["type"], "resync")
+        self.assertEqual([e["ride_id"] for e in events[1:]], [2, 3])
+        self.assertEqual(after, [])
+
+    def test_publish_from_other_thread_and_subscriber_limit(self):
+        async def scenario():
+            broker = RideBroker(buffer_size=10, max_subscribers=1)
+            subscription = broker.subscribe(RideFilter(ride_ids={1}))
+            self.assertIsNone(broker.subscribe(RideFilter()))
+            await asyncio.to_thread(broker.publish, [ride_event("updated", ride(1)), ride_event("updated", ride(2))])
+            await asyncio.wait_for(subscription.wakeup.wait(), 1)
+            return subscription.drain()
+        self.assertEqual([e["ride_id"] for e in self.run_async(scenario())], [1])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,115 @@
+import asyncio
+import json
+import os
+import tempfile
+import unittest
+
+os.environ.setdefault("SECRET_KEY", "test")
+os.environ.setdefault("DATABASE_URL", "sqlite:///:memory:")
+os.environ.setdefault("ADMIN_PASSWORD", "test")
+
+from app import auth, capture
+
+class EchoApp:
+    def __init__(self, response=b'{"ok": true}'):
+        self.response = response
+
+    async def __call__(self, scope, receive, send):
+        while (await receive()).get("more_body"):
+            pass
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": self.response})
+
+def request(method, path, query=b"", body=b"", content_type=b"application/json", token=None):
+    headers = [(b"content-type", content_type)]
+    if token:
+        headers.append((b"authorization", f"Bearer {token}".encode()))
+    scope = {"type": "http", "method": method, "path": path, "query_string": query, "headers": headers}
+    return scope, body
+
+def replay(middleware, scope, body):
+    async def receive():
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    async def send(message):
+        pass
+
+    asyncio.run(middleware(scope, receive, send))
+
+class TestCaptureHelpers(unittest.TestCase):
+    def test_sanitize_query_redacts_secrets(self):
+        query = capture.sanitize_query(b"vehicle_id=3&api_key=abc&email=a%40b.com&start_date=2026-01-01")
+        self.assertEqual(query, [
+            ["vehicle_id", "3"], ["api_key", "***"], ["email", "***"], ["start_date", "2026-01-01"]
+        ])
+
+    def test_body_shape_keeps_structure_only(self):
+        shape = capture.body_shape({"password": "hunter22", "seats": 4, "rate": 1.5, "ok": True,
+                                    "ids": [1, 2, 3], "note": None})
+        self.assertEqual(shape, {"password": "str", "seats": "int", "rate": "float", "ok": "bool",
+                                 "ids": {"list": 3, "item": "int"}, "note": "null"})
+
+    def test_route_template(self):
+        self.assertEqual(capture.route_template("/vehicles/12/calendar"), "/vehicles/{id}/calendar")
+        self.assertEqual(capture.route_template("/rentals/available/vehicles"), "/rentals/available/vehicles")
+
+class TestCaptureMiddleware(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "capture.jsonl")
+        self.recorder = capture.TrafficRecorder(self.path, max_bytes=1_000_000)
+        self.recorder.start()
+
+    def tearDown(self):
+        self.recorder.stop()
+        self.directory.cleanup()
+
+    def entries(self):
+        self.recorder.stop()
+        with open(self.path) as f:
+            raw = f.read()
+        return raw, [json.loads(line) for line in raw.splitlines()]
+
+    def middleware(self, app, routes=(r"(GET|POST) /.*",)):
+        mw = capture.TrafficCaptureMiddleware(app, self.recorder, routes, sample_rate=1.0, secret_key="test")
+        mw._roles["7"] = "renter"
+        return mw
+
+    def test_entries_are_redacted(self):
+        mw = self.middleware(EchoApp())
+        token = auth.create_access_token({"sub": "7"})
+        replay(mw, *request("GET", "/vehicles/5", b"token=abc&limit=2", token=token))
+        replay(mw, *request("POST", "/users/", body=b'{"email": "a@b.com", "password": "hunter22"}'))
+        raw, entries = self.entries()
+
+        self.assertNotIn("hunter22", raw)
+        self.assertNotIn("a@b.com", raw)
+        self.assertNotIn(token, raw)
+        read, write = entries
+        self.assertEqual(read["route"], "/vehicles/{id}")
+        self.assertEqual(read["query"], [["token", "***"], ["limit", "2"]])
+        self.assertEqual(read["role"], "renter")
+        self.assertEqual(len(read["user"]), 12)
+        self.assertNotEqual(read["user"], "7")
+        self.assertEqual(write["body"], {"email": "str", "password": "str"})
+        self.assertEqual(write["role"], "anonymous")
+
+    def test_login_is_attributed_from_response(self):
+        token = auth.create_access_token({"sub": "7"})
+        mw = self.middleware(EchoApp(json.dumps({"access_token": token}).encode()))
+        replay(mw, *request("POST", "/token", body=b"username=a%40b.com&password=hunter22",
+                            content_type=b"application/x-www-form-urlencoded"))
+        raw, (entry,) = self.entries()
+
+        self.assertNotIn("hunter22", raw)
+        self.assertEqual(entry["body"], {"form": ["password", "username"]})
+        self.assertEqual(entry["role"], "renter")
+
+    def test_unmatched_routes_are_not_recorded(self):
+        mw = self.middleware(EchoApp(), routes=(r"GET /reviews/",))
+        replay(mw, *request("GET", "/vehicles/5"))
+        _, entries = self.entries()
+        self.assertEqual(entries, [])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,101 @@
+import os
+import unittest
+from unittest import mock
+from types import SimpleNamespace
+
+os.environ.setdefault("SECRET_KEY", "test")
+os.environ.setdefault("DATABASE_URL", "sqlite:///:memory:")
+os.environ.setdefault("ADMIN_PASSWORD", "test")
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app import crud, models
+from app.catalog import CatalogSnapshot, VehicleCatalog
+
+def vehicle(id, brand="VW", model="Golf", seats=5, luggage=None, available=True):
+    return SimpleNamespace(id=id, owner_id=1, brand=brand, model=model, license_plate=f"PL{id}",
+                           seats=seats, luggage=luggage, available=available, daily_rate=None)
+
+class TestCatalogSnapshot(unittest.TestCase):
+    def setUp(self):
+        self.snapshot = CatalogSnapshot.empty()
+        for v in [vehicle(3, "Ford", "Transit", 9, 6), vehicle(1), vehicle(2, model="Polo", seats=4, available=False)]:
+            self.snapshot = self.snapshot.with_vehicle(v)
+
+    def ids(self, **filters):
+        return [row["id"] for row in self.snapshot.rows(self.snapshot.filter(**filters))]
+
+    def test_sorted_and_available_only(self):
+        self.assertEqual(self.ids(), [1, 3])
+
+    def test_filters(self):
+        self.assertEqual(self.ids(brand="vw"), [1])
+        self.assertEqual(self.ids(min_seats=6), [3])
+        self.assertEqual(self.ids(min_luggage=1), [3])
+
+    def test_update_and_remove_are_copy_on_write(self):
+        before = self.snapshot
+        self.snapshot = before.with_vehicle(vehicle(1, "Skoda", "Octavia", luggage=2))
+        self.assertEqual(self.snapshot.rows(self.snapshot.filter(brand="skoda"))[0]["luggage"], 2)
+        self.assertEqual(before.rows(before.filter(brand="vw"))[0]["model"], "Golf")
+        self.snapshot = self.snapshot.without_vehicle(3)
+        self.assertEqual(self.ids(), [1])
+        self.assertEqual(len(before), 3)
+
+    def test_missing_owner_is_none(self):
+        orphan = vehicle(4)
+        orphan.owner_id = None
+        self.snapshot = self.snapshot.with_vehicle(orphan)
+        self.assertEqual([row["owner_id"] for row in self.snapshot.rows(self.snapshot.filter())], [1, 1, None])
+
+    def test_strings_are_interned(self):
+        self.snapshot = self.snapshot.with_vehicle(vehicle(4))
+        self.assertEqual(len(self.snapshot.brands.values), 2)
+
+class TestCatalogUpsert(unittest.TestCase):
+    def setUp(self):
+        engine = create_engine("sqlite://")
+        models.Base.metadata.create_all(engine)
+        self.Session = sessionmaker(bind=engine)
+        self.catalog = VehicleCatalog(refresh_seconds=300)
+        self.catalog.ready = True
+
+    def brands(self):
+        return [row["brand"] for row in self.catalog.search()]
+
+    def test_late_publisher_does_not_overwrite_newer_commit(self):
+        first, second = self.Session(), self.Session()
+        first.add(models.Vehicle(id=1, brand="VW", model="Golf", license_plate="PL1", seats=5))
+        first.commit()
+        second.query(models.Vehicle).filter(models.Vehicle.id == 1).update({"brand": "Skoda"})
+        second.commit()
+        # İlk yazar ikinci commit'ten sonra yayınlar; eski marka geri gelmemeli
+        self.catalog.upsert(second, 1)
+        self.catalog.upsert(first, 1)
+        self.assertEqual(self.brands(), ["Skoda"])
+
+    def test_upsert_of_deleted_vehicle_removes_it(self):
+        db = self.Session()
+        db.add(models.Vehicle(id=1, brand="VW", model="Golf", license_plate="PL1", seats=5))
+        db.commit()
+        self.catalog.upsert(db, 1)
+        db.query(models.Vehicle).delete()
+        db.commit()
+        self.catalog.upsert(db, 1)
+        self.assertEqual(self.brands(), [])
+
+    def test_deleted_owner_is_cleared_from_catalog(self):
+        db = self.Session()
+        db.add(models.User(id=7, username="owner", email="o@x.com", hashed_password="x", role=models.UserRoleEnum.owner))
+        db.add(models.Vehicle(id=1, brand="VW", model="Golf", license_plate="PL1", seats=5, owner_id=7))
+        db.commit()
+        self.catalog.upsert(db, 1)
+        with mock.patch.object(crud, "catalog", self.catalog):
+            self.assertTrue(crud.delete_user(db, 7))
+        self.assertEqual([row["owner_id"] for row in self.catalog.search()], [None])
+        # Tam yenileme de aynı sonucu verir
+        self.catalog.refresh(db)
+        self.assertEqual([row["owner_id"] for row in self.catalog.search()], [None])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,103 @@
+import os
+import unittest
+from datetime import datetime, timedelta, timezone
+
+os.environ.setdefault("SECRET_KEY", "test")
+os.environ.setdefault("DATABASE_URL", "sqlite:///:memory:")
+os.environ.setdefault("ADMIN_PASSWORD", "test")
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app import changes, crud, models, schemas
+
+def vehicle(plate):
+    return schemas.VehicleCreate(brand="VW", model="Golf", license_plate=plate, seats=5, luggage=2)
+
+class TestChangeFeed(unittest.TestCase):
+    def setUp(self):
+        engine = create_engine("sqlite://")
+        models.Base.metadata.create_all(engine)
+        self.db = sessionmaker(bind=engine)()
+        self.owner = models.User(id=1, username="owner", email="o@x.com", hashed_password="x", role=models.UserRoleEnum.owner)
+        self.other = models.User(id=2, username="other", email="p@x.com", hashed_password="x", role=models.UserRoleEnum.owner)
+        self.admin = models.User(id=3, username="admin", email="a@x.com", hashed_password="x", role=models.UserRoleEnum.admin)
+        self.db.add_all([self.owner, self.other, self.admin])
+        self.db.commit()
+
+    def tearDown(self):
+        self.db.close()
+
+    def entries(self, user, since=0, limit=100):
+        feed = changes.feed(self.db, user, since, limit)
+        return [(c.entity, c.id, c.op) for c in feed.changes], feed
+
+    def test_writes_are_logged_and_scoped(self):
+        first = crud.create_vehicle(self.db, vehicle("AA1111"), owner_id=1).id
+        crud.create_vehicle(self.db, vehicle("BB2222"), owner_id=2)
+        entries, feed = self.entries(self.owner)
+        self.assertEqual(entries, [("vehicle", first, "upsert")])
+        self.assertEqual(feed.next_since, 2)
+        self.assertEqual(len(self.entries(self.admin)[0]), 2)
+
+        crud.update_vehicle(self.db, first, vehicle("AA1112"), owner_id=1)
+        crud.update_vehicle(self.db, first, vehicle("AA1113"), owner_id=1)
+        entries, feed = self.entries(self.owner, since=2)
+        # Aynı varlığın ardışık değişiklikleri tek kayıt olarak döner
+        self.assertEqual(entries, [("vehicle", first, "upsert")])
+        self.assertEqual(feed.changes[0].data["license_plate"], "AA1113")
+
+        crud.delete_vehicle(self.db, first, owner_id=1)
+        entries, _ = self.entries(self.owner, since=feed.next_since)
+        self.assertEqual(entries, [("vehicle", first, "delete")])
+
+    def test_paging_and_compaction(self):
+        vehicle_ids = [crud.create_vehicle(self.db, vehicle(f"CC{i}000"), owner_id=1).id for i in range(3)]
+        for vehicle_id in vehicle_ids:
+            crud.update_vehicle(self.db, vehicle_id, vehicle(f"DD{vehicle_id}000"), owner_id=1)
+        entries, feed = self.entries(self.owner, limit=2)
+        self.assertTrue(feed.has_more)
+        self.assertEqual(feed.next_since, 2)
+
+        self.assertEqual(changes.compact(self.db), 3)
+        self.assertEqual(changes.stats(self.db)["entries"], 3)
+        # Sıkıştırmadan sonra eski imleç yine son duruma ulaşır
+        entries, feed = self.entries(self.owner, since=feed.next_since)
+        self.assertEqual(sorted(e[1] for e in entries), vehicle_ids)
+        self.assertFalse(feed.has_more)
+        self.assertEqual(feed.next_since, 6)
+
+    def test_rentals_and_rides_are_scoped_by_role(self):
+        renter = models.User(id=4, username="renter", email="r@x.com", hashed_password="x", role=models.UserRoleEnum.renter)
+        second = models.User(id=5, username="renter2", email="s@x.com", hashed_password="x", role=models.UserRoleEnum.renter)
+        passenger = models.User(id=6, username="passenger", email="q@x.com", hashed_password="x", role=models.UserRoleEnum.passenger)
+        self.db.add_all([renter, second, passenger])
+        self.db.commit()
+        own = crud.create_vehicle(self.db, vehicle("EE1111"), owner_id=1).id
+        foreign = crud.create_vehicle(self.db, vehicle("FF2222"), owner_id=2).id
+        start = datetime(2030, 1, 1, tzinfo=timezone.utc)
+        rental = crud.create_rental(self.db, schemas.RentalCreate(
+            vehicle_id=own, start_date=start, end_date=start + timedelta(days=1)), user_id=4).id
+        other_rental = crud.create_rental(self.db, schemas.RentalCreate(
+            vehicle_id=foreign, start_date=start, end_date=start + timedelta(days=1)), user_id=5).id
+        ride = crud.create_ride(self.db, schemas.RideCreate(
+            rental_id=rental, start_date=start, end_date=start + timedelta(hours=2),
+            start_location="Ankara", end_location="Konya", available_seats=3), user_id=4).id
+
+        def visible(user):
+            return sorted(e[:2] for e in self.entries(user)[0])
+
+        vehicles = [("vehicle", own), ("vehicle", foreign)]
+        # Kiracı: tüm araçlar, yalnızca kendi kiralama ve yolculukları
+        self.assertEqual(visible(renter), sorted(vehicles + [("rental", rental), ("ride", ride)]))
+        self.assertEqual(visible(second), sorted(vehicles + [("rental", other_rental)]))
+        # Araç sahibi: kendi araçları ve onlara yapılan kiralamalar, tüm yolculuklar
+        self.assertEqual(visible(self.owner), [("rental", rental), ("ride", ride), ("vehicle", own)])
+        self.assertEqual(visible(self.other), [("rental", other_rental), ("ride", ride), ("vehicle", foreign)])
+        # Yolcu: araçlar ve yolculuklar, kiralama yok
+        self.assertEqual(visible(passenger), sorted(vehicles + [("ride", ride)]))
+
+        crud.delete_ride(self.db, ride, renter_id=4)
+        self.assertIn(("ride", ride, "delete"), self.entries(passenger)[0])
+
+if __name__ == "__main__":
+    unittest.main()
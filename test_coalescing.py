@@ -0,0 +1,93 @@
+import asyncio
+import os
+import unittest
+
+os.environ.setdefault("SECRET_KEY", "test")
+os.environ.setdefault("DATABASE_URL", "sqlite:///:memory:")
+os.environ.setdefault("ADMIN_PASSWORD", "test")
+
+from app import auth, coalescing
+
+class SlowApp:
+    def __init__(self, status=200):
+        self.calls = 0
+        self.status = status
+
+    async def __call__(self, scope, receive, send):
+        self.calls += 1
+        await asyncio.sleep(0.05)
+        await send({"type": "http.response.start", "status": self.status, "headers": [(b"content-type", b"application/json")]})
+        await send({"type": "http.response.body", "body": f'{{"call": {self.calls}}}'.encode()})
+
+def request(path, query=b"", token=None):
+    headers = [(b"authorization", f"Bearer {token}".encode())] if token else []
+    return {"type": "http", "method": "GET", "path": path, "query_string": query, "headers": headers}
+
+async def call(middleware, scope):
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        messages.append(message)
+
+    await middleware(scope, receive, send)
+    return messages[0]["status"], dict(messages[0]["headers"]), messages[1]["body"]
+
+def middleware(app):
+    table = coalescing.FlightTable()
+    routes = {r"GET /reviews/": "public", r"GET /vehicles/\d+": "user"}
+    return coalescing.CoalescingMiddleware(app, table, routes, wait_timeout=5), table
+
+class TestCoalescing(unittest.TestCase):
+    def test_identical_reads_share_one_execution(self):
+        app = SlowApp()
+        mw, table = middleware(app)
+
+        async def scenario():
+            same = [call(mw, request("/reviews/", b"vehicle_id=1&limit=5")) for _ in range(9)]
+            # Parametre sırası anahtarı değiştirmez
+            same.append(call(mw, request("/reviews/", b"limit=5&vehicle_id=1")))
+            other = call(mw, request("/reviews/", b"vehicle_id=2"))
+            return await asyncio.gather(*same, other)
+
+        responses = asyncio.run(scenario())
+        self.assertEqual(app.calls, 2)
+        self.assertEqual(len({body for _, _, body in responses[:10]}), 1)
+        self.assertEqual(sum(1 for _, headers, _ in responses if headers.get(b"x-coalesced")), 9)
+        self.assertEqual(table.stats()["coalesced"], 9)
+        self.assertEqual(table.stats()["in_flight"], 0)
+
+    def test_user_scope_keys_by_subject(self):
+        app = SlowApp()
+        mw, _ = middleware(app)
+        first = auth.create_access_token({"sub": "1"})
+        second = auth.create_access_token({"sub": "2"})
+
+        async def scenario():
+            return await asyncio.gather(
+                call(mw, request("/vehicles/5", token=first)),
+                call(mw, request("/vehicles/5", token=auth.create_access_token({"sub": "1"}))),
+                call(mw, request("/vehicles/5", token=second)),
+                # Token yok: birleştirilmez, endpoint 401 döner
+                call(mw, request("/vehicles/5")),
+                call(mw, request("/vehicles/5")),
+            )
+
+        asyncio.run(scenario())
+        self.assertEqual(app.calls, 4)
+
+    def test_server_errors_are_not_shared(self):
+        app = SlowApp(status=500)
+        mw, table = middleware(app)
+
+        async def scenario():
+            return await asyncio.gather(*[call(mw, request("/reviews/")) for _ in range(3)])
+
+        asyncio.run(scenario())
+        self.assertEqual(table.stats()["fallbacks"], 2)
+        self.assertEqual(app.calls, 3)
+
+if __name__ == "__main__":
+    unittest.main()
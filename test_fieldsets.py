@@ -0,0 +1,84 @@
+import json
+import os
+import unittest
+from datetime import datetime, timedelta
+
+os.environ.setdefault("SECRET_KEY", "test")
+os.environ.setdefault("DATABASE_URL", "sqlite:///:memory:")
+os.environ.setdefault("ADMIN_PASSWORD", "test")
+
+from fastapi import HTTPException
+from sqlalchemy import create_engine, inspect
+from sqlalchemy.orm import sessionmaker
+from app import archive, fieldsets, models
+from app.routers import rental_router, ride_router
+
+START = datetime(2020, 1, 1)
+
+class TestParse(unittest.TestCase):
+    def test_no_parameters_uses_normal_path(self):
+        self.assertIsNone(fieldsets.parse("vehicle", None, None))
+        self.assertEqual(fieldsets.query_options(None), [])
+
+    def test_splits_and_trims(self):
+        fieldset = fieldsets.parse("vehicle", " brand, seats ,,", "owner,reviews")
+        self.assertEqual(fieldset.fields, ["brand", "seats"])
+        self.assertEqual(fieldset.include, ["owner", "reviews"])
+        # Boş fields tüm alanlar demektir
+        self.assertIsNone(fieldsets.parse("vehicle", "", "owner").fields)
+
+    def test_unknown_fields_and_includes_are_rejected(self):
+        for fields, include, detail in [("brand,hashed_password", None, "Unknown fields: hashed_password"),
+                                        (None, "owner,secrets", "Unknown includes: secrets")]:
+            with self.assertRaises(HTTPException) as error:
+                fieldsets.parse("vehicle", fields, include)
+            self.assertEqual((error.exception.status_code, error.exception.detail), (400, detail))
+
+class TestQueries(unittest.TestCase):
+    def setUp(self):
+        engine = create_engine("sqlite://")
+        models.Base.metadata.create_all(engine)
+        archive.setup(engine)
+        self.db = sessionmaker(bind=engine)()
+        self.admin = models.User(id=1, username="admin", email="a@x.com", hashed_password="x", role=models.UserRoleEnum.admin)
+        self.db.add_all([
+            self.admin,
+            models.Vehicle(id=1, brand="VW", model="Golf", license_plate="AA1", seats=5, owner_id=1),
+            models.Review(id=1, type=models.ReviewType.vehicle, rating=9, rating_category="Excellent", user_id=1, vehicle_id=1),
+            models.Rental(id=1, vehicle_id=1, user_id=1, start_date=START, end_date=START + timedelta(days=1)),
+        ])
+        self.db.commit()
+
+    def tearDown(self):
+        self.db.close()
+
+    def test_load_only_requested_and_always_columns(self):
+        fieldset = fieldsets.parse("vehicle", "brand", "reviews")
+        vehicle = self.db.query(models.Vehicle).options(*fieldsets.query_options(fieldset)).one()
+        unloaded = inspect(vehicle).unloaded
+        self.assertTrue({"model", "license_plate", "seats", "owner"} <= unloaded)
+        self.assertFalse({"id", "owner_id", "brand", "reviews"} & unloaded)
+
+        data = fieldsets.serialize(fieldset, [vehicle])
+        self.assertEqual(list(data[0]), ["brand", "reviews"])
+        self.assertEqual(data[0]["reviews"][0]["rating"], 9)
+
+    def test_include_with_archived_is_rejected(self):
+        for read in (rental_router.read_rentals, ride_router.read_rides):
+            with self.assertRaises(HTTPException) as error:
+                read(fields=None, include="reviews", include_archived=True, limit=None, offset=0,
+                     db=self.db, current_user=self.admin)
+            self.assertEqual(error.exception.status_code, 400)
+
+    def test_fields_work_with_archived_rows(self):
+        self.db.add(models.Rental(id=2, vehicle_id=1, user_id=1, start_date=START, end_date=datetime(2030, 1, 1)))
+        self.db.commit()
+        self.assertEqual(archive.archive_finished(self.db, datetime(2021, 1, 1), batch_size=10)["rentals"], 1)
+        response = rental_router.read_rentals(fields="id,end_date", include=None, include_archived=True, limit=None,
+                                              offset=0, db=self.db, current_user=self.admin)
+        self.assertEqual(json.loads(response.body), [
+            {"id": 1, "end_date": "2020-01-02T00:00:00Z"}, {"id": 2, "end_date": "2030-01-01T00:00:00Z"}
+        ])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,65 @@
+import os
+import unittest
+from datetime import datetime, timedelta, timezone
+
+os.environ.setdefault("SECRET_KEY", "test")
+os.environ.setdefault("DATABASE_URL", "sqlite:///:memory:")
+os.environ.setdefault("ADMIN_PASSWORD", "test")
+
+from fastapi import HTTPException
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app import crud, models, schemas
+
+class TestFleetBooking(unittest.TestCase):
+    def setUp(self):
+        engine = create_engine("sqlite://")
+        models.Base.metadata.create_all(engine)
+        self.db = sessionmaker(bind=engine)()
+        self.start = datetime.now(timezone.utc) + timedelta(days=5)
+        self.end = self.start + timedelta(days=2)
+        for i, (seats, luggage) in enumerate([(5, 2), (5, 2), (7, 4), (5, 3), (9, 5)], start=1):
+            self.db.add(models.Vehicle(id=i, brand="VW", model="Golf", license_plate=f"AB{i}000",
+                                       seats=seats, luggage=luggage, daily_rate=40, owner_id=1))
+        # Araç 1 bu tarihlerde dolu
+        self.db.add(models.Rental(id=1, vehicle_id=1, user_id=8, start_date=self.start - timedelta(days=1),
+                                  end_date=self.start + timedelta(hours=1), total_price=40))
+        self.db.commit()
+
+    def tearDown(self):
+        self.db.close()
+
+    def book(self, vehicle_ids, substitute=False):
+        booking = schemas.FleetBookingCreate(vehicle_ids=vehicle_ids, start_date=self.start,
+                                             end_date=self.end, substitute=substitute)
+        return crud.create_fleet_booking(self.db, booking, user_id=9)
+
+    def test_available_vehicles_single_query(self):
+        available = crud.get_available_vehicles_by_date_range(self.db, self.start, self.end)
+        self.assertEqual([v.id for v in available], [2, 3, 4, 5])
+
+    def test_all_or_nothing(self):
+        with self.assertRaises(HTTPException) as ctx:
+            self.book([1, 2])
+        self.assertEqual(ctx.exception.status_code, 409)
+        self.assertEqual([e["vehicle_id"] for e in ctx.exception.detail], [1])
+        self.assertEqual(self.db.query(models.Rental).count(), 1)
+
+        result = self.book([2, 3])
+        self.assertEqual(sorted(r.vehicle_id for r in result.rentals), [2, 3])
+        self.assertEqual(result.total_price, sum(r.total_price for r in result.rentals))
+        self.assertEqual(result.substitutions, [])
+
+    def test_substitutes_smallest_equivalent_vehicle(self):
+        result = self.book([1, 2], substitute=True)
+        # 5 koltuk / 2 bagaj için en küçük uygun araç 4 (5/3)
+        self.assertEqual([(s.requested_vehicle_id, s.vehicle_id) for s in result.substitutions], [(1, 4)])
+        self.assertEqual(sorted(r.vehicle_id for r in result.rentals), [2, 4])
+
+    def test_missing_vehicle(self):
+        with self.assertRaises(HTTPException) as ctx:
+            self.book([2, 99])
+        self.assertEqual(ctx.exception.status_code, 404)
+
+if __name__ == "__main__":
+    unittest.main()
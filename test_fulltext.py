@@ -0,0 +1,54 @@
+import os
+import unittest
+
+os.environ.setdefault("SECRET_KEY", "test")
+os.environ.setdefault("DATABASE_URL", "sqlite:///:memory:")
+os.environ.setdefault("ADMIN_PASSWORD", "test")
+
+from sqlalchemy import create_engine, delete, update
+from sqlalchemy.orm import sessionmaker
+from app import crud, fulltext, models
+
+class TestMatchExpression(unittest.TestCase):
+    def test_terms_are_quoted_prefixes(self):
+        self.assertEqual(fulltext.match_expression('temiz "araç" OR'), '"temiz"* "araç"* "OR"*')
+
+    def test_no_words(self):
+        self.assertIsNone(fulltext.match_expression("*** ()"))
+
+class TestReviewSearch(unittest.TestCase):
+    def setUp(self):
+        engine = create_engine("sqlite://")
+        models.Base.metadata.create_all(engine)
+        fulltext.ensure_review_index(engine)
+        self.db = sessionmaker(bind=engine)()
+        for i, (rating, comment) in enumerate([(9, "Araç çok temizdi"), (3, "Kirli araç"), (8, "Temiz, temiz, temiz")], 1):
+            self.db.add(models.Review(id=i, type=models.ReviewType.vehicle, rating=rating, rating_category="x",
+                                      comment=comment, user_id=1, vehicle_id=1))
+        self.db.commit()
+
+    def tearDown(self):
+        self.db.close()
+
+    def ids(self, q, **filters):
+        return [review.id for review in crud.search_reviews(self.db, q=q, **filters)]
+
+    def test_ranked_with_snippet(self):
+        results = crud.search_reviews(self.db, q="temiz")
+        self.assertEqual([r.id for r in results], [3, 1])
+        self.assertIn("[temizdi]", results[1].snippet)
+        self.assertGreaterEqual(results[0].score, results[1].score)
+
+    def test_filters_combined(self):
+        self.assertEqual(self.ids("temiz", min_rating=9), [1])
+        self.assertEqual(self.ids("arac", max_rating=5), [2])
+
+    def test_index_follows_updates_and_deletes(self):
+        self.db.execute(update(models.Review).where(models.Review.id == 1).values(comment="berbat"))
+        self.db.execute(delete(models.Review).where(models.Review.id == 3))
+        self.db.commit()
+        self.assertEqual(self.ids("temiz"), [])
+        self.assertEqual(self.ids("berbat"), [1])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,40 @@
+import unittest
+import numpy as np
+from app import geo
+
+class TestGeohash(unittest.TestCase):
+    def test_encode_known_value(self):
+        self.assertEqual(geo.encode_geohash(57.64911, 10.40744, 11), "u4pruydqqvj")
+
+    def test_decode_roundtrip(self):
+        lat, lon, lat_err, lon_err = geo.decode_geohash(geo.encode_geohash(39.92, 32.85))
+        self.assertLessEqual(abs(lat - 39.92), lat_err)
+        self.assertLessEqual(abs(lon - 32.85), lon_err)
+
+    def test_neighbors_surround_cell(self):
+        cell = geo.encode_geohash(39.92, 32.85, 6)
+        neighbors = geo.geohash_neighbors(cell)
+        self.assertEqual(len(neighbors), 8)
+        self.assertNotIn(cell, neighbors)
+        self.assertTrue(all(len(n) == 6 for n in neighbors))
+
+    def test_radius_cells_cover_nearby_point(self):
+        # Hücre sınırına yakın bir nokta komşu hücrelerden biriyle yakalanmalı
+        cells = geo.cells_for_radius(39.92, 32.85, 5)
+        other = geo.encode_geohash(39.95, 32.88)
+        self.assertTrue(any(other.startswith(c) for c in cells))
+
+    def test_bbox_cells_cover_corners(self):
+        cells = geo.cells_for_bbox(39.9, 32.7, 40.0, 32.9)
+        for lat, lon in [(39.9, 32.7), (40.0, 32.9), (39.95, 32.8)]:
+            gh = geo.encode_geohash(lat, lon)
+            self.assertTrue(any(gh.startswith(c) for c in cells))
+
+class TestHaversine(unittest.TestCase):
+    def test_vectorized_distances(self):
+        d = geo.haversine_km(39.92, 32.85, np.array([39.92, 41.0]), np.array([32.85, 28.97]))
+        self.assertAlmostEqual(d[0], 0.0)
+        self.assertAlmostEqual(d[1], 349.5, delta=1.0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,157 @@
+import asyncio
+import os
+import unittest
+
+os.environ.setdefault("SECRET_KEY", "test")
+os.environ.setdefault("DATABASE_URL", "sqlite:///:memory:")
+os.environ.setdefault("ADMIN_PASSWORD", "test")
+
+from datetime import datetime, timedelta
+from app import auth
+from app.idempotency import IdempotencyMiddleware, IdempotencyStore
+from app.revocation import revocations
+
+TOKEN = auth.create_access_token({"sub": "1"})
+
+class CountingApp:
+    def __init__(self):
+        self.calls = 0
+
+    async def __call__(self, scope, receive, send):
+        self.calls += 1
+        message = await receive()
+        await asyncio.sleep(0.01)
+        await send({"type": "http.response.start", "status": 201, "headers": []})
+        await send({"type": "http.response.body", "body": message["body"] + str(self.calls).encode()})
+
+class BlockingApp:
+    def __init__(self):
+        self.release = asyncio.Event()
+        self.calls = 0
+
+    async def __call__(self, scope, receive, send):
+        self.calls += 1
+        await receive()
+        await self.release.wait()
+        await send({"type": "http.response.start", "status": 201, "headers": []})
+        await send({"type": "http.response.body", "body": b"done"})
+
+async def call(app, body: bytes, key: str = "k1", path: str = "/rentals/", token: str = TOKEN):
+    scope = {
+        "type": "http", "method": "POST", "path": path, "query_string": b"",
+        "headers": [(b"authorization", f"Bearer {token}".encode()), (b"idempotency-key", key.encode())],
+    }
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    async def send(message):
+        messages.append(message)
+    await app(scope, receive, send)
+    return messages[0]["status"], messages[-1]["body"]
+
+class TestIdempotencyMiddleware(unittest.TestCase):
+    def setUp(self):
+        self.inner = CountingApp()
+        self.store = IdempotencyStore(ttl=60, max_entries=10, sweep_interval=60)
+        self.app = IdempotencyMiddleware(self.inner, self.store, [r"POST /rentals/"], 5)
+
+    def test_concurrent_duplicates_execute_once(self):
+        async def run():
+            return await asyncio.gather(*(call(self.app, b"a") for _ in range(5)))
+        results = asyncio.run(run())
+        self.assertEqual(self.inner.calls, 1)
+        self.assertEqual(set(results), {(201, b"a1")})
+
+    def test_different_body_same_key_is_rejected(self):
+        async def run():
+            await call(self.app, b"a")
+            return await call(self.app, b"b")
+        self.assertEqual(asyncio.run(run())[0], 422)
+
+    def test_other_routes_pass_through(self):
+        async def run():
+            await call(self.app, b"a", path="/vehicles/")
+            return await call(self.app, b"a", path="/vehicles/")
+        self.assertEqual(asyncio.run(run()), (201, b"a2"))
+
+    def test_sweep_drops_expired(self):
+        self.store.ttl = 0
+        asyncio.run(call(self.app, b"a"))
+        self.assertEqual(self.store.sweep(), 1)
+        self.assertEqual(len(self.store.entries), 0)
+
+    def test_revoked_token_does_not_replay(self):
+        token = auth.create_access_token({"sub": "1"})
+        jti = auth.decode_token(token, "access")["jti"]
+
+        async def run():
+            first = await call(self.app, b"a", token=token)
+            revocations._add(jti, datetime.utcnow() + timedelta(hours=1))
+            return first, await call(self.app, b"a", token=token)
+        first, second = asyncio.run(run())
+        # İkinci istek middleware'den geçer; endpoint token'ı reddeder
+        self.assertEqual((first, second), ((201, b"a1"), (201, b"a2")))
+        self.assertEqual(self.store.replayed, 0)
+
+    def test_refresh_token_is_not_a_subject(self):
+        refresh = auth.create_refresh_token({"sub": "1"})
+
+        async def run():
+            first = await call(self.app, b"a", token=refresh)
+            return first, await call(self.app, b"a")
+        first, second = asyncio.run(run())
+        # Refresh token'lı istek kaydedilmez; access token'la yeniden deneme isteği çalıştırır
+        self.assertEqual((first, second), ((201, b"a1"), (201, b"a2")))
+        self.assertEqual(len(self.store.entries), 1)
+        self.assertEqual(self.store.replayed, 0)
+
+    def test_auth_failures_are_not_stored(self):
+        class DenyingApp:
+            calls = 0
+
+            async def __call__(self, scope, receive, send):
+                self.calls += 1
+                await receive()
+                await send({"type": "http.response.start", "status": 403 if self.calls == 1 else 201, "headers": []})
+                await send({"type": "http.response.body", "body": b""})
+
+        inner = DenyingApp()
+        app = IdempotencyMiddleware(inner, IdempotencyStore(ttl=60, max_entries=10, sweep_interval=60),
+                                    [r"POST /rentals/"], 5)
+
+        async def run():
+            return [(await call(app, b"a"))[0], (await call(app, b"a"))[0], (await call(app, b"a"))[0]]
+        self.assertEqual(asyncio.run(run()), [403, 201, 201])
+        self.assertEqual(inner.calls, 2)
+
+    def test_eviction_keeps_in_flight_entries(self):
+        inner = BlockingApp()
+        store = IdempotencyStore(ttl=60, max_entries=2, sweep_interval=60)
+        app = IdempotencyMiddleware(inner, store, [r"POST /rentals/"], 5)
+
+        async def run():
+            first = asyncio.ensure_future(call(app, b"a", key="k1"))
+            second = asyncio.ensure_future(call(app, b"b", key="k2"))
+            await asyncio.sleep(0.01)
+            # İki kayıt da çalışıyor; yer açılamaz
+            rejected = await call(app, b"c", key="k3")
+            duplicate = asyncio.ensure_future(call(app, b"a", key="k1"))
+            await asyncio.sleep(0.01)
+            inner.release.set()
+            results = await asyncio.gather(first, second, duplicate)
+            # Tamamlanan en eski kayıt atılarak yer açılır
+            admitted = await call(app, b"c", key="k3")
+            return rejected, results, admitted
+
+        rejected, results, admitted = asyncio.run(run())
+        self.assertEqual(rejected[0], 503)
+        self.assertEqual(results, [(201, b"done")] * 3)
+        self.assertEqual(admitted, (201, b"done"))
+        self.assertEqual(inner.calls, 3)
+        self.assertEqual(list(store.entries), [("1", "k2"), ("1", "k3")])
+        self.assertEqual(store.stats()["rejected"], 1)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,146 @@
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+from datetime import datetime, timedelta
+
+os.environ.setdefault("SECRET_KEY", "test")
+os.environ.setdefault("DATABASE_URL", "sqlite:///:memory:")
+os.environ.setdefault("ADMIN_PASSWORD", "test")
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app import jobs, models
+from app.config import settings
+
+calls = []
+
+@jobs.handler("test.ok")
+def ok(db, payload):
+    calls.append(payload["n"])
+
+@jobs.handler("test.fail")
+def fail(db, payload):
+    raise RuntimeError("boom")
+
+class TestJobs(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.engine = create_engine(f"sqlite:///{os.path.join(self.directory, 'jobs.db')}",
+                                    connect_args={"check_same_thread": False})
+        models.Base.metadata.create_all(self.engine)
+        self.Session = sessionmaker(bind=self.engine)
+        self.pool = jobs.JobWorkerPool(workers=1, poll_interval=0.01, session_factory=self.Session)
+        calls.clear()
+
+    def tearDown(self):
+        self.pool.shutdown(timeout=5)
+        self.engine.dispose()
+        shutil.rmtree(self.directory)
+
+    def enqueue(self, name, payload=None, **kwargs):
+        db = self.Session()
+        try:
+            jobs.enqueue(db, name, payload, **kwargs)
+            db.commit()
+        finally:
+            db.close()
+
+    def job(self):
+        db = self.Session()
+        try:
+            return db.query(models.Job).one()
+        finally:
+            db.close()
+
+    def update(self, **values):
+        db = self.Session()
+        try:
+            db.query(models.Job).update(values)
+            db.commit()
+        finally:
+            db.close()
+
+    def test_key_deduplicates_enqueue(self):
+        self.enqueue("test.ok", {"n": 1}, key="same")
+        self.enqueue("test.ok", {"n": 2}, key="same")
+        self.assertEqual(self.job().payload, '{"n": 1}')
+
+    def test_runs_job_to_done(self):
+        self.enqueue("test.ok", {"n": 7})
+        self.assertTrue(self.pool.run_once())
+        self.assertFalse(self.pool.run_once())
+        job = self.job()
+        self.assertEqual(calls, [7])
+        self.assertEqual((job.status, job.attempts, job.locked_until), (models.JobStatus.done, 1, None))
+
+    def test_delayed_job_is_not_claimed_early(self):
+        self.enqueue("test.ok", {"n": 1}, delay=60)
+        self.assertFalse(self.pool.run_once())
+
+    def test_failure_backs_off_then_fails(self):
+        self.enqueue("test.fail", max_attempts=2)
+        before = datetime.utcnow()
+        self.pool.run_once()
+        job = self.job()
+        self.assertEqual((job.status, job.attempts), (models.JobStatus.pending, 1))
+        self.assertGreaterEqual(job.run_after, before + timedelta(seconds=settings.JOB_RETRY_BASE_SECONDS * 0.8))
+        self.assertIn("boom", job.last_error)
+        # Geri çekilme beklenmeden ikinci deneme
+        self.assertFalse(self.pool.run_once())
+        self.update(run_after=datetime.utcnow())
+        self.pool.run_once()
+        job = self.job()
+        self.assertEqual((job.status, job.attempts), (models.JobStatus.failed, 2))
+        self.assertEqual((self.pool.metrics.retried, self.pool.metrics.failed), (1, 1))
+
+    def test_retry_delay_grows_and_is_capped(self):
+        self.assertLess(jobs.retry_delay(1), jobs.retry_delay(4))
+        self.assertLessEqual(jobs.retry_delay(100), settings.JOB_RETRY_MAX_SECONDS * 1.2)
+
+    def test_expired_lease_is_reclaimed(self):
+        self.enqueue("test.ok", {"n": 3}, max_attempts=3)
+        expired = datetime.utcnow() - timedelta(seconds=1)
+        self.update(status=models.JobStatus.running, attempts=1, locked_until=expired)
+        self.assertTrue(self.pool.run_once())
+        job = self.job()
+        self.assertEqual((job.status, job.attempts), (models.JobStatus.done, 2))
+
+    def test_expired_lease_on_final_attempt_is_failed(self):
+        self.enqueue("test.ok", {"n": 3}, max_attempts=2)
+        expired = datetime.utcnow() - timedelta(seconds=1)
+        self.update(status=models.JobStatus.running, attempts=2, locked_until=expired)
+        self.assertFalse(self.pool.run_once())
+        job = self.job()
+        self.assertEqual((job.status, job.attempts), (models.JobStatus.failed, 2))
+        self.assertEqual(calls, [])
+
+    def test_purge_removes_only_old_done_jobs(self):
+        self.enqueue("test.ok", {"n": 1}, key="old")
+        self.enqueue("test.fail", key="failed", max_attempts=1)
+        self.pool.run_once()
+        self.pool.run_once()
+        self.assertEqual(self.pool.purge(datetime.utcnow() - timedelta(hours=1)), 0)
+        self.assertEqual(self.pool.purge(datetime.utcnow() + timedelta(seconds=1)), 1)
+        self.assertEqual(self.job().status, models.JobStatus.failed)
+
+    def test_shutdown_drains_running_job(self):
+        started, release = threading.Event(), threading.Event()
+
+        @jobs.handler("test.slow")
+        def slow(db, payload):
+            started.set()
+            release.wait(5)
+            calls.append("slow")
+
+        self.enqueue("test.slow")
+        self.pool.start()
+        self.assertTrue(started.wait(5))
+        threading.Timer(0.05, release.set).start()
+        self.pool.shutdown(timeout=5)
+        self.assertEqual(calls, ["slow"])
+        self.assertEqual(self.job().status, models.JobStatus.done)
+
+if __name__ == "__main__":
+    unittest.main()
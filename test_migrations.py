@@ -0,0 +1,65 @@
+import os
+import unittest
+from datetime import datetime
+
+os.environ.setdefault("SECRET_KEY", "test")
+os.environ.setdefault("DATABASE_URL", "sqlite:///:memory:")
+os.environ.setdefault("ADMIN_PASSWORD", "test")
+
+from sqlalchemy import create_engine, inspect, text
+from app import archive, migrations, models
+
+# Geohash ve yolcu takvimi kolonları eklenmeden önceki şema
+OLD_SCHEMA = [
+    """CREATE TABLE rides (id INTEGER PRIMARY KEY, rental_id INTEGER, renter_id INTEGER,
+       start_date DATETIME NOT NULL, end_date DATETIME NOT NULL, start_location VARCHAR NOT NULL,
+       end_location VARCHAR NOT NULL, available_seats INTEGER NOT NULL)""",
+    """CREATE TABLE ride_participants (id INTEGER PRIMARY KEY, ride_id INTEGER, user_id INTEGER,
+       passengers_count INTEGER)""",
+    """INSERT INTO rides VALUES (1, 1, 1, '2030-01-01 10:00:00', '2030-01-01 12:00:00', 'A', 'B', 3)""",
+    """INSERT INTO ride_participants VALUES (1, 1, 2, 1)""",
+    # Yolculuğu silinmiş katılımcı
+    """INSERT INTO ride_participants VALUES (2, 9, 2, 1)""",
+]
+
+class TestUpgrade(unittest.TestCase):
+    def setUp(self):
+        self.engine = create_engine("sqlite://")
+        with self.engine.begin() as conn:
+            for statement in OLD_SCHEMA:
+                conn.execute(text(statement))
+        models.Base.metadata.create_all(self.engine)
+        archive.setup(self.engine)
+
+    def test_adds_missing_columns_and_backfills_schedule(self):
+        added = migrations.upgrade(self.engine)
+        self.assertEqual(added["rides"], ["start_lat", "start_lon", "end_lat", "end_lon", "start_geohash", "end_geohash",
+                                          "AUTOINCREMENT"])
+        self.assertEqual(added["ride_participants"], ["ride_start", "ride_end", "AUTOINCREMENT"])
+        with self.engine.connect() as conn:
+            row = conn.execute(text("SELECT ride_start, ride_end FROM ride_participants")).one()
+        self.assertEqual(tuple(row), ("2030-01-01 10:00:00", "2030-01-01 12:00:00"))
+
+    def test_creates_indexes_and_is_idempotent(self):
+        migrations.upgrade(self.engine)
+        self.assertEqual(migrations.upgrade(self.engine), {})
+        indexes = {index["name"] for index in inspect(self.engine).get_indexes("ride_participants")}
+        self.assertIn("ix_ride_participants_user_schedule", indexes)
+        indexes = {index["name"] for index in inspect(self.engine).get_indexes("rides")}
+        self.assertIn("ix_rides_start_geohash", indexes)
+
+    def test_autoincrement_sequence_starts_after_archived_ids(self):
+        with self.engine.begin() as conn:
+            conn.execute(archive.rides_archive.insert().values(
+                id=5, start_date=datetime(2020, 1, 1), end_date=datetime(2020, 1, 1), start_location="A",
+                end_location="B", available_seats=1, archived_at=datetime(2021, 1, 1)
+            ))
+        migrations.upgrade(self.engine)
+        with self.engine.begin() as conn:
+            conn.execute(text("""INSERT INTO rides (start_date, end_date, start_location, end_location, available_seats)
+                                 VALUES ('2030-02-01', '2030-02-01', 'A', 'B', 1)"""))
+            ids = [row[0] for row in conn.execute(text("SELECT id FROM rides ORDER BY id"))]
+        self.assertEqual(ids, [1, 6])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,110 @@
+import base64
+import os
+import unittest
+from datetime import datetime, timedelta, timezone
+
+os.environ.setdefault("SECRET_KEY", "test")
+os.environ.setdefault("DATABASE_URL", "sqlite:///:memory:")
+os.environ.setdefault("ADMIN_PASSWORD", "test")
+
+import numpy as np
+from fastapi import HTTPException
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app import models, occupancy
+from app.routers import vehicle_router
+
+T0 = datetime(2030, 1, 1, tzinfo=timezone.utc)
+
+def at(days, hours=0):
+    return T0 + timedelta(days=days, hours=hours)
+
+def decode_runs(runs):
+    return np.repeat([bool(state) for state, _ in runs], [n for _, n in runs]).astype(bool)
+
+def decode_bitmap(bitmap, length):
+    return np.unpackbits(np.frombuffer(base64.b64decode(bitmap), dtype=np.uint8))[:length].astype(bool)
+
+class TestOccupancyMatrix(unittest.TestCase):
+    def test_slot_boundaries_and_window_edges(self):
+        intervals = [
+            (1, at(-1, 12), at(0, 1)),   # pencere başından taşar: yalnızca slot 0
+            (1, at(1), at(2)),           # slot sınırında biter: slot 2 boş kalır
+            (2, at(2, 23), at(5)),       # pencere sonundan taşar
+            (2, at(-5), at(-4)),         # tamamen pencereden önce
+            (9, at(0), at(3)),           # istenmeyen araç
+        ]
+        matrix = occupancy.occupancy_matrix([1, 2, 3], intervals, at(0), at(3), "day")
+        self.assertEqual(matrix.tolist(), [[True, True, False], [False, False, True], [False, False, False]])
+
+    def test_partial_last_slot_and_hourly_granularity(self):
+        self.assertEqual(occupancy.slot_count(at(0), at(0, 5) + timedelta(minutes=30), "hour"), 6)
+        matrix = occupancy.occupancy_matrix([1], [(1, at(0, 2) + timedelta(minutes=59), at(0, 3) + timedelta(minutes=1))],
+                                            at(0), at(0, 5) + timedelta(minutes=30), "hour")
+        # Kısmen dolu slotlar dolu sayılır
+        self.assertEqual(matrix[0].tolist(), [False, False, True, True, False, False])
+
+    def test_overlapping_intervals_stay_occupied(self):
+        intervals = [(1, at(0), at(2)), (1, at(1), at(3))]
+        self.assertEqual(occupancy.occupancy_matrix([1], intervals, at(0), at(4), "day")[0].tolist(), [True, True, True, False])
+
+class TestEncodings(unittest.TestCase):
+    def test_runs(self):
+        row = np.array([True, True, False, False, False, True])
+        self.assertEqual(occupancy.encode_runs(row), [[1, 2], [0, 3], [1, 1]])
+        self.assertEqual(occupancy.encode_runs(np.array([], dtype=bool)), [])
+
+    def test_bitmap_pads_last_byte(self):
+        row = np.array([True] + [False] * 8 + [True])
+        self.assertEqual(base64.b64decode(occupancy.encode_bitmap(row)), bytes([0b10000000, 0b01000000]))
+
+    def test_round_trips(self):
+        rng = np.random.default_rng(5)
+        for length in (1, 7, 8, 9, 200):
+            row = rng.random(length) < 0.3
+            self.assertEqual(decode_runs(occupancy.encode_runs(row)).tolist(), row.tolist())
+            self.assertEqual(decode_bitmap(occupancy.encode_bitmap(row), length).tolist(), row.tolist())
+
+class TestCalendarEndpoint(unittest.TestCase):
+    def setUp(self):
+        engine = create_engine("sqlite://")
+        models.Base.metadata.create_all(engine)
+        self.db = sessionmaker(bind=engine)()
+        self.db.add_all([
+            models.Vehicle(id=1, brand="VW", model="Golf", license_plate="AA1", seats=5, owner_id=1),
+            models.Vehicle(id=2, brand="VW", model="Polo", license_plate="AA2", seats=5, owner_id=1),
+            models.Rental(vehicle_id=1, user_id=2, start_date=at(1), end_date=at(2, 6)),
+            models.VehicleBlackout(vehicle_id=2, start_date=at(0), end_date=at(1), created_at=datetime.utcnow()),
+        ])
+        self.db.commit()
+        self.user = models.User(id=2, username="r", email="r@x.com", hashed_password="x", role=models.UserRoleEnum.renter)
+
+    def tearDown(self):
+        self.db.close()
+
+    def calendar(self, vehicle_ids, end=at(4), granularity="day", encoding="rle"):
+        return vehicle_router.read_availability_calendar(
+            vehicle_ids=vehicle_ids, start_date=at(0), end_date=end, granularity=granularity,
+            encoding=encoding, db=self.db, current_user=self.user
+        )
+
+    def test_rentals_and_blackouts_are_busy(self):
+        result = self.calendar([2, 1, 2])
+        self.assertEqual(result["slots"], 4)
+        self.assertEqual([v["vehicle_id"] for v in result["vehicles"]], [2, 1])
+        self.assertEqual(result["vehicles"][0]["runs"], [[1, 1], [0, 3]])
+        self.assertEqual(result["vehicles"][1], {"vehicle_id": 1, "occupied_slots": 2, "runs": [[0, 1], [1, 2], [0, 1]]})
+
+        bitmap = self.calendar([1], granularity="hour", encoding="bitmap")["vehicles"][0]
+        self.assertEqual(bitmap["occupied_slots"], 30)
+        self.assertEqual(decode_bitmap(bitmap["bitmap"], 96).nonzero()[0].tolist(), list(range(24, 54)))
+
+    def test_rejects_bad_requests(self):
+        for kwargs, code in [({"vehicle_ids": [1, 3]}, 404), ({"vehicle_ids": [1], "end": at(0)}, 400),
+                             ({"vehicle_ids": [1], "end": at(400)}, 400)]:
+            with self.assertRaises(HTTPException) as error:
+                self.calendar(**kwargs)
+            self.assertEqual(error.exception.status_code, code)
+
+if __name__ == "__main__":
+    unittest.main()
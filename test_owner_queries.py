@@ -0,0 +1,56 @@
+import os
+import unittest
+from datetime import datetime, timedelta, timezone
+
+os.environ.setdefault("SECRET_KEY", "test")
+os.environ.setdefault("DATABASE_URL", "sqlite:///:memory:")
+os.environ.setdefault("ADMIN_PASSWORD", "test")
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app import crud, models
+
+class TestOwnerScopedQueries(unittest.TestCase):
+    def setUp(self):
+        engine = create_engine("sqlite://")
+        models.Base.metadata.create_all(engine)
+        self.db = sessionmaker(bind=engine)()
+        future = datetime.now(timezone.utc) + timedelta(days=10)
+        past = datetime.now(timezone.utc) - timedelta(days=10)
+        for i in range(1, 6):
+            self.db.add(models.Vehicle(id=i, brand="VW", model="Golf", license_plate=f"AB{i}000", seats=5,
+                                       owner_id=1 if i <= 3 else 2))
+        self.db.add_all([
+            models.Rental(id=1, vehicle_id=1, user_id=9, start_date=future, end_date=future + timedelta(days=2), total_price=100),
+            models.Rental(id=2, vehicle_id=2, user_id=9, start_date=future - timedelta(days=1), end_date=future, total_price=50),
+            models.Rental(id=3, vehicle_id=1, user_id=9, start_date=past, end_date=past + timedelta(days=1), total_price=70),
+            models.Rental(id=4, vehicle_id=4, user_id=9, start_date=future, end_date=future + timedelta(days=1), total_price=30),
+        ])
+        for rating, category, vehicle_id in [(8, "Good", 1), (10, "Excellent", 1), (4, "Fair", 2), (1, "Poor", 4)]:
+            self.db.add(models.Review(type=models.ReviewType.vehicle, rating=rating, rating_category=category,
+                                      user_id=9, vehicle_id=vehicle_id))
+        self.db.commit()
+
+    def tearDown(self):
+        self.db.close()
+
+    def test_owner_vehicles_are_paginated(self):
+        self.assertEqual([v.id for v in crud.get_vehicles_for_owner(self.db, 1)], [1, 2, 3])
+        self.assertEqual([v.id for v in crud.get_vehicles_for_owner(self.db, 1, limit=2, offset=1)], [2, 3])
+        self.assertEqual([r.id for r in crud.get_rentals_for_owner_vehicles(self.db, 1, limit=2)], [1, 2])
+
+    def test_dashboard(self):
+        dashboard = crud.get_owner_dashboard(self.db, 1, upcoming_limit=10)
+        vehicles = {v.id: v for v in dashboard.vehicles}
+        self.assertEqual(sorted(vehicles), [1, 2, 3])
+        self.assertEqual((vehicles[1].rating_average, vehicles[1].rating_count, vehicles[1].upcoming_rentals), (9.0, 2, 1))
+        self.assertEqual((vehicles[3].rating_count, vehicles[3].upcoming_rentals, vehicles[3].next_rental_start), (0, 0, None))
+        # Başlangıç sırasında; geçmiş kiralama (3) ve başka sahibin kiralaması (4) hariç
+        self.assertEqual([r.id for r in dashboard.upcoming_rentals], [2, 1])
+        self.assertEqual(dashboard.ratings.count, 3)
+        self.assertAlmostEqual(dashboard.ratings.average, 7.33)
+        self.assertEqual(dashboard.ratings.by_category, {"Good": 1, "Excellent": 1, "Fair": 1})
+        self.assertEqual(dashboard.upcoming_revenue, 150)
+
+if __name__ == "__main__":
+    unittest.main()
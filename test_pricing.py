@@ -0,0 +1,45 @@
+import os
+import unittest
+from datetime import datetime, timezone
+
+os.environ.setdefault("SECRET_KEY", "test")
+os.environ.setdefault("DATABASE_URL", "sqlite:///:memory:")
+os.environ.setdefault("ADMIN_PASSWORD", "test")
+
+import numpy as np
+from app.pricing import PricingEngine, to_epoch_hours, weekend_hours_before
+
+def day(d, hour=0):
+    return datetime(2030, 1, d, hour, tzinfo=timezone.utc)  # 2030-01-05 Cumartesi
+
+class TestPricingEngine(unittest.TestCase):
+    def setUp(self):
+        self.engine = PricingEngine(50.0, 1.5, [(7, 0.1), (3, 0.05)])
+
+    def test_weekend_hours(self):
+        hours = to_epoch_hours([day(4), day(7)])
+        self.assertEqual(weekend_hours_before(hours)[1] - weekend_hours_before(hours)[0], 48)
+
+    def test_weekday_and_weekend_rates(self):
+        self.assertEqual(self.engine.quote(100.0, day(7), day(8)), 100.0)
+        self.assertEqual(self.engine.quote(100.0, day(5), day(6)), 150.0)
+        self.assertEqual(self.engine.quote(100.0, day(4, 12), day(5, 12)), 125.0)
+
+    def test_default_rate_used_when_missing(self):
+        self.assertEqual(self.engine.quote(None, day(7), day(8)), 50.0)
+
+    def test_duration_tiers(self):
+        # 3 gün hafta içi -> %5, 7 gün (2 hafta sonu günü) -> %10
+        self.assertEqual(self.engine.quote(100.0, day(7), day(10)), 285.0)
+        self.assertEqual(self.engine.quote(100.0, day(7), day(14)), 720.0)
+
+    def test_matrix_shape_matches_scalar_quotes(self):
+        rates = self.engine.rates([100.0, None, 80.0])
+        starts, ends = [day(4), day(7)], [day(6), day(10, 6)]
+        matrix = self.engine.quote_matrix(rates, to_epoch_hours(starts), to_epoch_hours(ends))
+        self.assertEqual(matrix.shape, (3, 2))
+        expected = [[self.engine.quote(r, s, e) for s, e in zip(starts, ends)] for r in [100.0, None, 80.0]]
+        np.testing.assert_allclose(matrix, expected)
+
+if __name__ == '__main__':
+    unittest.main()
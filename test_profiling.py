@@ -0,0 +1,115 @@
+import asyncio
+import os
+import tempfile
+import time
+import unittest
+
+os.environ.setdefault("SECRET_KEY", "test")
+os.environ.setdefault("DATABASE_URL", "sqlite:///:memory:")
+os.environ.setdefault("ADMIN_PASSWORD", "test")
+
+from sqlalchemy import create_engine, text
+from starlette.concurrency import run_in_threadpool
+from app import profiling
+
+class TestRequestProfile(unittest.TestCase):
+    def test_collapsed_and_top_functions(self):
+        profile = profiling.RequestProfile("GET", "/vehicles/")
+        profile.stacks[("MainThread", "handler", "query")] += 3
+        profile.stacks[("MainThread", "handler", "serialize")] += 1
+        profile.samples = 4
+        self.assertEqual(profile.collapsed(), "MainThread;handler;query 3\nMainThread;handler;serialize 1\n")
+        top = profile.top_functions()
+        self.assertEqual(top[0], {"function": "query", "self_pct": 75.0, "total_pct": 75.0})
+
+    def test_sql_timeline_only_for_active_profile(self):
+        engine = create_engine("sqlite://")
+        profiling.instrument(engine)
+        profile = profiling.RequestProfile("GET", "/")
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+            token = profiling._active.set(profile)
+            try:
+                conn.execute(text("SELECT 2"))
+            finally:
+                profiling._active.reset(token)
+        self.assertEqual([s["statement"] for s in profile.sql], ["SELECT 2"])
+        self.assertGreaterEqual(profile.sql[0]["offset_ms"], 0)
+
+    def test_sampler_attributes_worker_threads_by_context(self):
+        def busy():
+            deadline = time.perf_counter() + 0.05
+            while time.perf_counter() < deadline:
+                pass
+
+        async def scenario():
+            profile = profiling.RequestProfile("GET", "/")
+            other = profiling.RequestProfile("GET", "/other")
+            sampler = profiling.StackSampler(profile, asyncio.get_running_loop(), 0.001, 5)
+            token = profiling._active.set(other)
+            sampler.start()
+            await run_in_threadpool(busy)
+            profiling._active.reset(token)
+            token = profiling._active.set(profile)
+            await run_in_threadpool(busy)
+            profiling._active.reset(token)
+            sampler.stop()
+            return profile
+
+        profile = asyncio.run(scenario())
+        self.assertGreater(profile.samples, 0)
+        self.assertTrue(all(stack[0] == "AnyIO worker thread" for stack in profile.stacks))
+
+class TestSampledProfiles(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def run_app(self, app, max_seconds=5):
+        middleware = profiling.ProfilingMiddleware(app, interval=0.001, max_seconds=max_seconds, sample_rate=1.0,
+                                                   output_dir=self.directory.name, max_files=10)
+        scope = {"type": "http", "method": "GET", "path": "/passengers/rides/stream", "query_string": b"", "headers": []}
+        sent = []
+
+        async def receive():
+            return {"type": "http.request", "body": b"", "more_body": False}
+
+        async def send(message):
+            sent.append(message)
+        asyncio.run(middleware(scope, receive, send))
+        return sent
+
+    def saved(self):
+        return sorted(name.rsplit(".", 1)[1] for name in os.listdir(self.directory.name))
+
+    def test_event_stream_profile_is_saved_when_stream_starts(self):
+        saved_during_stream = []
+
+        async def stream(scope, receive, send):
+            await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", b"text/event-stream")]})
+            for _ in range(3):
+                await send({"type": "http.response.body", "body": b"data: x\n\n", "more_body": True})
+                saved_during_stream.append(self.saved())
+            await send({"type": "http.response.body", "body": b""})
+
+        sent = self.run_app(stream)
+        self.assertEqual(len(sent), 5)
+        self.assertEqual(saved_during_stream, [["collapsed", "json"]] * 3)
+        self.assertEqual(self.saved(), ["collapsed", "json"])
+
+    def test_long_response_is_closed_after_max_seconds(self):
+        async def slow(scope, receive, send):
+            await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", b"text/plain")]})
+            await asyncio.sleep(0.02)
+            await send({"type": "http.response.body", "body": b"a", "more_body": True})
+            self.assertEqual(self.saved(), ["collapsed", "json"])
+            await send({"type": "http.response.body", "body": b"b"})
+
+        sent = self.run_app(slow, max_seconds=0.01)
+        self.assertEqual([m.get("body") for m in sent[1:]], [b"a", b"b"])
+        self.assertEqual(len(self.saved()), 2)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,88 @@
+import os
+import unittest
+from datetime import datetime, timedelta, timezone
+
+os.environ.setdefault("SECRET_KEY", "test")
+os.environ.setdefault("DATABASE_URL", "sqlite:///:memory:")
+os.environ.setdefault("ADMIN_PASSWORD", "test")
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app import crud, models, schemas
+
+START = datetime(2030, 1, 1, tzinfo=timezone.utc)
+
+def vehicle(plate):
+    return schemas.VehicleCreate(brand="VW", model="Golf", license_plate=plate, seats=5, luggage=2)
+
+class TestReturningWrites(unittest.TestCase):
+    def setUp(self):
+        engine = create_engine("sqlite://")
+        models.Base.metadata.create_all(engine)
+        self.db = sessionmaker(bind=engine)()
+        self.db.add_all([
+            models.Vehicle(id=1, brand="VW", model="Golf", license_plate="AA1111", seats=5, owner_id=1),
+            models.Vehicle(id=2, brand="VW", model="Polo", license_plate="BB2222", seats=5, owner_id=2),
+            models.Rental(id=1, vehicle_id=1, user_id=3, start_date=START, end_date=START + timedelta(days=1)),
+            models.Ride(id=1, rental_id=1, renter_id=3, start_date=START, end_date=START + timedelta(hours=2),
+                        start_location="Ankara", end_location="Konya", available_seats=2),
+            models.RideParticipant(id=1, ride_id=1, user_id=5, ride_start=START, ride_end=START + timedelta(hours=2)),
+            models.Review(id=1, type=models.ReviewType.vehicle, rating=8, rating_category="Very Good", user_id=5,
+                          vehicle_id=1, rental_id=1, ride_id=1),
+        ])
+        self.db.commit()
+
+    def tearDown(self):
+        self.db.close()
+
+    def fetch(self, model, row_id):
+        self.db.expire_all()
+        return self.db.get(model, row_id)
+
+    def test_owner_predicate_rejects_foreign_row(self):
+        self.assertIsNone(crud.update_vehicle(self.db, 1, vehicle("CC3333"), owner_id=2))
+        self.assertFalse(crud.delete_vehicle(self.db, 1, owner_id=2))
+        self.assertEqual(self.fetch(models.Vehicle, 1).license_plate, "AA1111")
+
+        updated = crud.update_vehicle(self.db, 1, vehicle("CC3333"), owner_id=1)
+        self.assertEqual(updated.license_plate, "CC3333")
+        self.assertEqual(self.fetch(models.Vehicle, 1).license_plate, "CC3333")
+
+    def test_admin_bypasses_owner_predicate(self):
+        self.assertEqual(crud.update_vehicle(self.db, 2, vehicle("DD4444"), owner_id=None).license_plate, "DD4444")
+        self.assertTrue(crud.delete_vehicle(self.db, 2, owner_id=None))
+        self.assertIsNone(self.fetch(models.Vehicle, 2))
+        self.assertIsNone(crud.update_vehicle(self.db, 99, vehicle("EE5555"), owner_id=None))
+
+    def test_empty_update_is_an_ownership_checked_read(self):
+        self.assertIsNone(crud.update_review(self.db, 1, schemas.ReviewUpdate(), user_id=3))
+        self.assertEqual(crud.update_review(self.db, 1, schemas.ReviewUpdate(), user_id=5).rating, 8)
+        self.assertEqual(crud.update_review(self.db, 1, schemas.ReviewUpdate(rating=3), user_id=5).rating_category, crud.categorize_rating(3))
+
+    def test_delete_nulls_orphaned_foreign_keys(self):
+        self.assertTrue(crud.delete_vehicle(self.db, 1, owner_id=1))
+        self.assertIsNone(self.fetch(models.Review, 1).vehicle_id)
+
+        self.assertTrue(crud.delete_rental(self.db, 1, user_id=3))
+        self.assertIsNone(self.fetch(models.Ride, 1).rental_id)
+        self.assertIsNone(self.fetch(models.Review, 1).rental_id)
+
+        self.assertTrue(crud.delete_ride(self.db, 1, renter_id=3))
+        self.assertIsNone(self.fetch(models.Review, 1).ride_id)
+        self.assertIsNone(self.fetch(models.RideParticipant, 1))
+
+    def test_rides_are_scoped_to_their_renter(self):
+        self.assertIsNone(crud.update_ride(self.db, 1, schemas.RideUpdate(available_seats=4), renter_id=4))
+        self.assertFalse(crud.delete_ride(self.db, 1, renter_id=4))
+        self.assertEqual(self.fetch(models.Ride, 1).available_seats, 2)
+
+        moved = START + timedelta(hours=1)
+        ride = crud.update_ride(self.db, 1, schemas.RideUpdate(start_date=moved, available_seats=4), renter_id=3)
+        self.assertEqual(ride.available_seats, 4)
+        # Katılımcı takvim projeksiyonu da güncellenir
+        participant = self.fetch(models.RideParticipant, 1)
+        self.assertEqual(participant.ride_start.replace(tzinfo=None), moved.replace(tzinfo=None))
+        self.assertIsNotNone(crud.update_ride(self.db, 1, schemas.RideUpdate(available_seats=1), renter_id=None))
+
+if __name__ == "__main__":
+    unittest.main()
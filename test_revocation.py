@@ -0,0 +1,64 @@
+import os
+import unittest
+from datetime import datetime, timedelta
+
+os.environ.setdefault("SECRET_KEY", "test")
+os.environ.setdefault("DATABASE_URL", "sqlite:///:memory:")
+os.environ.setdefault("ADMIN_PASSWORD", "test")
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app import models
+from app.revocation import BloomFilter, RevocationList
+
+class TestBloomFilter(unittest.TestCase):
+    def test_no_false_negatives(self):
+        bloom = BloomFilter(1000, 0.01)
+        items = [f"jti-{i}" for i in range(1000)]
+        for item in items:
+            bloom.add(item)
+        self.assertTrue(all(item in bloom for item in items))
+
+    def test_false_positive_rate(self):
+        bloom = BloomFilter(1000, 0.01)
+        for i in range(1000):
+            bloom.add(f"jti-{i}")
+        false_positives = sum(f"other-{i}" in bloom for i in range(10000))
+        self.assertLess(false_positives, 300)
+
+class TestRevocationList(unittest.TestCase):
+    def setUp(self):
+        engine = create_engine("sqlite://")
+        models.Base.metadata.create_all(engine)
+        self.Session = sessionmaker(bind=engine)
+        self.db = self.Session()
+        self.revocations = RevocationList(4, 0.01, 5, 3600)
+
+    def tearDown(self):
+        self.db.close()
+
+    def test_revoke_and_reuse(self):
+        expires = datetime.utcnow() + timedelta(hours=1)
+        self.assertFalse(self.revocations.is_revoked("a"))
+        self.assertTrue(self.revocations.revoke(self.db, "a", expires))
+        self.assertTrue(self.revocations.is_revoked(None, "a"))
+        self.assertFalse(self.revocations.revoke(self.db, "a", expires))
+
+    def test_grows_past_capacity(self):
+        expires = datetime.utcnow() + timedelta(hours=1)
+        for i in range(10):
+            self.revocations.revoke(self.db, f"jti-{i}", expires)
+        self.assertTrue(all(self.revocations.is_revoked(f"jti-{i}") for i in range(10)))
+
+    def test_sync_and_rebuild(self):
+        self.revocations.revoke(self.db, "expired", datetime.utcnow() - timedelta(seconds=1))
+        other = RevocationList(4, 0.01, 5, 3600)
+        other.revoke(self.db, "live", datetime.utcnow() + timedelta(hours=1))
+        self.revocations.sync(self.db)
+        self.assertTrue(self.revocations.is_revoked("live"))
+        self.revocations.rebuild(self.db)
+        self.assertFalse(self.revocations.is_revoked("expired"))
+        self.assertTrue(self.revocations.is_revoked("live"))
+
+if __name__ == "__main__":
+    unittest.main()
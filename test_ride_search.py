@@ -0,0 +1,55 @@
+import os
+import unittest
+from datetime import datetime, timedelta, timezone
+
+os.environ.setdefault("SECRET_KEY", "test")
+os.environ.setdefault("DATABASE_URL", "sqlite:///:memory:")
+os.environ.setdefault("ADMIN_PASSWORD", "test")
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app import crud, models
+
+NOW = datetime.now(timezone.utc).replace(microsecond=0)
+
+class TestRideSearch(unittest.TestCase):
+    def setUp(self):
+        engine = create_engine("sqlite://")
+        models.Base.metadata.create_all(engine)
+        self.db = sessionmaker(bind=engine)()
+        # (id, kalkışa kalan saat, boş koltuk)
+        for ride_id, hours, seats in [(1, -2, 3), (2, 1, 1), (3, 5, 3), (4, 30, 2), (5, 6, 0)]:
+            start = NOW + timedelta(hours=hours)
+            self.db.add(models.Ride(
+                id=ride_id, rental_id=1, renter_id=1, start_date=start, end_date=start + timedelta(hours=1),
+                start_location="Ankara", end_location="Konya", available_seats=seats,
+                start_lat=39.92, start_lon=32.85, start_geohash=crud._geohash_or_none(39.92, 32.85)
+            ))
+        self.db.commit()
+
+    def tearDown(self):
+        self.db.close()
+
+    def ids(self, rides):
+        return [ride.id for ride in rides]
+
+    def test_past_rides_are_excluded_by_default(self):
+        self.assertEqual(self.ids(crud.get_available_rides(self.db)), [2, 3, 4])
+
+    def test_departure_window(self):
+        rides = crud.get_available_rides(self.db, depart_after=NOW + timedelta(hours=2), depart_before=NOW + timedelta(hours=24))
+        self.assertEqual(self.ids(rides), [3])
+        # Geçmiş bir başlangıç açıkça verilirse kalkmış yolculuklar da döner
+        rides = crud.get_available_rides(self.db, depart_after=NOW - timedelta(hours=3), depart_before=NOW + timedelta(hours=2))
+        self.assertEqual(self.ids(rides), [1, 2])
+
+    def test_min_seats(self):
+        self.assertEqual(self.ids(crud.get_available_rides(self.db, min_seats=2)), [3, 4])
+        self.assertEqual(self.ids(crud.get_available_rides(self.db, min_seats=1, limit=1, offset=1)), [3])
+
+    def test_geo_search_skips_past_and_full_rides(self):
+        self.assertEqual(self.ids(crud.search_rides_near(self.db, 39.92, 32.85, radius_km=5)), [2, 3, 4])
+        self.assertEqual(self.ids(crud.search_rides_in_bbox(self.db, 39.9, 32.8, 40.0, 32.9)), [2, 3, 4])
+
+if __name__ == "__main__":
+    unittest.main()
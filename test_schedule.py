@@ -0,0 +1,116 @@
+import os
+import random
+import unittest
+from datetime import datetime, timedelta, timezone
+
+os.environ.setdefault("SECRET_KEY", "test")
+os.environ.setdefault("DATABASE_URL", "sqlite:///:memory:")
+os.environ.setdefault("ADMIN_PASSWORD", "test")
+
+from fastapi import HTTPException
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app import crud, models
+from app.schedule import PassengerSchedule
+
+def at(hour):
+    return datetime(2030, 1, 1) + timedelta(hours=hour)
+
+class TestPassengerSchedule(unittest.TestCase):
+    def setUp(self):
+        self.schedule = PassengerSchedule([(2, at(10), at(12)), (1, at(1), at(3)), (3, at(20), at(22))])
+
+    def test_intervals_are_sorted(self):
+        self.assertEqual(self.schedule.ride_ids, [1, 2, 3])
+
+    def test_overlap_detected(self):
+        self.assertEqual(self.schedule.find_conflict(at(11), at(13)), 2)
+        # Birden çok çakışmada en erken başlayan döner
+        self.assertEqual(self.schedule.find_conflict(at(0), at(30)), 1)
+        self.assertEqual(self.schedule.find_conflict(at(5), at(30)), 2)
+
+    def test_touching_intervals_do_not_conflict(self):
+        self.assertIsNone(self.schedule.find_conflict(at(12), at(20)))
+        self.assertIsNone(self.schedule.find_conflict(at(3), at(10)))
+
+    def test_long_earlier_interval_still_found(self):
+        # Başlangıcı erken, bitişi geç olan kayıt sonraki kayıtların arkasında kalmamalı
+        schedule = PassengerSchedule([(1, at(0), at(50)), (2, at(5), at(6))])
+        self.assertEqual(schedule.find_conflict(at(30), at(31)), 1)
+
+    def test_add_keeps_order(self):
+        self.schedule.add(at(14), at(15), 4)
+        self.assertEqual(self.schedule.ride_ids, [1, 2, 4, 3])
+        self.assertEqual(self.schedule.find_conflict(at(14), at(14.5)), 4)
+        self.assertEqual(len(self.schedule), 4)
+
+    def test_matches_linear_scan(self):
+        rng = random.Random(3)
+        schedule = PassengerSchedule()
+        intervals = []
+        for ride_id in range(300):
+            start = rng.uniform(0, 500)
+            end = start + rng.uniform(0.1, 20)
+            schedule.add(at(start), at(end), ride_id)
+            intervals.append((ride_id, start, end))
+            self.assertEqual(schedule.max_ends, [max(schedule.ends[:i + 1]) for i in range(len(schedule))])
+        for _ in range(300):
+            start = rng.uniform(0, 520)
+            end = start + rng.uniform(0.1, 10)
+            overlapping = [(s, ride_id) for ride_id, s, e in intervals if s < end and e > start]
+            expected = min(overlapping)[1] if overlapping else None
+            self.assertEqual(schedule.find_conflict(at(start), at(end)), expected)
+
+class TestJoinRides(unittest.TestCase):
+    def setUp(self):
+        engine = create_engine("sqlite://")
+        models.Base.metadata.create_all(engine)
+        self.db = sessionmaker(bind=engine)()
+        # (id, başlangıç saati, süre, boş koltuk)
+        for ride_id, hour, hours, seats in [(1, 10, 2, 2), (2, 11, 2, 2), (3, 14, 1, 2), (4, 16, 1, 0), (5, 20, 1, 2)]:
+            start = at(hour).replace(tzinfo=timezone.utc)
+            self.db.add(models.Ride(id=ride_id, rental_id=1, renter_id=1, start_date=start, end_date=start + timedelta(hours=hours),
+                                    start_location="Ankara", end_location="Konya", available_seats=seats))
+        self.db.commit()
+
+    def tearDown(self):
+        self.db.close()
+
+    def joined(self, user_id=7):
+        return sorted(p.ride_id for p in crud.get_user_joined_rides(self.db, user_id))
+
+    def seats(self, ride_id):
+        self.db.expire_all()
+        return self.db.get(models.Ride, ride_id).available_seats
+
+    def test_joins_all_or_nothing(self):
+        with self.assertRaises(HTTPException) as error:
+            crud.join_rides(self.db, [3, 4], user_id=7)
+        self.assertEqual(error.exception.status_code, 409)
+        self.assertEqual(error.exception.detail, [{"ride_id": 4, "reason": "No available seats"}])
+        self.assertEqual(self.joined(), [])
+        self.assertEqual(self.seats(3), 2)
+
+        participants = crud.join_rides(self.db, [5, 3, 3], user_id=7)
+        self.assertEqual([p.ride_id for p in participants], [3, 5])
+        self.assertEqual((self.seats(3), self.seats(5)), (1, 1))
+
+    def test_selected_rides_conflict_with_each_other(self):
+        with self.assertRaises(HTTPException) as error:
+            crud.join_rides(self.db, [1, 2], user_id=7)
+        self.assertEqual(error.exception.detail, [{"ride_id": 2, "reason": "Time conflict with ride 1"}])
+        self.assertEqual(self.joined(), [])
+
+    def test_existing_participation_is_checked(self):
+        self.assertTrue(crud.join_ride(self.db, 1, user_id=7))
+        self.assertFalse(crud.join_ride(self.db, 2, user_id=7))
+        with self.assertRaises(HTTPException):
+            crud.join_rides(self.db, [3, 2], user_id=7)
+        self.assertEqual(self.joined(), [1])
+        # Bitişik yolculuk çakışma sayılmaz; başka yolcu etkilenmez
+        self.assertTrue(crud.join_ride(self.db, 2, user_id=8))
+        self.assertTrue(crud.check_passenger_time_conflict(self.db, 7, at(11), at(11.5)))
+        self.assertFalse(crud.check_passenger_time_conflict(self.db, 7, at(12), at(13)))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,56 @@
+import os
+import unittest
+from datetime import datetime, timedelta, timezone
+
+os.environ.setdefault("SECRET_KEY", "test")
+os.environ.setdefault("DATABASE_URL", "sqlite:///:memory:")
+os.environ.setdefault("ADMIN_PASSWORD", "test")
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app import crud, models, occupancy
+
+T0 = datetime(2030, 1, 1, tzinfo=timezone.utc)
+
+def day(n):
+    return T0 + timedelta(days=n)
+
+class TestFreeSlots(unittest.TestCase):
+    def test_gap_scan(self):
+        intervals = [
+            (1, day(0), day(2)), (1, day(3), day(4)), (1, day(6), day(9)),
+            (2, day(1), day(5)), (2, day(2), day(3)),
+        ]
+        slots = occupancy.free_slots([2, 1, 3], intervals, day(0), day(12), timedelta(days=2), limit=5)
+        self.assertEqual(slots, [
+            (day(0), 3, day(12)),
+            (day(4), 1, day(6)),
+            (day(5), 2, day(12)),
+            (day(9), 1, day(12)),
+        ])
+        # Bir günlük boşluk (araç 1, gün 2-3) iki günlük kiralamaya yetmez
+        self.assertEqual(occupancy.free_slots([1], intervals, day(0), day(12), timedelta(days=1), limit=1), [(day(2), 1, day(3))])
+
+    def test_intervals_for_unknown_vehicles_are_skipped(self):
+        intervals = [(1, day(0), day(1)), (2, day(0), day(3))]
+        self.assertEqual(occupancy.free_slots([2], intervals, day(0), day(5), timedelta(days=1), limit=3), [(day(3), 2, day(5))])
+
+    def test_find_free_slots_filters_vehicles(self):
+        engine = create_engine("sqlite://")
+        models.Base.metadata.create_all(engine)
+        db = sessionmaker(bind=engine)()
+        for i, seats in enumerate([5, 7, 7], start=1):
+            db.add(models.Vehicle(id=i, brand="VW", model="Touran", license_plate=f"AB{i}000", seats=seats, owner_id=1))
+        db.add_all([
+            models.Rental(vehicle_id=2, user_id=9, start_date=day(0), end_date=day(4), total_price=1),
+            models.Rental(vehicle_id=3, user_id=9, start_date=day(1), end_date=day(2), total_price=1),
+            models.Rental(vehicle_id=3, user_id=9, start_date=day(5), end_date=day(6), total_price=1),
+        ])
+        db.commit()
+        slots = crud.find_free_slots(db, timedelta(days=3), day(0), day(10), limit=2, min_seats=7)
+        self.assertEqual([(s.vehicle_id, s.start_date) for s in slots], [(3, day(2)), (2, day(4))])
+        self.assertEqual(slots[0].free_until, day(5))
+        db.close()
+
+if __name__ == "__main__":
+    unittest.main()
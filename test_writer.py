@@ -0,0 +1,115 @@
+import os
+import shutil
+import tempfile
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+os.environ.setdefault("SECRET_KEY", "test")
+os.environ.setdefault("DATABASE_URL", "sqlite:///:memory:")
+os.environ.setdefault("ADMIN_PASSWORD", "test")
+
+from fastapi import HTTPException
+from sqlalchemy import event
+from app import crud, models, schemas, writer
+
+def review(rating=8):
+    return schemas.ReviewCreate(type=models.ReviewType.vehicle, rating=rating, vehicle_id=1)
+
+class TestWriteCoordinator(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.engine = writer.writer_engine(f"sqlite:///{os.path.join(self.directory, 'writes.db')}")
+        models.Base.metadata.create_all(self.engine)
+        self.coordinator = writer.WriteCoordinator(self.engine, queue_size=100, max_batch=16, max_delay=0.01)
+
+    def tearDown(self):
+        self.coordinator.stop()
+        self.engine.dispose()
+        shutil.rmtree(self.directory)
+
+    def count(self, model):
+        with writer.GroupSession(bind=self.engine) as db:
+            return db.query(model).count()
+
+    def test_failed_unit_only_rolls_back_its_savepoint(self):
+        def rejected(db):
+            crud.create_review(db, review(), user_id=1)
+            raise HTTPException(status_code=409, detail="conflict")
+
+        def rolled_back(db):
+            db.add(models.Review(type=models.ReviewType.vehicle, rating=1, rating_category="Poor", user_id=2, vehicle_id=1))
+            db.rollback()
+            return False
+
+        units = [writer._Unit(lambda db: crud.create_review(db, review(), user_id=1)), writer._Unit(rejected),
+                 writer._Unit(rolled_back), writer._Unit(lambda db: crud.create_review(db, review(3), user_id=3))]
+        self.coordinator.commit_group(units)
+
+        self.assertEqual(units[0].future.result().rating_category, "Very Good")
+        self.assertEqual(units[1].future.exception().status_code, 409)
+        self.assertFalse(units[2].future.result())
+        self.assertEqual(units[3].future.result().user_id, 3)
+        self.assertEqual(self.count(models.Review), 2)
+        self.assertEqual(self.coordinator.stats()["groups"], 1)
+
+    def test_after_commit_state_survives_savepoints(self):
+        committed = []
+        listener = lambda session: committed.append(list(session.info.get("events", [])))
+        event.listen(writer.GroupSession, "after_commit", listener)
+        try:
+            def stage(value, fail=False):
+                def unit(db):
+                    db.info.setdefault("events", []).append(value)
+                    if fail:
+                        raise ValueError(value)
+                    return value
+                return writer._Unit(unit)
+            self.coordinator.commit_group([stage("a"), stage("b", fail=True), stage("c")])
+        finally:
+            event.remove(writer.GroupSession, "after_commit", listener)
+        # SAVEPOINT commit'leri boş info görür; gerçek commit iki başarılı işin olaylarını birlikte görür
+        self.assertEqual([events for events in committed if events], [["a", "c"]])
+
+    def test_concurrent_writes_are_grouped(self):
+        with writer.GroupSession(bind=self.engine) as db:
+            db.add_all([models.Vehicle(id=i, brand="VW", model="Golf", license_plate=f"AB{i}000", seats=5, owner_id=1)
+                        for i in range(1, 6)])
+            db.commit()
+        self.coordinator.start()
+        start = datetime.now(timezone.utc) + timedelta(days=1)
+        rentals = [
+            schemas.RentalCreate(vehicle_id=i % 5 + 1, start_date=start + timedelta(days=i), end_date=start + timedelta(days=i, hours=1))
+            for i in range(40)
+        ]
+        with ThreadPoolExecutor(max_workers=20) as pool:
+            results = list(pool.map(
+                lambda r: self.coordinator.execute(lambda db: crud.create_rental(db, r, user_id=1), timeout=10),
+                rentals
+            ))
+        self.assertEqual(len({r.id for r in results}), 40)
+        self.assertEqual(self.count(models.Rental), 40)
+        stats = self.coordinator.stats()
+        self.assertEqual(stats["committed"], 40)
+        self.assertLess(stats["groups"], 40)
+
+    def test_group_failure_fails_every_unit(self):
+        def unreleasable(db):
+            db.unit = None  # SAVEPOINT bırakılamaz; grup commit edilemez
+            return "lost"
+
+        units = [writer._Unit(lambda db: crud.create_review(db, review(), user_id=1)), writer._Unit(unreleasable),
+                 writer._Unit(lambda db: crud.create_review(db, review(), user_id=2))]
+        self.coordinator.commit_group(units)
+        self.assertTrue(all(unit.future.exception() is not None for unit in units))
+        self.assertEqual(self.count(models.Review), 0)
+        self.assertEqual(self.coordinator.stats()["group_failures"], 1)
+
+    def test_full_queue_is_rejected(self):
+        coordinator = writer.WriteCoordinator(self.engine, queue_size=1, max_batch=1, max_delay=0)
+        coordinator.submit(lambda db: None)
+        with self.assertRaises(writer.WriterBusy):
+            coordinator.submit(lambda db: None)
+
+if __name__ == "__main__":
+    unittest.main()